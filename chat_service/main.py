@@ -1,4 +1,6 @@
+from contextlib import asynccontextmanager
 from fastapi import FastAPI
+from shared_utils.llm_rate_limiter import llm_cluster_limiter
 from routers import health, chat
 
 import logging
@@ -8,7 +10,14 @@ logging.basicConfig(
     level=logging.INFO, format="%(asctime)s [%(levelname)s] %(name)s: %(message)s"
 )
 
-app = FastAPI(root_path="/chat")
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    yield
+    await llm_cluster_limiter.close()
+
+
+app = FastAPI(root_path="/chat", lifespan=lifespan)
 
 app.include_router(health.router)
 app.include_router(chat.router)
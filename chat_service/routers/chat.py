@@ -1,9 +1,12 @@
 from fastapi import APIRouter, HTTPException, Depends
 from fastapi.concurrency import run_in_threadpool
-from openai import OpenAI, APIError
+from openai import OpenAI, APIError, APIConnectionError, InternalServerError, RateLimitError
+from shared_utils.llm_rate_limiter import INTERACTIVE, LLM_CLUSTER_LEASE_SECONDS, llm_cluster_limiter
 from shared_utils.openai_client import get_openai_client
+import asyncio
 import logging
 import os
+import random
 from models.chat import ChatRequest
 
 router = APIRouter()
@@ -11,6 +14,41 @@ logger = logging.getLogger(__name__)
 
 _OPENAI_MODEL_DEFAULT = "qwen2.5-0.5b-instruct"
 OPENAI_MODEL_NAME = os.getenv("OPENAI_MODEL", _OPENAI_MODEL_DEFAULT)
+# Each attempt gives up before its cluster lease expires, so the LLM server never
+# sees more requests than the cluster budget allows
+CHAT_TIMEOUT_SECONDS = min(
+    float(os.getenv("CHAT_TIMEOUT_SECONDS", "120")), 0.9 * LLM_CLUSTER_LEASE_SECONDS
+)
+# Retries of connection errors, timeouts, 429s and 5xx, as the OpenAI client would make
+CHAT_MAX_RETRIES = int(os.getenv("CHAT_MAX_RETRIES", "2"))
+RETRYABLE_ERRORS = (APIConnectionError, RateLimitError, InternalServerError)
+
+
+async def create_completion(client: OpenAI, chat_request: ChatRequest):
+    """Ask the LLM for a reply, retrying transient failures.
+
+    The client's own retries are turned off, so that every attempt takes a
+    slot of the LLM server's cluster-wide budget, shared with translation
+    and ahead of its bulk requests, and backs off without holding one.
+    """
+    for attempt in range(CHAT_MAX_RETRIES + 1):
+        try:
+            async with llm_cluster_limiter.slot(chat_request.id or "chat", INTERACTIVE):
+                return await run_in_threadpool(
+                    client.with_options(timeout=CHAT_TIMEOUT_SECONDS, max_retries=0).chat.completions.create,
+                    model=OPENAI_MODEL_NAME,
+                    messages=[
+                        {
+                            "role": "user",
+                            "content": chat_request.message,
+                        }
+                    ],
+                )
+        except RETRYABLE_ERRORS as e:
+            if attempt == CHAT_MAX_RETRIES:
+                raise
+            logger.warning(f"{type(e).__name__} from the LLM (attempt {attempt + 1}/{CHAT_MAX_RETRIES + 1}); retrying")
+        await asyncio.sleep(random.uniform(0, min(0.5 * 2 ** attempt, 8.0)))
 
 
 @router.post("/chat", status_code=201)
@@ -22,16 +60,7 @@ async def handle_chat(
     Handle incoming chat requests and return AI responses.
     """
     try:
-        response = await run_in_threadpool(
-            client.chat.completions.create,
-            model=OPENAI_MODEL_NAME,
-            messages=[
-                {
-                    "role": "user",
-                    "content": chat_request.message,
-                }
-            ],
-        )
+        response = await create_completion(client, chat_request)
     except APIError as e:
         logger.error(f"Unexpected error during upload: {e}", exc_info=True)
         raise HTTPException(status_code=500, detail="Internal server error")
@@ -1,6 +1,10 @@
+from contextlib import asynccontextmanager
 from fastapi import FastAPI
+from shared_utils.llm_rate_limiter import llm_cluster_limiter
 from routers import health
 from docling_translation_service.routers import translation
+from utils.llm_client import start_llm_client, close_llm_client
+from utils.translation_memory import translation_memory
 import logging
 
 # Set up logger
@@ -9,7 +13,18 @@ logging.basicConfig(
     format="%(asctime)s [%(levelname)s] %(name)s: %(message)s"
 )
 
-app = FastAPI(root_path="/docling_translation")
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # One pooled LLM client per process, shared by every translation task
+    await start_llm_client()
+    yield
+    await close_llm_client()
+    await translation_memory.close()
+    await llm_cluster_limiter.close()
+
+
+app = FastAPI(root_path="/docling_translation", lifespan=lifespan)
 
 app.include_router(health.router)
 app.include_router(translation.router)
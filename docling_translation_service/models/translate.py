@@ -1,4 +1,4 @@
-from pydantic import BaseModel
+from pydantic import BaseModel, computed_field
 from typing import Optional, List, Any
 
 class DoclingTranslationResponse(BaseModel):
@@ -14,8 +14,37 @@ class DoclingTranslationResponse(BaseModel):
     form_items: List[Any]
     pages: Any
 
+class TranslationStats(BaseModel):
+    segments: int = 0
+    skipped_label: int = 0
+    skipped_language: int = 0
+    untranslatable: int = 0
+    unique: int = 0
+    resumed: int = 0
+    memory_hits: int = 0
+    llm_requests: int = 0
+    table_requests: int = 0
+    fallbacks: int = 0
+    failed: int = 0
+
+    @computed_field
+    @property
+    def hit_ratio(self) -> float:
+        """Share of unique translatable segments answered by the translation memory"""
+        return self.memory_hits / self.unique if self.unique else 0.0
+
 class TranslateResponse(BaseModel):
     doc_id: str
     docling: Optional[DoclingTranslationResponse] = None
     source_lang: str
-    target_lang: str
\ No newline at end of file
+    target_lang: str
+
+class TranslationJobResponse(BaseModel):
+    doc_id: str
+    status: str
+    done: int = 0
+    total: int = 0
+    stats: Optional[TranslationStats] = None
+    error: Optional[str] = None
+    result_key: Optional[str] = None
+    result_url: Optional[str] = None
@@ -1,67 +1,130 @@
-from fastapi import APIRouter, Body
-from fastapi.responses import JSONResponse
-from models.translate import TranslateResponse
-from shared_utils.s3_utils import save_job, load_job, upload_fileobj
+from fastapi import APIRouter, BackgroundTasks, Body
+from fastapi.responses import JSONResponse, StreamingResponse
+from models.translate import DoclingTranslationResponse, TranslateResponse, TranslationJobResponse, TranslationStats
+from shared_utils.llm_rate_limiter import BULK, llm_cluster_limiter
+from shared_utils.s3_utils import generate_presigned_url, open_object, save_job, load_job, upload_fileobj
+from utils.adaptive_limiter import backoff_delay, llm_limiter, retry_after_seconds
+from utils.job_checkpoint import TranslationCheckpoint
+from utils.job_events import job_events
+from utils.llm_client import LLM_MODEL, LLM_URL, get_llm_client
+from utils.segment_batching import build_batch_prompt, build_table_prompt, cell_id, pack_segments, parse_batch_reply
+from utils.segment_planner import SKIP_LABEL, SKIP_LANGUAGE, language_code, skip_reason
+from utils.translation_memory import normalize, translation_memory
 
 import os
 import logging
 import httpx
+import ijson
 import io
 
 import asyncio
-from asyncio import Semaphore
+import time
+from contextlib import closing
+from contextvars import ContextVar
+from decimal import Decimal
 import traceback
 import json
 
 router = APIRouter(prefix="/translation", tags=["translation"])
 logger = logging.getLogger(__name__)
 
-LLM_URL = os.getenv("LLM_URL")
-TOKEN = os.getenv("LLM_API_TOKEN")
+LLM_MAX_RETRIES = int(os.getenv("LLM_MAX_RETRIES", "5"))
+# Overloaded or briefly unavailable backends; these are retried with backoff
+RETRYABLE_STATUS_CODES = {429, 502, 503, 504}
+# Short segments are sent together, up to this many estimated prompt tokens or items per request
+LLM_BATCH_TOKEN_BUDGET = int(os.getenv("LLM_BATCH_TOKEN_BUDGET", "1500"))
+LLM_BATCH_MAX_ITEMS = int(os.getenv("LLM_BATCH_MAX_ITEMS", "40"))
+# grid: each table is translated as a whole, a few rows per request; cells: table cells are batched like texts
+TRANSLATION_TABLE_MODE = os.getenv("TRANSLATION_TABLE_MODE", "grid")
+LLM_TABLE_MAX_CELLS = int(os.getenv("LLM_TABLE_MAX_CELLS", "200"))
 
-LLM_CONCURRENCY = int(os.getenv("LLM_CONCURRENCY", "5"))
-semaphore = Semaphore(LLM_CONCURRENCY)
+TRANSLATION_STREAM_KEEPALIVE_SECONDS = float(os.getenv("TRANSLATION_STREAM_KEEPALIVE_SECONDS", "15"))
+TRANSLATION_STREAM_POLL_SECONDS = float(os.getenv("TRANSLATION_STREAM_POLL_SECONDS", "2"))
+# A processing job whose heartbeat is older than this is reported as failed; its process is gone
+TRANSLATION_JOB_STALE_SECONDS = float(os.getenv("TRANSLATION_JOB_STALE_SECONDS", "120"))
+STALE_JOB_ERROR = "Translation job stopped responding; post the document again to resume it."
 
-async def translate(prompt, source_lang=None, target_lang="English"):
+# Tenant the cluster LLM limiter accounts requests to; each translation job is its own tenant
+current_tenant = ContextVar("current_tenant", default="translation")
+
+# doc_ids with a job running in this process, so a repeated request does not start a second one
+running_jobs = set()
+
+def system_prompt_for(source_lang, target_lang):
     if source_lang:
-        system_prompt = (
+        return (
             f"You are a professional translator. Given the input language '{source_lang}', "
             f"think deeply and translate the following to '{target_lang}'. "
             f"Return only the translated text."
         )
-    else:
-        system_prompt = (
-            f"You are a professional translator. Think deeply and translate the following to '{target_lang}'. "
-            f"Detect the source language automatically and return only the translated text."
-        )
-    retries = 3
-    delay = 2
+    return (
+        f"You are a professional translator. Think deeply and translate the following to '{target_lang}'. "
+        f"Detect the source language automatically and return only the translated text."
+    )
 
-    for attempt in range(retries):
-        try:
-            timeout = httpx.Timeout(60.0, connect=10.0)
-            async with httpx.AsyncClient(timeout=timeout) as client:
-                r = await client.post(
-                    LLM_URL,
-                    headers={
-                        "Content-Type": "application/json",
-                        "Authorization": f"Bearer {TOKEN}"
-                    },
-                    json={
-                        "model": "qwen2.5",
-                        "messages": [
-                            {"role": "system", "content": system_prompt},
-                            {"role": "user", "content": prompt}
-                        ],
-                        "temperature": 0
-                    }
-                )
-        except httpx.ReadTimeout as e:
-            logger.warning(f"ReadTimeout during LLM call (attempt {attempt + 1}/{retries}): {e}")
-            if attempt < retries - 1:
-                await asyncio.sleep(delay)
+def batch_system_prompt_for(source_lang, target_lang):
+    source = f"from '{source_lang}' " if source_lang else ""
+    return (
+        f"You are a professional translator. The input is a JSON array of objects with an 'id' and a 'text'. "
+        f"Translate each 'text' {source}to '{target_lang}', translating every item on its own. "
+        f"Return only a JSON array with one object per input item, keeping each 'id' unchanged "
+        f"and putting the translation in 'text'."
+    )
+
+def table_system_prompt_for(source_lang, target_lang):
+    source = f"from '{source_lang}' " if source_lang else ""
+    return (
+        f"You are a professional translator. The input is a JSON object whose 'cells' are cells of one table "
+        f"in row-major order; each id 'rXcY' is the cell's row and column. Translate each cell's 'text' {source}"
+        f"to '{target_lang}', using the rest of the table as context and keeping terms consistent across the table. "
+        f"Return only a JSON object {{\"cells\": [...]}} with one object per input cell, keeping each 'id' "
+        f"unchanged and putting the translation in 'text'."
+    )
+
+async def call_llm(system_prompt, prompt):
+    # Shared keep-alive client, so calls reuse pooled connections instead of a new handshake each
+    client = get_llm_client()
+
+    for attempt in range(LLM_MAX_RETRIES + 1):
+        retry_after = None
+        # Backoff happens outside the slot, so waiting requests do not hold concurrency
+        async with llm_limiter.slot() as ticket:
+            try:
+                # The cluster-wide budget is shared with other replicas and chat, which takes priority
+                async with llm_cluster_limiter.slot(current_tenant.get(), BULK):
+                    started = time.monotonic()
+                    r = await client.post(
+                        LLM_URL,
+                        json={
+                            "model": LLM_MODEL,
+                            "messages": [
+                                {"role": "system", "content": system_prompt},
+                                {"role": "user", "content": prompt}
+                            ],
+                            "temperature": 0
+                        }
+                    )
+            except (httpx.TimeoutException, httpx.NetworkError) as e:
+                llm_limiter.on_overload(ticket, type(e).__name__)
+                if attempt == LLM_MAX_RETRIES:
+                    raise
+                logger.warning(f"{type(e).__name__} during LLM call (attempt {attempt + 1}/{LLM_MAX_RETRIES + 1}): {e}")
             else:
-                raise
+                if r.status_code not in RETRYABLE_STATUS_CODES:
+                    # Only answers train the limiter up; other server errors count against it, and
+                    # client errors (a prompt the backend rejects) say nothing about its load
+                    if r.status_code < 400:
+                        llm_limiter.on_success(ticket, time.monotonic() - started, len(system_prompt) + len(prompt))
+                    elif r.status_code >= 500:
+                        llm_limiter.on_overload(ticket, f"HTTP {r.status_code}")
+                    break
+                llm_limiter.on_overload(ticket, f"HTTP {r.status_code}")
+                if attempt == LLM_MAX_RETRIES:
+                    break
+                retry_after = retry_after_seconds(r.headers.get("Retry-After"))
+                logger.warning(f"LLM returned {r.status_code} (attempt {attempt + 1}/{LLM_MAX_RETRIES + 1})")
+
+        await asyncio.sleep(backoff_delay(attempt, retry_after))
 
     r.raise_for_status()
     try:
@@ -71,109 +134,479 @@ async def translate(prompt, source_lang=None, target_lang="English"):
         logger.error(f"Failed to parse LLM response: {e}")
         return None
 
+async def translate(prompt, source_lang=None, target_lang="English"):
+    return await call_llm(system_prompt_for(source_lang, target_lang), prompt)
+
+async def translate_batch(segments, source_lang, target_lang):
+    """Translate several (id, text) segments in one request; returns the valid translations by id"""
+    reply = await call_llm(batch_system_prompt_for(source_lang, target_lang), build_batch_prompt(segments))
+    return parse_batch_reply(reply, segments)
+
+async def translate_table(segments, source_lang, target_lang):
+    """Translate (cell_id, text) cells of one table in one request; returns the valid translations by cell id"""
+    reply = await call_llm(table_system_prompt_for(source_lang, target_lang), build_table_prompt(segments))
+    return parse_batch_reply(reply, segments)
+
+def entry_text(entry):
+    return entry.get("text") or entry.get("orig")
+
 async def safe_translate(entry, source_lang, target_lang):
-    async with semaphore:
-        original_text = entry.get("text") or entry.get("orig")
-        entry_dict = dict(entry) if not isinstance(entry, dict) else entry
+    original_text = entry_text(entry)
+    entry_dict = dict(entry) if not isinstance(entry, dict) else entry
+
+    if original_text:
+        try:
+            translated = await translate(original_text, source_lang=source_lang, target_lang=target_lang)
+            entry_dict["translated_text"] = translated or "error"
+        except Exception as e:
+            logger.warning(f"Translation failed for text '{original_text[:30]}...': {e}")
+            entry_dict["translated_text"] = "error"
+    else:
+        entry_dict["translated_text"] = "error"
+
+    return entry_dict
+
+async def translate_entries(
+    entries, source_lang, target_lang, known=None, on_progress=None, table_cells=None, on_segments=None
+):
+    """Translate docling items, returning them with the job's translation stats.
 
-        if original_text:
+    Segments that need no translation (by docling label, content or detected
+    language, see `utils.segment_planner`) are copied as is, identical texts
+    are translated once, and the rest is taken from `known` (a resumed job's
+    checkpoint) or the translation memory before any LLM call. Misses are
+    packed into batched LLM requests; items left out of a batch reply, or
+    whose batch request failed, are retried one by one with `safe_translate`.
+
+    `table_cells` maps the index of each table cell entry to its
+    (table_idx, cell_id). Cells listed there are translated table by table
+    with grid prompts instead of being batched with the texts.
+
+    `on_progress(translations, done, total)` is awaited with the translations
+    learned at each step and the number of segments finished so far, and
+    `on_segments(indices)` is called with the entries whose translation has
+    just become final.
+    """
+    entries = [dict(entry) if not isinstance(entry, dict) else entry for entry in entries]
+    stats = TranslationStats()
+    target_code = language_code(target_lang)
+
+    def settle(indices):
+        if on_segments is not None and indices:
+            on_segments(indices)
+
+    # Normalized text -> indices of the entries that share it
+    groups = {}
+    copied = []
+    for i, entry in enumerate(entries):
+        text = entry_text(entry)
+        if not text:
+            entry["translated_text"] = "error"
+            continue
+        stats.segments += 1
+        reason = skip_reason(entry, text, target_code)
+        if reason is not None:
+            entry["translated_text"] = text
+            copied.append(i)
+            if reason == SKIP_LABEL:
+                stats.skipped_label += 1
+            elif reason == SKIP_LANGUAGE:
+                stats.skipped_language += 1
+            else:
+                stats.untranslatable += 1
+            continue
+        groups.setdefault(normalize(text), []).append(i)
+
+    settle(copied)
+
+    unique = list(groups.values())
+    stats.unique = len(unique)
+
+    def finish(segment_id):
+        """Copy a group's translation to its duplicates; returns the group's entry indices"""
+        indices = unique[segment_id]
+        for i in indices[1:]:
+            entries[i]["translated_text"] = entries[indices[0]]["translated_text"]
+        return indices
+
+    texts = [entry_text(entries[indices[0]]) for indices in unique]
+    keys = [translation_memory.key(text, source_lang, target_lang, LLM_MODEL) for text in texts]
+    known = known or {}
+    remembered = {key: known[key] for key in keys if key in known}
+    stats.resumed = len(remembered)
+    from_memory = await translation_memory.get_many(key for key in keys if key not in remembered)
+    stats.memory_hits = len(from_memory)
+    remembered.update(from_memory)
+
+    # Segment ids index into `unique`; each group is translated through its first entry
+    segments = []
+    table_segments = {}
+    cell_ids = {}
+    used_cell_ids = {}
+    table_cells = table_cells or {}
+    done = stats.untranslatable + stats.skipped_label + stats.skipped_language
+    recalled = []
+    for segment_id, (indices, key) in enumerate(zip(unique, keys)):
+        if key in remembered:
+            entries[indices[0]]["translated_text"] = remembered[key]
+            recalled.extend(finish(segment_id))
+            done += len(indices)
+            continue
+        segments.append((segment_id, texts[segment_id]))
+        # Text that also appears in a table is translated with the first table it appears in
+        first_cell = next((i for i in indices if i in table_cells), None)
+        if first_cell is None:
+            continue
+        table_idx, cell_id = table_cells[first_cell]
+        used = used_cell_ids.setdefault(table_idx, set())
+        cell_ids[segment_id] = cell_id if cell_id not in used else f"{cell_id}_{segment_id}"
+        used.add(cell_ids[segment_id])
+        table_segments.setdefault(table_idx, []).append((first_cell, segment_id, texts[segment_id]))
+
+    async def progress(translations):
+        if on_progress is not None:
+            await on_progress(translations, done, stats.segments)
+
+    settle(recalled)
+    await progress(remembered)
+
+    # (batch, is_table) pairs; a table is split into a few requests only when it exceeds the token budget
+    in_tables = {segment_id for cells in table_segments.values() for _, segment_id, _ in cells}
+    batches = [
+        (batch, False)
+        for batch in pack_segments(
+            [segment for segment in segments if segment[0] not in in_tables], LLM_BATCH_TOKEN_BUDGET, LLM_BATCH_MAX_ITEMS
+        )
+    ]
+    for cells in table_segments.values():
+        # Cells go out in the table's row-major order, so each request covers whole runs of rows
+        cells = [(segment_id, text) for _, segment_id, text in sorted(cells)]
+        table_batches = pack_segments(cells, LLM_BATCH_TOKEN_BUDGET, LLM_TABLE_MAX_CELLS)
+        batches.extend((batch, True) for batch in table_batches)
+        stats.table_requests += len(table_batches)
+    stats.llm_requests = len(batches)
+    learned = {}
+
+    async def run_batch(batch, is_table):
+        nonlocal done
+        translations = {}
+        if len(batch) > 1 or is_table:
             try:
-                translated = await translate(original_text, source_lang=source_lang, target_lang=target_lang)
-                entry_dict["translated_text"] = translated or "error"
+                if is_table:
+                    by_cell = await translate_table(
+                        [(cell_ids[segment_id], text) for segment_id, text in batch], source_lang, target_lang
+                    )
+                    translations = {
+                        segment_id: by_cell[cell_ids[segment_id]] for segment_id, _ in batch if cell_ids[segment_id] in by_cell
+                    }
+                else:
+                    translations = await translate_batch(batch, source_lang, target_lang)
             except Exception as e:
-                logger.warning(f"Translation failed for text '{original_text[:30]}...': {e}")
-                entry_dict["translated_text"] = "error"
-        else:
-            entry_dict["translated_text"] = "error"
+                logger.warning(f"Batch translation of {len(batch)} segments failed: {e}")
+        for segment_id, text in translations.items():
+            entries[unique[segment_id][0]]["translated_text"] = text
 
-        return entry_dict
+        failed = [segment_id for segment_id, _ in batch if segment_id not in translations]
+        if len(batch) > 1 or is_table:
+            stats.llm_requests += len(failed)
+        stats.fallbacks += len(failed)
+        await asyncio.gather(*(safe_translate(entries[unique[segment_id][0]], source_lang, target_lang) for segment_id in failed))
 
-@router.post("/", response_model=TranslateResponse)
-async def doc_translate(payload: TranslateResponse = Body(...)):
-    doc_id = payload.doc_id
-    data = payload.docling
-    source_lang = payload.source_lang
-    target_lang = payload.target_lang or "English"
+        batch_learned = {}
+        finished = []
+        for segment_id, _ in batch:
+            translated = entries[unique[segment_id][0]]["translated_text"]
+            if translated != "error":
+                batch_learned[keys[segment_id]] = translated
+            finished.extend(finish(segment_id))
+        done += len(finished)
+        learned.update(batch_learned)
+        settle(finished)
+        await progress(batch_learned)
 
-    logger.info(f"Received translation request: doc_id={doc_id}")
-    save_job(doc_id=doc_id, job_data={}, status="processing", job_type="translation")
+    await asyncio.gather(*(run_batch(batch, is_table) for batch, is_table in batches))
+    await translation_memory.put_many(learned)
+    stats.failed = len(segments) - sum(1 for segment_id, _ in segments if keys[segment_id] in learned)
+
+    logger.info(
+        f"Translated {stats.segments} segments: {stats.skipped_label} skipped by label, "
+        f"{stats.skipped_language} already in {target_lang}, {stats.untranslatable} untranslatable, {stats.unique} unique, "
+        f"{stats.resumed} from checkpoint, {stats.memory_hits} from translation memory (hit ratio {stats.hit_ratio:.1%}), "
+        f"{stats.llm_requests} LLM requests ({stats.table_requests} for tables), "
+        f"{stats.fallbacks} retried individually, {stats.failed} failed"
+    )
+    return entries, stats
+
+def original_key(doc_id):
+    return f"{doc_id}/original.json"
+
+def translated_key(doc_id):
+    return f"{doc_id}/translated.json"
+
+def collect_segments(data):
+    """Texts followed by table cells, with the (table_idx, cell_idx) of each cell"""
+    table_cell_refs = []
+    table_cells = []
+    for table_idx, table in enumerate(data.tables):
+        table_data = table.get("data", {})
+        for cell_idx, entry in enumerate(table_data.get("table_cells", [])):
+            table_cells.append(entry)
+            table_cell_refs.append((table_idx, cell_idx))
+    return list(data.texts) + table_cells, table_cell_refs
+
+def completed_event(doc_id, result_key):
+    return {"doc_id": doc_id, "result_key": result_key, "result_url": generate_presigned_url(result_key)}
+
+def segment_refs(data, table_cell_refs):
+    """Docling reference of each entry from `collect_segments`"""
+    refs = [entry.get("self_ref") or f"#/texts/{i}" for i, entry in enumerate(data.texts)]
+    refs.extend(f"#/tables/{table_idx}/data/table_cells/{cell_idx}" for table_idx, cell_idx in table_cell_refs)
+    return refs
+
+async def fail_job(doc_id, checkpoint, error):
+    job_events.publish(doc_id, "failed", {"doc_id": doc_id, "error": error})
+    await checkpoint.finish("failed", {"done": checkpoint.done, "total": checkpoint.total, "error": error})
+
+def job_status(doc_id, job):
+    """Status and error of a job record; a processing job whose heartbeat stopped has failed"""
+    job_data = job.get("data") or {}
+    heartbeat_at = job_data.get("heartbeat_at")
+    if (
+        job["status"] == "processing"
+        and doc_id not in running_jobs
+        and heartbeat_at is not None
+        and time.time() - heartbeat_at > TRANSLATION_JOB_STALE_SECONDS
+    ):
+        return "failed", STALE_JOB_ERROR
+    return job["status"], job_data.get("error")
+
+def load_original(doc_id):
+    """The extraction result stored for a document, or None if there is none.
+
+    The JSON is parsed as it streams from storage, so the raw document is
+    never held in memory next to the parsed one. It was validated when the
+    extraction service wrote it, so it is taken as is.
+    """
+    body = open_object(original_key(doc_id))
+    if body is None:
+        return None
+    original = {}
+    with closing(body):
+        for key, value in ijson.kvitems(body, ""):
+            original[key] = decimals_to_floats(value)
+    return DoclingTranslationResponse.model_construct(**original.get("result", original))
+
+def decimals_to_floats(value):
+    """Replace, in place, the Decimals ijson parses fractional numbers into.
+
+    ijson's C backend cannot produce floats itself, as it then rejects the
+    64-bit `binary_hash` integers docling writes.
+    """
+    if isinstance(value, Decimal):
+        return float(value)
+    if isinstance(value, (dict, list)):
+        for key, item in value.items() if isinstance(value, dict) else enumerate(value):
+            if isinstance(item, (Decimal, dict, list)):
+                value[key] = decimals_to_floats(item)
+    return value
 
+async def run_translation_job(doc_id, data, source_lang, target_lang):
+    """Translate a document in the background, checkpointing translated segments as it goes.
+
+    Without `data`, the document is read from the extraction result in storage.
+    """
+    checkpoint = TranslationCheckpoint(doc_id)
+    current_tenant.set(doc_id)
+    keep_alive = asyncio.create_task(checkpoint.keep_alive())
     try:
-        # Translate texts concurrently
-        text_tasks = [
-            safe_translate(entry, source_lang, target_lang)
-            for entry in data.texts
-        ]
-        data.texts = await asyncio.gather(*text_tasks)
-
-        # Track all tasks and positions to reassign later
-        all_table_tasks = []
-        table_cell_refs = []  # (table_idx, cell_idx)
-
-        for table_idx, table in enumerate(data.tables):
-            table_data = table.get("data", {})
-            table_cells = table_data.get("table_cells", [])
-            for cell_idx, entry in enumerate(table_cells):
-                all_table_tasks.append(safe_translate(entry, source_lang, target_lang))
-                table_cell_refs.append((table_idx, cell_idx))
-
-        translated_cells = await asyncio.gather(*all_table_tasks)
+        if data is None:
+            data = await asyncio.to_thread(load_original, doc_id)
+            if data is None:
+                raise FileNotFoundError(f"{original_key(doc_id)} not found")
+        known = await checkpoint.load()
+
+        # Texts and table cells are packed together into as few LLM requests as possible
+        entries, table_cell_refs = collect_segments(data)
+        table_cells = None
+        if TRANSLATION_TABLE_MODE == "grid":
+            first_cell = len(entries) - len(table_cell_refs)
+            table_cells = {
+                first_cell + i: (table_idx, cell_id(entries[first_cell + i], cell_idx))
+                for i, (table_idx, cell_idx) in enumerate(table_cell_refs)
+            }
+        refs = segment_refs(data, table_cell_refs)
+
+        def publish_segments(indices):
+            for i in indices:
+                job_events.publish(doc_id, "segment", {"ref": refs[i], "translated_text": entries[i]["translated_text"]})
+
+        translated, stats = await translate_entries(
+            entries,
+            source_lang,
+            target_lang,
+            known=known,
+            on_progress=checkpoint.record,
+            table_cells=table_cells,
+            on_segments=publish_segments
+        )
+        data.texts = translated[:len(data.texts)]
 
         # Reassign translated cells back to their correct table
-        for (table_idx, cell_idx), translated_entry in zip(table_cell_refs, translated_cells):
+        for (table_idx, cell_idx), translated_entry in zip(table_cell_refs, translated[len(data.texts):]):
             data.tables[table_idx]["data"]["table_cells"][cell_idx] = translated_entry
 
-        json_bytes = io.BytesIO(json.dumps(data.model_dump()).encode('utf-8'))
-        json_key = f"{doc_id}/translated.json"
-        if not upload_fileobj(json_bytes, json_key, "application/json"):
+        json_bytes = io.BytesIO(data.model_dump_json().encode('utf-8'))
+        json_key = translated_key(doc_id)
+        if not await asyncio.to_thread(upload_fileobj, json_bytes, json_key, "application/json"):
             raise IOError(f"Failed to upload translated JSON to S3 for doc_id={doc_id}")
 
-        save_job(doc_id=doc_id, job_data=data, status="completed", job_type="translation")
+        # Keep the checkpoint of a job with failed segments, so posting it again only retries those
+        if stats.failed:
+            await checkpoint.save()
+        else:
+            await checkpoint.discard()
+        await checkpoint.finish(
+            "completed",
+            {"done": stats.segments, "total": stats.segments, "stats": stats.model_dump(), "result_key": json_key}
+        )
+        job_events.publish(doc_id, "completed", completed_event(doc_id, json_key))
         logger.info(f"Translation completed: doc_id={doc_id}")
 
-        return TranslateResponse(
-            doc_id=doc_id,
-            source_lang=source_lang,
-            target_lang=target_lang,
-            docling=data
-        )
     except httpx.HTTPStatusError as e:
         logger.error(f"LLM API error during translation for doc_id={doc_id}: {e.response.status_code} - {e.response.text}")
-        save_job(doc_id=doc_id, 
-                 job_data={}, 
-                 status="failed", 
-                 job_type="translation"
-                 )
-        
-        return JSONResponse(content={"error": f"LLM API error: {e.response.text}"}, status_code=e.response.status_code)
-    
-    except (KeyError, IndexError, json.JSONDecodeError) as e:
-        logger.error(f"Failed to parse LLM response for doc_id={doc_id}: {e}")
-        save_job(doc_id=doc_id, 
-                 job_data={}, 
-                 status="failed", 
-                 job_type="translation"
-                 )
-        
-        return JSONResponse(content={"error": "Failed to parse LLM response."}, status_code=500)
-    
+        await checkpoint.save()
+        await fail_job(doc_id, checkpoint, f"LLM API error: {e.response.text}")
+
+    except FileNotFoundError as e:
+        logger.error(f"No extraction result to translate for doc_id={doc_id}: {e}")
+        await fail_job(doc_id, checkpoint, "Extraction result not found; extract the document first.")
+
     except Exception as e:
         logger.error(f"Translation failed: doc_id={doc_id} - {e}")
         logger.error(traceback.format_exc())
-        save_job(doc_id=doc_id, 
-                 job_data={}, 
-                 status="failed", 
-                 job_type="translation"
-                 )
-        
-        return JSONResponse(content={"error": "Translation failed."}, status_code=500)
-
-@router.get("/status/{doc_id}")
+        if checkpoint.translations:
+            await checkpoint.save()
+        await fail_job(doc_id, checkpoint, "Translation failed.")
+
+    finally:
+        keep_alive.cancel()
+        running_jobs.discard(doc_id)
+        job_events.close(doc_id)
+
+@router.post("/", response_model=TranslationJobResponse, status_code=202)
+async def doc_translate(background_tasks: BackgroundTasks, payload: TranslateResponse = Body(...)):
+    """Start translating a document and return immediately.
+
+    With only `doc_id` and the languages, the document is read from its
+    extraction result (`{doc_id}/original.json`); a full `docling` body is
+    still accepted. Progress is reported by `GET /translation/status/{doc_id}`.
+    Posting a document again after a failure resumes from its last checkpoint.
+    """
+    doc_id = payload.doc_id
+    data = payload.docling
+    source_lang = payload.source_lang
+    target_lang = payload.target_lang or "English"
+
+    # By reference, the total is known once the background job has loaded the document
+    total = 0 if data is None else sum(1 for entry in collect_segments(data)[0] if entry_text(entry))
+    if doc_id in running_jobs:
+        return TranslationJobResponse(doc_id=doc_id, status="processing", total=total)
+
+    logger.info(f"Received translation request: doc_id={doc_id}")
+    running_jobs.add(doc_id)
+    job_events.open(doc_id)
+    await asyncio.to_thread(
+        save_job,
+        doc_id=doc_id,
+        job_data={"done": 0, "total": total, "heartbeat_at": time.time()},
+        status="processing",
+        job_type="translation"
+    )
+    background_tasks.add_task(run_translation_job, doc_id, data, source_lang, target_lang)
+    return TranslationJobResponse(doc_id=doc_id, status="processing", total=total)
+
+@router.get("/status/{doc_id}", response_model=TranslationJobResponse)
 async def get_status(doc_id: str):
-    job = load_job(doc_id=doc_id, job_type="translation")
+    job = await asyncio.to_thread(load_job, doc_id=doc_id, job_type="translation")
     if job is None:
         return JSONResponse(content={"status": "failed"}, status_code=404)
+    job_data = job.get("data") or {}
+    status, error = job_status(doc_id, job)
+    response = TranslationJobResponse(
+        doc_id=doc_id,
+        status=status,
+        done=job_data.get("done", 0),
+        total=job_data.get("total", 0),
+        stats=job_data.get("stats"),
+        error=error,
+        result_key=job_data.get("result_key"),
+        result_url=generate_presigned_url(job_data["result_key"]) if job_data.get("result_key") else None
+    )
     return JSONResponse(
-        content={"status": job["status"]},
-        status_code=200 if job["status"] == "completed" else 202
-    )
\ No newline at end of file
+        content=response.model_dump(),
+        status_code=200 if status == "completed" else 202
+    )
+
+def sse_event(event, data):
+    return f"event: {event}\ndata: {json.dumps(data, ensure_ascii=False)}\n\n"
+
+async def poll_job_events(doc_id):
+    """Events for a job not running in this process: progress until it completes or fails"""
+    while True:
+        job = await asyncio.to_thread(load_job, doc_id=doc_id, job_type="translation")
+        if job is None:
+            yield sse_event("failed", {"doc_id": doc_id, "error": "Translation job not found."})
+            return
+        job_data = job.get("data") or {}
+        status, error = job_status(doc_id, job)
+        if status == "failed":
+            yield sse_event("failed", {"doc_id": doc_id, "error": error or "Translation failed."})
+            return
+        if status == "completed":
+            yield sse_event("completed", completed_event(doc_id, job_data.get("result_key", translated_key(doc_id))))
+            return
+        yield sse_event("progress", {"doc_id": doc_id, "done": job_data.get("done", 0), "total": job_data.get("total", 0)})
+        await asyncio.sleep(TRANSLATION_STREAM_POLL_SECONDS)
+
+@router.get("/stream/{doc_id}")
+async def stream_translation(doc_id: str):
+    """Server-Sent Events for a translation job.
+
+    While the job runs in this process, each translated segment is sent as a
+    `segment` event with its docling `ref` and `translated_text`, followed by
+    `completed` once translated.json is stored, or `failed`. A stream opened
+    after early segments left the replay buffer starts with a `gap` event
+    giving the number missed; those are in the translated.json linked by
+    `completed`. A client reading slower than segments are translated gets
+    a `gap` event in place of the oldest events it fell behind on. For a job
+    that already finished, or runs elsewhere, `progress` events are sent
+    until it completes.
+    """
+    subscription = job_events.subscribe(doc_id)
+    if subscription is None and await asyncio.to_thread(load_job, doc_id=doc_id, job_type="translation") is None:
+        return JSONResponse(content={"status": "failed"}, status_code=404)
+
+    async def events():
+        if subscription is None:
+            async for event in poll_job_events(doc_id):
+                yield event
+            return
+        try:
+            while True:
+                try:
+                    item = await asyncio.wait_for(subscription.get(), TRANSLATION_STREAM_KEEPALIVE_SECONDS)
+                except asyncio.TimeoutError:
+                    # Comment lines keep proxies from closing an idle stream
+                    yield ": keep-alive\n\n"
+                    continue
+                if item is None:
+                    return
+                yield sse_event(*item)
+        finally:
+            job_events.unsubscribe(doc_id, subscription)
+
+    return StreamingResponse(
+        events(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
@@ -0,0 +1,6 @@
+import os
+import sys
+
+SERVICE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+# Imports resolve the way they do in the container (PYTHONPATH=/app/docling_translation_service:/app)
+sys.path[:0] = [SERVICE_DIR, os.path.dirname(SERVICE_DIR)]
@@ -0,0 +1,101 @@
+import asyncio
+import json
+
+import pytest
+
+from routers import translation
+from utils.segment_batching import build_batch_prompt, estimate_tokens, pack_segments, parse_batch_reply
+from utils.translation_memory import TranslationMemory
+
+SEGMENTS = [(0, "first"), (1, "second"), (2, "third")]
+
+
+def test_segments_are_packed_within_the_token_budget():
+    segments = [(i, "x" * 40) for i in range(10)]
+    per_segment = estimate_tokens("x" * 40) + 8
+
+    batches = pack_segments(segments, token_budget=3 * per_segment, max_items=100)
+    assert [len(batch) for batch in batches] == [3, 3, 3, 1]
+    assert [segment for batch in batches for segment in batch] == segments
+
+    assert [len(batch) for batch in pack_segments(segments, token_budget=10_000, max_items=4)] == [4, 4, 2]
+
+
+def test_a_segment_over_the_budget_gets_a_batch_of_its_own():
+    segments = [(0, "short"), (1, "x" * 10_000), (2, "short")]
+
+    assert pack_segments(segments, token_budget=100, max_items=10) == [[segments[0]], [segments[1]], [segments[2]]]
+
+
+def test_batch_replies_are_matched_by_id():
+    reply = json.dumps([{"id": 2, "text": "drei"}, {"id": 0, "text": "eins"}, {"id": 1, "text": "zwei"}])
+
+    assert json.loads(build_batch_prompt(SEGMENTS)) == [{"id": i, "text": text} for i, text in SEGMENTS]
+    assert parse_batch_reply(reply, SEGMENTS) == {0: "eins", 1: "zwei", 2: "drei"}
+    # Code fences, wrapper objects and ids sent back as strings are accepted
+    fenced = '```json\n{"translations": [{"id": "1", "text": "zwei"}]}\n```'
+    assert parse_batch_reply(fenced, SEGMENTS) == {1: "zwei"}
+
+
+@pytest.mark.parametrize("reply", ["", "not json", '{"id": 0}', '"eins"', "[1, 2, 3]", '[{"id": 0, "text": "eins"'])
+def test_malformed_replies_translate_nothing(reply):
+    assert parse_batch_reply(reply, SEGMENTS) == {}
+
+
+def test_short_replies_and_invalid_items_are_left_out():
+    reply = json.dumps([
+        {"id": 0, "text": "eins"},
+        {"id": 1, "text": "  "},
+        {"id": 7, "text": "sieben"},
+        {"id": 2, "text": None},
+        "drei",
+    ])
+
+    assert parse_batch_reply(reply, SEGMENTS) == {0: "eins"}
+
+
+@pytest.fixture
+def llm(monkeypatch):
+    """Fake LLM: upper-cases single prompts, and answers batches with `batch_reply(items)`"""
+
+    calls = {"single": 0, "batch": 0}
+    fake = {"batch_reply": lambda items: [{"id": item["id"], "text": item["text"].upper()} for item in items]}
+
+    async def call_llm(system_prompt, prompt):
+        try:
+            items = json.loads(prompt)
+        except json.JSONDecodeError:
+            calls["single"] += 1
+            return prompt.upper()
+        calls["batch"] += 1
+        return json.dumps(fake["batch_reply"](items))
+
+    monkeypatch.setattr(translation, "call_llm", call_llm)
+    monkeypatch.setattr(translation, "translation_memory", TranslationMemory(None, 100, 60))
+    fake["calls"] = calls
+    return fake
+
+
+def translate(entries):
+    return asyncio.run(translation.translate_entries(entries, "English", "French"))
+
+
+def test_items_missing_from_a_batch_reply_are_translated_one_by_one(llm):
+    # The model drops the last item and answers the rest out of order
+    llm["batch_reply"] = lambda items: [{"id": item["id"], "text": item["text"].upper()} for item in items[-2::-1]]
+    entries = [{"text": f"Segment number {i} of the page"} for i in range(4)]
+
+    translated, stats = translate(entries)
+    assert [entry["translated_text"] for entry in translated] == [f"SEGMENT NUMBER {i} OF THE PAGE" for i in range(4)]
+    assert llm["calls"] == {"batch": 1, "single": 1}
+    assert stats.fallbacks == 1 and stats.failed == 0
+
+
+def test_a_malformed_batch_reply_falls_back_for_every_item(llm):
+    llm["batch_reply"] = lambda items: "not a list"
+    entries = [{"text": "The first paragraph"}, {"text": "The second paragraph"}]
+
+    translated, stats = translate(entries)
+    assert [entry["translated_text"] for entry in translated] == ["THE FIRST PARAGRAPH", "THE SECOND PARAGRAPH"]
+    assert llm["calls"] == {"batch": 1, "single": 2}
+    assert stats.fallbacks == 2
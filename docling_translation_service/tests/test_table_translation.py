@@ -0,0 +1,92 @@
+import asyncio
+import json
+
+import pytest
+
+from routers import translation
+from utils.segment_batching import build_table_prompt, cell_id, parse_batch_reply
+from utils.translation_memory import TranslationMemory
+
+
+def test_cell_ids_come_from_the_grid_position():
+    assert cell_id({"start_row_offset_idx": 2, "start_col_offset_idx": 0}, 5) == "r2c0"
+    assert cell_id({"start_row_offset_idx": None, "start_col_offset_idx": 1}, 5) == "cell5"
+    assert cell_id({}, 0) == "cell0"
+
+
+def test_table_replies_are_matched_by_cell_id():
+    cells = [("r0c0", "Name"), ("r0c1", "Value"), ("r1c0", "Speed")]
+    reply = json.dumps({"cells": [{"id": "r1c0", "text": "Vitesse"}, {"id": "r0c0", "text": "Nom"}, {"id": "r5c5", "text": "?"}]})
+
+    assert json.loads(build_table_prompt(cells)) == {"cells": [{"id": i, "text": text} for i, text in cells]}
+    assert parse_batch_reply(reply, cells) == {"r1c0": "Vitesse", "r0c0": "Nom"}
+    # A bare list of cells is accepted too
+    assert parse_batch_reply(json.dumps([{"id": "r0c1", "text": "Valeur"}]), cells) == {"r0c1": "Valeur"}
+
+
+@pytest.fixture
+def llm(monkeypatch):
+    """Fake LLM: upper-cases single prompts and answers table prompts with `table_reply(cells)`"""
+
+    fake = {"prompts": [], "single": 0}
+    fake["table_reply"] = lambda cells: {"cells": [{"id": c["id"], "text": c["text"].upper()} for c in cells]}
+
+    async def call_llm(system_prompt, prompt):
+        try:
+            request = json.loads(prompt)
+        except json.JSONDecodeError:
+            fake["single"] += 1
+            return prompt.upper()
+        fake["prompts"].append(request)
+        if isinstance(request, dict):
+            return json.dumps(fake["table_reply"](request["cells"]))
+        return json.dumps([{"id": item["id"], "text": item["text"].upper()} for item in request])
+
+    monkeypatch.setattr(translation, "call_llm", call_llm)
+    monkeypatch.setattr(translation, "translation_memory", TranslationMemory(None, 100, 60))
+    return fake
+
+
+def translate(entries, table_cells):
+    return asyncio.run(translation.translate_entries(entries, "English", "French", table_cells=table_cells))
+
+
+def test_a_table_is_sent_as_one_grid_in_row_major_order(llm):
+    entries = [{"text": "Speed"}, {"text": "Name"}, {"text": "Value"}, {"text": "Fast"}]
+    table_cells = {0: (0, "r1c0"), 1: (0, "r0c0"), 2: (0, "r0c1"), 3: (0, "r1c1")}
+
+    translated, stats = translate(entries, table_cells)
+    assert [entry["translated_text"] for entry in translated] == ["SPEED", "NAME", "VALUE", "FAST"]
+    # Cells keep their position in the table, not the order of the entries
+    assert llm["prompts"] == [{"cells": [
+        {"id": "r1c0", "text": "Speed"}, {"id": "r0c0", "text": "Name"},
+        {"id": "r0c1", "text": "Value"}, {"id": "r1c1", "text": "Fast"},
+    ]}]
+    assert stats.table_requests == 1 and stats.fallbacks == 0
+
+
+def test_cells_missing_from_a_reordered_table_reply_fall_back(llm):
+    # The model answers in reverse, renames one cell and drops another
+    def table_reply(cells):
+        answered = [{"id": c["id"], "text": c["text"].upper()} for c in reversed(cells[:-1])]
+        answered[0]["id"] = "r9c9"
+        return {"cells": answered}
+
+    llm["table_reply"] = table_reply
+    entries = [{"text": "Name"}, {"text": "Value"}, {"text": "Speed"}, {"text": "Fast"}]
+    table_cells = {i: (0, f"r{i // 2}c{i % 2}") for i in range(4)}
+
+    translated, stats = translate(entries, table_cells)
+    assert [entry["translated_text"] for entry in translated] == ["NAME", "VALUE", "SPEED", "FAST"]
+    assert llm["single"] == 2 and stats.fallbacks == 2
+
+
+def test_repeated_cell_ids_and_texts_stay_distinct(llm):
+    # Two cells claim the same grid position; a text repeated in a table is translated once
+    entries = [{"text": "Total"}, {"text": "Amount"}, {"text": "Total"}]
+    table_cells = {0: (0, "r0c0"), 1: (0, "r0c0"), 2: (1, "r0c0")}
+
+    translated, _ = translate(entries, table_cells)
+    assert [entry["translated_text"] for entry in translated] == ["TOTAL", "AMOUNT", "TOTAL"]
+    ids = [cell["id"] for cell in llm["prompts"][0]["cells"]]
+    assert len(llm["prompts"]) == 1 and ids[0] == "r0c0" and len(set(ids)) == 2
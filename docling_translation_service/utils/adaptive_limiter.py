@@ -0,0 +1,110 @@
+import asyncio
+import logging
+import os
+import random
+import time
+from contextlib import asynccontextmanager
+from email.utils import parsedate_to_datetime
+from typing import Optional
+
+logger = logging.getLogger(__name__)
+
+LLM_CONCURRENCY = int(os.getenv("LLM_CONCURRENCY", "5"))
+LLM_CONCURRENCY_MIN = int(os.getenv("LLM_CONCURRENCY_MIN", "1"))
+LLM_CONCURRENCY_MAX = int(os.getenv("LLM_CONCURRENCY_MAX", "32"))
+# Latency per prompt character above this multiple of the best recent one counts as congestion
+LLM_LATENCY_TOLERANCE = float(os.getenv("LLM_LATENCY_TOLERANCE", "2.5"))
+
+LLM_BACKOFF_BASE = float(os.getenv("LLM_BACKOFF_BASE", "0.5"))
+LLM_BACKOFF_MAX = float(os.getenv("LLM_BACKOFF_MAX", "30"))
+
+# The baseline creeps up by this factor per sample, so it follows a backend that got slower for good
+_BASELINE_DRIFT = 1.01
+
+
+class AdaptiveLimiter:
+    """AIMD limit on concurrent LLM requests.
+
+    Every successful request raises the limit by 1/limit, so it grows by about
+    one per round of requests while the backend keeps up. Overload (429/503,
+    timeouts) or latency far above the best recently seen halves it, at most
+    once per window of in-flight requests so a burst of rejections counts once.
+    Waiters are served first come, first served.
+    """
+
+    def __init__(self, initial: int, minimum: int, maximum: int, latency_tolerance: float):
+        self.minimum = max(1, minimum)
+        self.maximum = max(self.minimum, maximum)
+        self.limit = float(min(max(initial, self.minimum), self.maximum))
+        self.latency_tolerance = latency_tolerance
+        self.in_flight = 0
+        self._condition = asyncio.Condition()
+        self._baseline: Optional[float] = None
+        # Requests started before the last decrease do not trigger another one
+        self._started = 0
+        self._decreased_at = 0
+
+    async def acquire(self) -> int:
+        async with self._condition:
+            await self._condition.wait_for(lambda: self.in_flight < int(self.limit))
+            self.in_flight += 1
+            self._started += 1
+            return self._started
+
+    async def release(self):
+        async with self._condition:
+            self.in_flight -= 1
+            self._condition.notify_all()
+
+    @asynccontextmanager
+    async def slot(self):
+        ticket = await self.acquire()
+        try:
+            yield ticket
+        finally:
+            await self.release()
+
+    def on_success(self, ticket: int, latency: float, cost: int):
+        per_unit = latency / max(cost, 1)
+        if self._baseline is None or per_unit < self._baseline:
+            self._baseline = per_unit
+        else:
+            self._baseline *= _BASELINE_DRIFT
+
+        if per_unit > self._baseline * self.latency_tolerance:
+            self.on_overload(ticket, "latency")
+        else:
+            self.limit = min(self.maximum, self.limit + 1 / self.limit)
+
+    def on_overload(self, ticket: int, reason: str):
+        if ticket <= self._decreased_at:
+            return
+        self._decreased_at = self._started
+        previous = int(self.limit)
+        self.limit = max(self.minimum, self.limit / 2)
+        logger.info(f"LLM concurrency {previous} -> {int(self.limit)} after {reason}")
+
+
+def retry_after_seconds(value: Optional[str]) -> Optional[float]:
+    """Seconds to wait from a Retry-After header, given as seconds or an HTTP date"""
+    if not value:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        return max(0.0, parsedate_to_datetime(value).timestamp() - time.time())
+    except (TypeError, ValueError):
+        return None
+
+
+def backoff_delay(attempt: int, retry_after: Optional[float] = None) -> float:
+    """Jittered exponential backoff; a server's Retry-After is the minimum wait"""
+    delay = random.uniform(0, min(LLM_BACKOFF_MAX, LLM_BACKOFF_BASE * 2 ** attempt))
+    if retry_after is not None:
+        delay += min(retry_after, LLM_BACKOFF_MAX)
+    return delay
+
+
+llm_limiter = AdaptiveLimiter(LLM_CONCURRENCY, LLM_CONCURRENCY_MIN, LLM_CONCURRENCY_MAX, LLM_LATENCY_TOLERANCE)
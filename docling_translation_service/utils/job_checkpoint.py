@@ -0,0 +1,91 @@
+import asyncio
+import io
+import json
+import logging
+import os
+import time
+from typing import Dict
+
+from shared_utils.s3_utils import delete_file, load_json, save_job, upload_fileobj
+
+logger = logging.getLogger(__name__)
+
+# Minimum time between checkpoint writes while a job runs
+TRANSLATION_CHECKPOINT_SECONDS = float(os.getenv("TRANSLATION_CHECKPOINT_SECONDS", "5"))
+# A running job refreshes `heartbeat_at` in its job record this often, even while it makes no progress
+TRANSLATION_HEARTBEAT_SECONDS = float(os.getenv("TRANSLATION_HEARTBEAT_SECONDS", "30"))
+
+
+def checkpoint_key(doc_id: str) -> str:
+    return f"{doc_id}/translation_checkpoint.json"
+
+
+class TranslationCheckpoint:
+    """Translated segments and progress of one translation job, persisted to S3.
+
+    Translations are keyed like the translation memory, so a retried job picks
+    up every segment it already translated regardless of where it sits in the
+    document. Each write also updates the job's done/total progress and its
+    heartbeat, which `keep_alive` refreshes in between. Once `finish` has
+    stored the final status, nothing else is written to the job record.
+    """
+
+    def __init__(
+        self,
+        doc_id: str,
+        interval: float = TRANSLATION_CHECKPOINT_SECONDS,
+        heartbeat_interval: float = TRANSLATION_HEARTBEAT_SECONDS,
+    ):
+        self.doc_id = doc_id
+        self.interval = interval
+        self.heartbeat_interval = heartbeat_interval
+        self.finished = False
+        self.translations: Dict[str, str] = {}
+        self.done = 0
+        self.total = 0
+        self._saved_at = time.monotonic()
+        self._lock = asyncio.Lock()
+
+    async def load(self) -> Dict[str, str]:
+        data = await asyncio.to_thread(load_json, checkpoint_key(self.doc_id))
+        if data:
+            self.translations = data.get("translations", {})
+            logger.info(f"Resuming translation of doc_id={self.doc_id} with {len(self.translations)} checkpointed segments")
+        return dict(self.translations)
+
+    async def record(self, translations: Dict[str, str], done: int, total: int):
+        self.translations.update(translations)
+        # Report the total as soon as it is known, then at most once per interval
+        first = self.total == 0 and total > 0
+        self.done, self.total = done, total
+        if (first or time.monotonic() - self._saved_at >= self.interval) and not self._lock.locked():
+            await self.save()
+
+    async def save(self):
+        async with self._lock:
+            self._saved_at = time.monotonic()
+            payload = json.dumps({"translations": self.translations}).encode("utf-8")
+            await asyncio.to_thread(upload_fileobj, io.BytesIO(payload), checkpoint_key(self.doc_id), "application/json")
+            if not self.finished:
+                await asyncio.to_thread(save_job, self.doc_id, self.progress(), "processing", "translation")
+
+    def progress(self) -> Dict:
+        return {"done": self.done, "total": self.total, "heartbeat_at": time.time()}
+
+    async def keep_alive(self):
+        """Refresh the job's heartbeat until it finishes, so a job whose process died can be told apart"""
+        while True:
+            await asyncio.sleep(self.heartbeat_interval)
+            async with self._lock:
+                if self.finished:
+                    return
+                await asyncio.to_thread(save_job, self.doc_id, self.progress(), "processing", "translation")
+
+    async def finish(self, status: str, job_data: Dict):
+        """Store the job's final status"""
+        async with self._lock:
+            self.finished = True
+            await asyncio.to_thread(save_job, self.doc_id, job_data, status, "translation")
+
+    async def discard(self):
+        await asyncio.to_thread(delete_file, checkpoint_key(self.doc_id))
@@ -0,0 +1,104 @@
+import asyncio
+import os
+from collections import deque
+from typing import Any, Deque, Dict, List, Optional, Tuple
+
+# Recent events kept per running job, so a stream opened just after the job started misses nothing;
+# a stream opened later gets a `gap` event first, telling it how many earlier events it missed
+TRANSLATION_STREAM_REPLAY = int(os.getenv("TRANSLATION_STREAM_REPLAY", "2000"))
+# Events buffered per subscriber; a slower reader loses the oldest ones and is sent a `gap` event instead
+TRANSLATION_STREAM_QUEUE = int(os.getenv("TRANSLATION_STREAM_QUEUE", "1000"))
+
+Event = Tuple[str, Any]
+
+
+class Subscription:
+    """Bounded queue of the events sent to one stream.
+
+    When the reader falls `maxsize` events behind, the oldest queued events
+    are dropped, and the next `get()` returns a `gap` event with the number
+    dropped before the remaining ones. A None marks the end of the stream.
+    """
+
+    def __init__(self, doc_id: str, maxsize: int):
+        self.doc_id = doc_id
+        self.missed = 0
+        self._queue: asyncio.Queue = asyncio.Queue(maxsize=max(maxsize, 1))
+
+    def put(self, item: Optional[Event]):
+        if self._queue.full():
+            self._queue.get_nowait()
+            self.missed += 1
+        self._queue.put_nowait(item)
+
+    async def get(self) -> Optional[Event]:
+        if self.missed:
+            missed, self.missed = self.missed, 0
+            return "gap", {"doc_id": self.doc_id, "missed": missed}
+        return await self._queue.get()
+
+
+class _Channel:
+    __slots__ = ("replay", "subscribers", "dropped")
+
+    def __init__(self, replay: int):
+        self.replay: Deque[Event] = deque(maxlen=replay)
+        self.subscribers: List[Subscription] = []
+        # Events pushed out of the replay buffer
+        self.dropped = 0
+
+
+class JobEvents:
+    """Fan-out of the events of jobs running in this process to stream subscribers.
+
+    A channel exists from job submission until the job's final event. Each
+    subscriber gets the channel's recent events first, then live ones, and a
+    None once the channel closes. Events the subscriber did not get, because
+    they had left the replay buffer or it fell too far behind, are reported
+    by a `gap` event with the number missed.
+    """
+
+    def __init__(self, replay: int = TRANSLATION_STREAM_REPLAY, queue_size: int = TRANSLATION_STREAM_QUEUE):
+        self.replay = replay
+        self.queue_size = queue_size
+        self._channels: Dict[str, _Channel] = {}
+
+    def open(self, doc_id: str):
+        if doc_id not in self._channels:
+            self._channels[doc_id] = _Channel(self.replay)
+
+    def publish(self, doc_id: str, event: str, data: Any):
+        channel = self._channels.get(doc_id)
+        if channel is None:
+            return
+        if len(channel.replay) == channel.replay.maxlen:
+            channel.dropped += 1
+        channel.replay.append((event, data))
+        for subscription in channel.subscribers:
+            subscription.put((event, data))
+
+    def close(self, doc_id: str):
+        channel = self._channels.pop(doc_id, None)
+        if channel is not None:
+            for subscription in channel.subscribers:
+                subscription.put(None)
+
+    def subscribe(self, doc_id: str) -> Optional[Subscription]:
+        """The job's events, or None if the job is not running in this process"""
+        channel = self._channels.get(doc_id)
+        if channel is None:
+            return None
+        subscription = Subscription(doc_id, self.queue_size)
+        subscription.missed = channel.dropped
+        for item in channel.replay:
+            subscription.put(item)
+        channel.subscribers.append(subscription)
+        return subscription
+
+    def unsubscribe(self, doc_id: str, subscription: Subscription):
+        channel = self._channels.get(doc_id)
+        if channel is not None and subscription in channel.subscribers:
+            channel.subscribers.remove(subscription)
+
+
+job_events = JobEvents()
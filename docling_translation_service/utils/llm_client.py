@@ -0,0 +1,66 @@
+import importlib.util
+import logging
+import os
+from typing import Optional
+
+import httpx
+
+logger = logging.getLogger(__name__)
+
+LLM_URL = os.getenv("LLM_URL")
+TOKEN = os.getenv("LLM_API_TOKEN")
+LLM_MODEL = os.getenv("LLM_MODEL", "qwen2.5")
+
+LLM_MAX_CONNECTIONS = int(os.getenv("LLM_MAX_CONNECTIONS", "32"))
+LLM_MAX_KEEPALIVE_CONNECTIONS = int(os.getenv("LLM_MAX_KEEPALIVE_CONNECTIONS", "16"))
+LLM_KEEPALIVE_EXPIRY = float(os.getenv("LLM_KEEPALIVE_EXPIRY", "60"))
+LLM_TIMEOUT = float(os.getenv("LLM_TIMEOUT", "60"))
+LLM_CONNECT_TIMEOUT = float(os.getenv("LLM_CONNECT_TIMEOUT", "10"))
+# HTTP/2 is negotiated over TLS (ALPN); plain http:// backends keep using HTTP/1.1 keep-alive
+LLM_HTTP2 = os.getenv("LLM_HTTP2", "true").lower() in ("1", "true", "yes")
+
+_client: Optional[httpx.AsyncClient] = None
+
+
+def create_llm_client() -> httpx.AsyncClient:
+    """Build the pooled client used for every LLM call of the process"""
+
+    http2 = LLM_HTTP2 and importlib.util.find_spec("h2") is not None
+    if LLM_HTTP2 and not http2:
+        logger.warning("LLM_HTTP2 is enabled but the 'h2' package is missing; using HTTP/1.1")
+
+    return httpx.AsyncClient(
+        timeout=httpx.Timeout(LLM_TIMEOUT, connect=LLM_CONNECT_TIMEOUT),
+        limits=httpx.Limits(
+            max_connections=LLM_MAX_CONNECTIONS,
+            max_keepalive_connections=LLM_MAX_KEEPALIVE_CONNECTIONS,
+            keepalive_expiry=LLM_KEEPALIVE_EXPIRY,
+        ),
+        http2=http2,
+        headers={
+            "Content-Type": "application/json",
+            "Authorization": f"Bearer {TOKEN}"
+        },
+    )
+
+
+async def start_llm_client():
+    global _client
+    if _client is None:
+        _client = create_llm_client()
+
+
+async def close_llm_client():
+    global _client
+    if _client is not None:
+        await _client.aclose()
+        _client = None
+
+
+def get_llm_client() -> httpx.AsyncClient:
+    """The process-wide LLM client; created on first use if the app lifespan has not started it"""
+
+    global _client
+    if _client is None:
+        _client = create_llm_client()
+    return _client
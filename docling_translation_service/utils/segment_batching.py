@@ -0,0 +1,90 @@
+import json
+import re
+from typing import Any, Dict, Iterable, List, Tuple, Union
+
+# Rough token count without a tokenizer: ~4 characters per token, plus JSON overhead per item
+_CHARS_PER_TOKEN = 4
+_ITEM_OVERHEAD_TOKENS = 8
+_CODE_FENCE_REGEX = re.compile(r"^\s*```(?:json)?\s*|\s*```\s*$")
+
+SegmentId = Union[int, str]
+Segment = Tuple[SegmentId, str]
+
+
+def estimate_tokens(text: str) -> int:
+    return len(text) // _CHARS_PER_TOKEN + 1
+
+
+def pack_segments(segments: Iterable[Segment], token_budget: int, max_items: int) -> List[List[Segment]]:
+    """Greedily group segments into batches whose estimated prompt size stays within `token_budget`.
+
+    A segment that is too large to share a batch ends up alone in its own batch.
+    """
+    batches: List[List[Segment]] = []
+    current: List[Segment] = []
+    current_tokens = 0
+
+    for segment in segments:
+        tokens = estimate_tokens(segment[1]) + _ITEM_OVERHEAD_TOKENS
+        if current and (current_tokens + tokens > token_budget or len(current) >= max_items):
+            batches.append(current)
+            current, current_tokens = [], 0
+        current.append(segment)
+        current_tokens += tokens
+
+    if current:
+        batches.append(current)
+    return batches
+
+
+def build_batch_prompt(segments: List[Segment]) -> str:
+    return json.dumps(
+        [{"id": segment_id, "text": text} for segment_id, text in segments], ensure_ascii=False, separators=(",", ":")
+    )
+
+
+def cell_id(cell: Dict[str, Any], cell_idx: int) -> str:
+    """Stable id of a docling table cell from its grid position, e.g. "r2c0" """
+    row, col = cell.get("start_row_offset_idx"), cell.get("start_col_offset_idx")
+    if isinstance(row, int) and isinstance(col, int):
+        return f"r{row}c{col}"
+    return f"cell{cell_idx}"
+
+
+def build_table_prompt(segments: List[Segment]) -> str:
+    """One table's cells in row-major order as {"cells": [{"id": "r0c1", "text": ...}]}"""
+    return json.dumps(
+        {"cells": [{"id": segment_id, "text": text} for segment_id, text in segments]},
+        ensure_ascii=False,
+        separators=(",", ":"),
+    )
+
+
+def parse_batch_reply(reply: str, segments: List[Segment]) -> Dict[SegmentId, str]:
+    """Translations from a batched reply, keyed by segment id.
+
+    Only items whose id was asked for and whose text is a non-empty string are
+    returned; anything missing or malformed is left for the per-item fallback.
+    """
+    if not reply:
+        return {}
+    try:
+        items = json.loads(_CODE_FENCE_REGEX.sub("", reply))
+    except json.JSONDecodeError:
+        return {}
+    if isinstance(items, dict):
+        items = items.get("cells") or items.get("items") or items.get("translations")
+    if not isinstance(items, list):
+        return {}
+
+    expected = {segment_id for segment_id, _ in segments}
+    translations: Dict[SegmentId, str] = {}
+    for item in items:
+        if not isinstance(item, dict):
+            continue
+        segment_id, text = item.get("id"), item.get("text")
+        if segment_id not in expected and isinstance(segment_id, str) and segment_id.isdigit():
+            segment_id = int(segment_id)
+        if segment_id in expected and isinstance(text, str) and text.strip():
+            translations[segment_id] = text
+    return translations
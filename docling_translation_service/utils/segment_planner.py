@@ -0,0 +1,89 @@
+import logging
+import os
+from typing import Optional
+
+from utils.translation_memory import is_untranslatable
+
+logger = logging.getLogger(__name__)
+
+# Docling labels whose text is copied through untranslated
+TRANSLATION_SKIP_LABELS = {
+    label.strip()
+    for label in os.getenv("TRANSLATION_SKIP_LABELS", "page_header,page_footer,formula,code").split(",")
+    if label.strip()
+}
+TRANSLATION_LANGID = os.getenv("TRANSLATION_LANGID", "true").lower() in ("1", "true", "yes")
+# Shorter texts are always translated; language ID is unreliable on a few words
+TRANSLATION_LANGID_MIN_CHARS = int(os.getenv("TRANSLATION_LANGID_MIN_CHARS", "20"))
+TRANSLATION_LANGID_MIN_CONFIDENCE = float(os.getenv("TRANSLATION_LANGID_MIN_CONFIDENCE", "0.9"))
+
+# Target languages are usually given by name; language ID reports ISO 639-1 codes
+LANGUAGE_CODES = {
+    "arabic": "ar", "bengali": "bn", "chinese": "zh",
+    "czech": "cs", "danish": "da", "dutch": "nl", "english": "en", "finnish": "fi", "french": "fr",
+    "german": "de", "greek": "el", "hebrew": "he", "hindi": "hi", "indonesian": "id", "italian": "it",
+    "japanese": "ja", "korean": "ko", "malay": "ms", "norwegian": "no", "polish": "pl", "portuguese": "pt",
+    "russian": "ru", "spanish": "es", "swedish": "sv", "tamil": "ta", "thai": "th", "turkish": "tr",
+    "ukrainian": "uk", "vietnamese": "vi",
+}
+# Words naming a script or regional variant, which language ID cannot tell apart from the base language
+VARIANT_QUALIFIERS = {
+    "simplified", "traditional", "cantonese", "mandarin", "brazilian", "european", "latin", "cyrillic",
+}
+
+SKIP_LABEL = "label"
+SKIP_UNTRANSLATABLE = "untranslatable"
+SKIP_LANGUAGE = "language"
+
+
+def _load_identifier():
+    if not TRANSLATION_LANGID:
+        return None
+    try:
+        from py3langid.langid import MODEL_FILE, LanguageIdentifier
+    except ImportError:
+        logger.info("py3langid is not installed; text already in the target language will be translated too")
+        return None
+    return LanguageIdentifier.from_model_file(MODEL_FILE, norm_probs=True)
+
+
+_identifier = _load_identifier()
+
+
+def language_code(language: Optional[str]) -> Optional[str]:
+    """ISO 639-1 code for a language name or code such as "English" or "en".
+
+    Targets naming a script or region, such as "zh-TW" or "Traditional
+    Chinese", give None: language ID reports only "zh" for both scripts, so
+    it cannot tell which segments are already in the target.
+    """
+    if not language:
+        return None
+    language = language.strip().lower()
+    if language in LANGUAGE_CODES:
+        return LANGUAGE_CODES[language]
+    if VARIANT_QUALIFIERS.intersection(language.replace("(", " ").replace(")", " ").split()):
+        return None
+    parts = language.replace("_", "-").split("-")
+    if len(parts) > 1:
+        return None
+    return parts[0] if len(parts[0]) == 2 and parts[0].isalpha() else None
+
+
+def in_language(text: str, code: Optional[str]) -> bool:
+    """True when the offline language ID is confident that `text` is in language `code`"""
+    if _identifier is None or code is None or len(text) < TRANSLATION_LANGID_MIN_CHARS:
+        return False
+    language, confidence = _identifier.classify(text)
+    return language == code and confidence >= TRANSLATION_LANGID_MIN_CONFIDENCE
+
+
+def skip_reason(entry: dict, text: str, target_code: Optional[str]) -> Optional[str]:
+    """Why a segment can be copied through instead of translated, or None if it needs translating"""
+    if entry.get("label") in TRANSLATION_SKIP_LABELS:
+        return SKIP_LABEL
+    if is_untranslatable(text):
+        return SKIP_UNTRANSLATABLE
+    if in_language(text, target_code):
+        return SKIP_LANGUAGE
+    return None
@@ -0,0 +1,118 @@
+import hashlib
+import logging
+import os
+import re
+import time
+import unicodedata
+from collections import OrderedDict
+from typing import Dict, Iterable, Optional
+
+logger = logging.getLogger(__name__)
+
+REDIS_URL = os.getenv("REDIS_URL")
+TRANSLATION_MEMORY_LOCAL_ENTRIES = int(os.getenv("TRANSLATION_MEMORY_LOCAL_ENTRIES", "10000"))
+TRANSLATION_MEMORY_TTL_SECONDS = int(os.getenv("TRANSLATION_MEMORY_TTL_SECONDS", str(30 * 24 * 3600)))
+# After a Redis error the shared tier is skipped for this long, so an outage does not slow every request
+_REDIS_RETRY_SECONDS = 30
+
+_WHITESPACE_REGEX = re.compile(r"\s+")
+_LETTER_RUN_REGEX = re.compile(r"[^\W\d_]+")
+
+
+def normalize(text: str) -> str:
+    return _WHITESPACE_REGEX.sub(" ", unicodedata.normalize("NFKC", text)).strip()
+
+
+def is_untranslatable(text: str) -> bool:
+    """True for segments that read the same in any language.
+
+    That is text without letters (numbers, units, punctuation, symbols) and
+    formula-like text whose letters are only single-character variables,
+    such as "x = 2y + 1" or "(b)".
+    """
+    runs = _LETTER_RUN_REGEX.findall(text)
+    # A lone CJK character is a word, so only Latin and Greek letters count as variables
+    return all(len(run) == 1 and unicodedata.name(run, "").startswith(("LATIN", "GREEK")) for run in runs)
+
+
+class TranslationMemory:
+    """Translations keyed by (source_lang, target_lang, model, normalized text hash).
+
+    A local LRU answers repeats within this process; Redis, when REDIS_URL is
+    set, shares translations between replicas and restarts. Only successful
+    LLM translations are stored.
+    """
+
+    def __init__(self, redis_url: Optional[str], max_entries: int, ttl_seconds: int):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self._local: "OrderedDict[str, str]" = OrderedDict()
+        self._redis = None
+        self._redis_down_until = 0.0
+        if redis_url:
+            import redis.asyncio
+
+            self._redis = redis.asyncio.Redis.from_url(
+                redis_url, socket_connect_timeout=1, socket_timeout=1, decode_responses=True
+            )
+
+    @staticmethod
+    def key(text: str, source_lang: Optional[str], target_lang: str, model: str) -> str:
+        digest = hashlib.sha256(normalize(text).encode("utf-8")).hexdigest()
+        return f"tm:{source_lang or 'auto'}:{target_lang}:{model}:{digest}"
+
+    def _redis_available(self) -> bool:
+        return self._redis is not None and time.monotonic() >= self._redis_down_until
+
+    def _redis_failed(self, e: Exception):
+        logger.warning(f"Translation memory Redis unavailable, using the local cache only: {e}")
+        self._redis_down_until = time.monotonic() + _REDIS_RETRY_SECONDS
+
+    def _remember(self, key: str, translation: str):
+        self._local[key] = translation
+        self._local.move_to_end(key)
+        while len(self._local) > self.max_entries:
+            self._local.popitem(last=False)
+
+    async def get_many(self, keys: Iterable[str]) -> Dict[str, str]:
+        found: Dict[str, str] = {}
+        missing = []
+        for key in keys:
+            translation = self._local.get(key)
+            if translation is None:
+                missing.append(key)
+            else:
+                self._local.move_to_end(key)
+                found[key] = translation
+
+        if missing and self._redis_available():
+            try:
+                values = await self._redis.mget(missing)
+            except Exception as e:
+                self._redis_failed(e)
+            else:
+                for key, translation in zip(missing, values):
+                    if translation is not None:
+                        found[key] = translation
+                        self._remember(key, translation)
+        return found
+
+    async def put_many(self, translations: Dict[str, str]):
+        for key, translation in translations.items():
+            self._remember(key, translation)
+
+        if translations and self._redis_available():
+            try:
+                async with self._redis.pipeline(transaction=False) as pipe:
+                    for key, translation in translations.items():
+                        pipe.set(key, translation, ex=self.ttl_seconds)
+                    await pipe.execute()
+            except Exception as e:
+                self._redis_failed(e)
+
+    async def close(self):
+        if self._redis is not None:
+            await self._redis.aclose()
+
+
+translation_memory = TranslationMemory(REDIS_URL, TRANSLATION_MEMORY_LOCAL_ENTRIES, TRANSLATION_MEMORY_TTL_SECONDS)
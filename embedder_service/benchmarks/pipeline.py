@@ -0,0 +1,310 @@
+"""Throughput and latency of the chunking -> embedding pipeline.
+
+Runs `data_chunking` and `vectorize_chromadb` from routers/embed.py over text
+taken from the files in sample-files/ (the docling `input.json`, plus the PDFs
+when the optional `pypdf` package is installed) at several document sizes and
+concurrency levels. For each configuration it reports sentences/s, chunks/s,
+p50/p99 latency per stage, peak RSS and embedding cache hit rate.
+
+Each document is generated from a seed of its own: corpus sentences drawn at
+random with their words shuffled, so no two documents, in one configuration
+or across them, share sentences and a cold run misses the embedding cache on
+every lookup. `--warm` runs the same documents once, untimed, first. The
+run's cache lives in a temporary EMBED_CACHE_DIR; the service's cache is
+never read or written.
+
+Results are written as JSON and compared with `--baseline` (the committed
+benchmarks/baseline.json by default, "" to skip), flagging regressions beyond
+`--tolerance`; the exit code is 1 if any are found, and 2 if the baseline was
+measured with another model or cache mode. `--compare` checks an
+earlier results file against the baseline without running anything, and
+`--update-baseline` stores this run as the new baseline.
+
+Run from embedder_service/:
+
+    python benchmarks/pipeline.py --sizes 2000,10000,50000 --concurrency 1,4,8
+    python benchmarks/pipeline.py --compare pipeline-results.json
+"""
+
+import argparse
+import asyncio
+import glob
+import json
+import os
+import random
+import resource
+import shutil
+import sys
+import tempfile
+import time
+
+import numpy as np
+
+SERVICE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path[:0] = [SERVICE_DIR, os.path.dirname(SERVICE_DIR)]
+
+# Read by utils.embedding_cache on import, so it has to be set first
+RUN_DIR = tempfile.mkdtemp(prefix="omnipdf-bench-")
+os.environ["EMBED_CACHE_DIR"] = os.path.join(RUN_DIR, "embedding_cache")
+
+from models.embed import DataRequest, ProcessingConfig, EMBEDDING_MODEL_NAME  # noqa: E402
+from models.helper import get_chunking_model, get_embedding_model  # noqa: E402
+from routers.embed import data_chunking, vectorize_chromadb  # noqa: E402
+from utils.batcher import encode_batcher  # noqa: E402
+from utils.chunker import sentence_spans  # noqa: E402
+from utils.embedding_cache import embedding_cache  # noqa: E402
+from utils.model_registry import model_registry  # noqa: E402
+from utils.vector_store import drop_collection  # noqa: E402
+
+# Throughput metrics regress when they drop, latency metrics when they grow
+HIGHER_IS_BETTER = ("sentences_per_sec", "chunks_per_sec")
+LOWER_IS_BETTER = ("chunking_p50_ms", "chunking_p99_ms", "embedding_p50_ms", "embedding_p99_ms")
+DEFAULT_BASELINE = os.path.join(SERVICE_DIR, "benchmarks", "baseline.json")
+
+
+def load_corpus(sample_dir: str) -> str:
+    texts = []
+
+    for path in sorted(glob.glob(os.path.join(sample_dir, "*.json"))):
+        with open(path) as f:
+            document = json.load(f)
+        document = document.get("docling", document) if isinstance(document, dict) else {}
+        texts.extend(item["text"] for item in document.get("texts", []) if item.get("text"))
+
+    try:
+        from pypdf import PdfReader
+    except ImportError:
+        print("pypdf is not installed, skipping the sample PDFs", file=sys.stderr)
+    else:
+        for path in sorted(glob.glob(os.path.join(sample_dir, "*.pdf"))):
+            texts.extend(page.extract_text() or "" for page in PdfReader(path).pages)
+
+    corpus = "\n\n".join(text for text in texts if text.strip())
+    if not corpus:
+        raise SystemExit(f"No text found in {sample_dir}")
+    return corpus
+
+
+def corpus_sentences(corpus: str) -> list:
+    return [corpus[start:end].split() for start, end in sentence_spans(corpus) if len(corpus[start:end].split()) > 1]
+
+
+def document_text(sentences: list, size: int, seed: str) -> str:
+    """About `size` characters of corpus sentences with shuffled words, the same for the same seed"""
+    rng = random.Random(seed)
+    paragraphs, paragraph, length = [], [], 0
+    while length < size:
+        words = list(rng.choice(sentences))
+        rng.shuffle(words)
+        sentence = " ".join(words).rstrip(".!?") + "."
+        paragraph.append(sentence[0].upper() + sentence[1:])
+        length += len(sentence) + 1
+        if len(paragraph) >= rng.randint(3, 8):
+            paragraphs.append(" ".join(paragraph))
+            paragraph = []
+    paragraphs.append(" ".join(paragraph))
+    return "\n\n".join(paragraph for paragraph in paragraphs if paragraph)[:size]
+
+
+def peak_rss_bytes() -> int:
+    # ru_maxrss is in kilobytes on Linux and bytes on macOS
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak if sys.platform == "darwin" else peak * 1024
+
+
+def percentile_ms(values, q: float) -> float:
+    return round(float(np.percentile(values, q)) * 1000, 2) if values else 0.0
+
+
+async def run_document(request: DataRequest, timings: dict):
+    start = time.perf_counter()
+    chunk_data = await data_chunking(request, get_chunking_model(request.config))
+    chunked = time.perf_counter()
+    await vectorize_chromadb(chunk_data, request.config, get_embedding_model(request.config.embedding_model))
+    done = time.perf_counter()
+
+    timings["chunking"].append(chunked - start)
+    timings["embedding"].append(done - chunked)
+    return len(chunk_data)
+
+
+async def run_configuration(
+    sentences: list, size: int, concurrency: int, documents: int, model: str, warm: bool
+) -> dict:
+    collection_name = f"bench-{size}-{concurrency}"
+    config = ProcessingConfig(collection_name=collection_name, embedding_model=model)
+    requests = [
+        DataRequest(
+            doc_id=f"bench-{size}-{i}",
+            text=document_text(sentences, size, f"{size}-{concurrency}-{i}"),
+            config=config,
+            pages_info=[]
+        )
+        for i in range(documents)
+    ]
+    sentence_count = sum(len(sentence_spans(request.text)) for request in requests)
+
+    if warm:
+        await asyncio.gather(*(run_document(request, {"chunking": [], "embedding": []}) for request in requests))
+        drop_collection(collection_name)
+
+    cache_before = embedding_cache.stats()
+    timings = {"chunking": [], "embedding": []}
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def limited(request: DataRequest):
+        async with semaphore:
+            return await run_document(request, timings)
+
+    start = time.perf_counter()
+    chunks = sum(await asyncio.gather(*(limited(request) for request in requests)))
+    elapsed = time.perf_counter() - start
+    drop_collection(collection_name)
+
+    cache_after = embedding_cache.stats()
+    hits = (cache_after["memory_hits"] + cache_after["disk_hits"]) - (cache_before["memory_hits"] + cache_before["disk_hits"])
+    lookups = hits + cache_after["misses"] - cache_before["misses"]
+
+    return {
+        "size": size,
+        "concurrency": concurrency,
+        "documents": documents,
+        "sentences": sentence_count,
+        "chunks": chunks,
+        "elapsed_sec": round(elapsed, 3),
+        "sentences_per_sec": round(sentence_count / elapsed, 2),
+        "chunks_per_sec": round(chunks / elapsed, 2),
+        "chunking_p50_ms": percentile_ms(timings["chunking"], 50),
+        "chunking_p99_ms": percentile_ms(timings["chunking"], 99),
+        "embedding_p50_ms": percentile_ms(timings["embedding"], 50),
+        "embedding_p99_ms": percentile_ms(timings["embedding"], 99),
+        "peak_rss_bytes": peak_rss_bytes(),
+        "cache_hit_rate": round(hits / lookups, 4) if lookups else 0.0,
+    }
+
+
+def compare(results: list, baseline: list, tolerance: float) -> list:
+    """Metrics that regressed by more than `tolerance` against the baseline"""
+
+    previous = {(row["size"], row["concurrency"]): row for row in baseline}
+    regressions = []
+    for row in results:
+        before = previous.get((row["size"], row["concurrency"]))
+        if before is None:
+            continue
+        for metric in HIGHER_IS_BETTER + LOWER_IS_BETTER:
+            old, new = before.get(metric), row.get(metric)
+            if not old or new is None:
+                continue
+            change = (new - old) / old
+            if (metric in HIGHER_IS_BETTER and change < -tolerance) or (metric in LOWER_IS_BETTER and change > tolerance):
+                regressions.append({
+                    "size": row["size"],
+                    "concurrency": row["concurrency"],
+                    "metric": metric,
+                    "baseline": old,
+                    "current": new,
+                    "change": round(change, 4),
+                })
+    return regressions
+
+
+def report_regressions(report: dict, baseline_path: str, tolerance: float) -> int:
+    """Add the regressions against a baseline file to the report; returns the exit code"""
+
+    with open(baseline_path) as f:
+        baseline = json.load(f)
+    if baseline.get("warm_cache") != report.get("warm_cache"):
+        print(
+            f"Baseline {baseline_path} was measured with warm_cache={baseline.get('warm_cache')}, "
+            f"not {report.get('warm_cache')}; not comparing",
+            file=sys.stderr
+        )
+        return 2
+    if baseline.get("model") != report.get("model"):
+        print(
+            f"Baseline {baseline_path} was measured with model {baseline.get('model')!r}, "
+            f"not {report.get('model')!r}; not comparing. Regenerate it with --update-baseline",
+            file=sys.stderr
+        )
+        return 2
+
+    report["regressions"] = compare(report["results"], baseline.get("results", []), tolerance)
+    for regression in report["regressions"]:
+        print(
+            f"REGRESSION size={regression['size']} concurrency={regression['concurrency']} "
+            f"{regression['metric']}: {regression['baseline']} -> {regression['current']} "
+            f"({regression['change']:+.1%})"
+        )
+    if not report["regressions"]:
+        print(f"No regressions beyond {tolerance:.0%} against {baseline_path}")
+    return 1 if report["regressions"] else 0
+
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--samples", default=os.path.join(os.path.dirname(SERVICE_DIR), "sample-files"))
+    parser.add_argument("--model", default=EMBEDDING_MODEL_NAME)
+    parser.add_argument("--sizes", default="2000,10000,50000", help="Document sizes in characters")
+    parser.add_argument("--concurrency", default="1,4,8", help="Documents processed at once")
+    parser.add_argument("--documents", type=int, default=8, help="Documents per configuration")
+    parser.add_argument("--warm", action="store_true", help="Measure with a warm embedding cache")
+    parser.add_argument("--output", default="pipeline-results.json")
+    parser.add_argument("--baseline", default=DEFAULT_BASELINE, help='Results file to compare against, "" to skip')
+    parser.add_argument("--compare", metavar="RESULTS", help="Compare an earlier results file instead of running")
+    parser.add_argument("--update-baseline", action="store_true", help="Also write the results to --baseline")
+    parser.add_argument("--tolerance", type=float, default=0.10, help="Allowed relative regression")
+    args = parser.parse_args()
+
+    if args.compare:
+        with open(args.compare) as f:
+            return report_regressions(json.load(f), args.baseline, args.tolerance)
+
+    corpus = load_corpus(args.samples)
+    sentences = corpus_sentences(corpus)
+    model_registry.preload([args.model])
+    encode_batcher.start()
+
+    results = []
+    try:
+        for size in (int(value) for value in args.sizes.split(",")):
+            for concurrency in (int(value) for value in args.concurrency.split(",")):
+                row = await run_configuration(sentences, size, concurrency, args.documents, args.model, args.warm)
+                results.append(row)
+                print(
+                    f"size={size:<7} concurrency={concurrency:<3} "
+                    f"{row['sentences_per_sec']:>9.1f} sent/s {row['chunks_per_sec']:>8.1f} chunks/s  "
+                    f"chunking p50/p99 {row['chunking_p50_ms']}/{row['chunking_p99_ms']} ms  "
+                    f"embedding p50/p99 {row['embedding_p50_ms']}/{row['embedding_p99_ms']} ms  "
+                    f"cache hit {row['cache_hit_rate']:.2%}  rss {row['peak_rss_bytes'] / 2**20:.0f} MiB"
+                )
+    finally:
+        encode_batcher.stop()
+
+    report = {
+        "model": args.model,
+        "warm_cache": args.warm,
+        "corpus_chars": len(corpus),
+        "created_at": time.time(),
+        "results": results,
+    }
+
+    exit_code = 0
+    if args.update_baseline:
+        with open(args.baseline, "w") as f:
+            json.dump(report, f, indent=2)
+        print(f"Baseline written to {args.baseline}")
+    elif args.baseline and os.path.exists(args.baseline):
+        exit_code = report_regressions(report, args.baseline, args.tolerance)
+
+    with open(args.output, "w") as f:
+        json.dump(report, f, indent=2)
+    return exit_code
+
+
+if __name__ == "__main__":
+    try:
+        exit_code = asyncio.run(main())
+    finally:
+        shutil.rmtree(RUN_DIR, ignore_errors=True)
+    sys.exit(exit_code)
@@ -0,0 +1,119 @@
+"""Recall and memory of reduced-precision collections on the sample corpus.
+
+Every sentence of the docling sample document is embedded once and stored in
+a float32 reference index and in float16/int8 `QuantizedCollection`s, with
+and without full-precision rescoring. Each sentence is then used as a query
+and the quantized top-k is compared with the exact float32 top-k.
+
+Memory is what each collection has allocated, spare capacity and the
+full-precision rescoring file included, against the bare float32 vectors.
+
+Run from embedder_service/:
+
+    python benchmarks/quantization.py --input ../sample-files/input.json
+"""
+
+import argparse
+import json
+import os
+import sys
+import tempfile
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from models.embed import EMBEDDING_MODEL_NAME  # noqa: E402
+from utils.chunker import sentence_spans  # noqa: E402
+from utils.model_registry import model_registry  # noqa: E402
+from utils.quantized_collection import QuantizedCollection  # noqa: E402
+
+
+def load_sentences(path: str):
+    with open(path) as f:
+        document = json.load(f)
+    document = document.get("docling", document)
+    text = "\n\n".join(item["text"] for item in document.get("texts", []) if item.get("text"))
+    return [text[start:end] for start, end in sentence_spans(text)]
+
+
+def exact_top_k(vectors: np.ndarray, queries: np.ndarray, k: int) -> np.ndarray:
+    distances = (queries ** 2).sum(axis=1)[:, None] + (vectors ** 2).sum(axis=1)[None, :] - 2 * queries @ vectors.T
+    return np.argsort(distances, axis=1, kind="stable")[:, :k]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--input", default="../sample-files/input.json", help="docling JSON document")
+    parser.add_argument("--model", default=EMBEDDING_MODEL_NAME)
+    parser.add_argument("--k", type=int, default=10)
+    parser.add_argument("--rescore-factor", type=int, default=4)
+    parser.add_argument("--output", help="Write the results as JSON to this file")
+    args = parser.parse_args()
+
+    sentences = load_sentences(args.input)
+    model = model_registry.get(args.model)
+    vectors = np.asarray(model.encode(sentences, convert_to_numpy=True, show_progress_bar=False), dtype=np.float32)
+    ids = [str(i) for i in range(len(sentences))]
+    k = min(args.k, len(sentences))
+
+    truth = exact_top_k(vectors, vectors, k)
+    float32_bytes = vectors.nbytes
+
+    results = [{
+        "precision": "float32",
+        "rescore": False,
+        "recall_at_k": 1.0,
+        "memory_bytes": float32_bytes,
+        "memory_ratio": 1.0,
+        "query_ms": None,
+    }]
+
+    with tempfile.TemporaryDirectory() as rescore_dir:
+        for precision in ("float16", "int8"):
+            for rescore in (False, True):
+                collection = QuantizedCollection(
+                    f"bench-{precision}-{int(rescore)}",
+                    precision=precision,
+                    rescore_dir=rescore_dir if rescore else None,
+                    rescore_factor=args.rescore_factor
+                )
+                collection.add(ids=ids, embeddings=vectors, documents=sentences)
+
+                start = time.perf_counter()
+                found = collection.query(query_embeddings=vectors, n_results=k, include=["distances"])["ids"]
+                elapsed = time.perf_counter() - start
+
+                recall = np.mean([
+                    len(set(map(int, hits)) & set(expected.tolist())) / k
+                    for hits, expected in zip(found, truth)
+                ])
+                memory = collection.memory_bytes()
+                results.append({
+                    "precision": precision,
+                    "rescore": rescore,
+                    "recall_at_k": round(float(recall), 4),
+                    "memory_bytes": memory,
+                    "memory_ratio": round(memory / float32_bytes, 3),
+                    "query_ms": round(elapsed * 1000 / len(sentences), 3),
+                })
+
+    report = {"model": args.model, "vectors": len(sentences), "dimensions": vectors.shape[1], "k": k, "results": results}
+
+    print(f"{len(sentences)} vectors x {vectors.shape[1]} dims, recall@{k} against exact float32 search")
+    print(f"{'precision':<10}{'rescore':<9}{'recall':>8}{'memory':>12}{'ratio':>8}{'ms/query':>10}")
+    for row in results:
+        query_ms = "-" if row["query_ms"] is None else f"{row['query_ms']:.3f}"
+        print(
+            f"{row['precision']:<10}{str(row['rescore']):<9}{row['recall_at_k']:>8.4f}"
+            f"{row['memory_bytes']:>12}{row['memory_ratio']:>8.3f}{query_ms:>10}"
+        )
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,5 +1,13 @@
+import asyncio
+from contextlib import asynccontextmanager
 from fastapi import FastAPI
-from routers import health, embed
+from fastapi.concurrency import run_in_threadpool
+from routers import health, embed, search
+from models.embed import EMBEDDING_MODEL_NAME
+from utils.model_registry import model_registry
+from utils.batcher import encode_batcher
+from utils.embedding_cache import embedding_cache
+from utils.vector_store import get_client, warm_lexical_indexes
 import logging
 
 
@@ -9,7 +17,24 @@ logging.basicConfig(
     format="%(asctime)s [%(levelname)s] %(name)s: %(message)s"
 )
 
-app = FastAPI(root_path="/embedder")
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Load and warm up the default embedding model before serving requests
+    await run_in_threadpool(model_registry.preload, [EMBEDDING_MODEL_NAME])
+    # Connect to the vector store up front so a misconfigured backend fails at startup
+    await run_in_threadpool(get_client)
+    encode_batcher.start()
+    # Collections already in the store get their lexical index while the service starts serving
+    warm = asyncio.create_task(run_in_threadpool(warm_lexical_indexes))
+    yield
+    warm.cancel()
+    await run_in_threadpool(encode_batcher.stop)
+    await run_in_threadpool(embedding_cache.flush)
+
+
+app = FastAPI(root_path="/embedder", lifespan=lifespan)
 
 app.include_router(health.router)
 app.include_router(embed.router)
+app.include_router(search.router)
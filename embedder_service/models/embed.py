@@ -1,5 +1,5 @@
 from pydantic import BaseModel, Field
-from typing import List, Dict, Optional, get_args
+from typing import List, Dict, Literal, Optional, get_args
 import os
 from langchain_experimental.text_splitter import BreakpointThresholdType
 
@@ -28,6 +28,11 @@ class ProcessingConfig(BaseModel):
         default=True, description="Store embeddings in ChromaDB")
     collection_name: str = Field(
         default="my_documents", description="ChromaDB collection name")
+    embedding_precision: Literal["float32", "float16", "int8"] = Field(
+        default="float32",
+        description="Precision embeddings are stored at when the collection is created; "
+                    "float16 and int8 are rescored against full-precision vectors and are only "
+                    "available on the memory vector store backend")
 
 
 class DataRequest(BaseModel):
@@ -36,4 +41,29 @@ class DataRequest(BaseModel):
     doc_id: str
     text: str # to be received in JSON format from PDF Extraction Service
     config: ProcessingConfig
-    pages_info: List[Dict]
+    session_id: Optional[str] = Field(
+        default=None, description="Chat session the document belongs to, for scoping search")
+    pages_info: List[Dict] = Field(
+        ...,
+        description="Per-page character ranges of `text`: page_number, char_start, char_end "
+                    "and optional docling provenance `items` ({char_start, char_end, bbox})")
+
+
+class EmbedJobResponse(BaseModel):
+    """Response model for asynchronous embed jobs."""
+
+    doc_id: str
+    status: str
+
+
+class DocumentManifest(BaseModel):
+    """Summary of the chunks stored for a document, kept alongside the collection."""
+
+    doc_id: str
+    collection_name: str
+    chunk_ids: List[str]
+    chunk_count: int
+    embedding_model: Optional[str] = None
+    content_hash: Optional[str] = None
+    created_at: float
+    updated_at: float
@@ -1,45 +1,76 @@
-from typing import List
+from typing import Any, Dict, List
 from models.embed import ProcessingConfig
-from functools import lru_cache
+from functools import lru_cache, partial
+from utils.batcher import encode_batcher
+from utils.chunker import SemanticChunkerEngine
+from utils.embedding_cache import embedding_cache
+import numpy as np
 
-# Langchain components
-from langchain_core.embeddings import Embeddings
-from langchain_experimental.text_splitter import SemanticChunker
-# Sentence transformers
-from sentence_transformers import SentenceTransformer
+# ChromaDB embedding functions
+from chromadb.api.types import Documents, Embeddings as ChromaEmbeddings
 from chromadb.utils.embedding_functions.sentence_transformer_embedding_function import SentenceTransformerEmbeddingFunction
 
-# Custom Embeddings class for Sentence Transformers
-class SentenceTransformerEmbeddings(Embeddings):
-    """Custom embeddings class for Sentence Transformers"""
 
-    def __init__(self, model_name: str):
-        self.model = SentenceTransformer(model_name)
+def embed_texts(model_name: str, texts: List[str], persist: bool = True) -> np.ndarray:
+    """Embed texts, serving repeats from the embedding cache and encoding only the misses.
 
-    def embed_documents(self, texts: List[str]) -> List[List[float]]:
-        """Embed a list of documents"""
-        embeddings = self.model.encode(texts, convert_to_tensor=False)
-        return embeddings.tolist()
+    `persist=False` keeps the vectors out of the disk tier, for one-off texts such as search queries.
+    """
+    vectors = embedding_cache.get_many(model_name, texts, disk=persist)
+    missing = [i for i, vector in enumerate(vectors) if vector is None]
 
-    def embed_query(self, text: str) -> List[float]:
-        """Embed a single query"""
-        embedding = self.model.encode([text], convert_to_tensor=False)
-        return embedding[0].tolist()
+    if missing:
+        missing_texts = [texts[i] for i in missing]
+        encoded = encode_batcher.encode(model_name, missing_texts)
+        embedding_cache.put_many(model_name, missing_texts, encoded, disk=persist)
+        for i, vector in zip(missing, encoded):
+            vectors[i] = vector
+
+    if not vectors:
+        return np.empty((0, 0), dtype=np.float32)
+    return np.stack(vectors)
+
+
+class RegistryEmbeddingFunction(SentenceTransformerEmbeddingFunction):
+    """ChromaDB embedding function that reuses the registry's model instead of loading its own copy"""
+
+    def __init__(self, model_name: str, device: str = "cpu", normalize_embeddings: bool = False):
+        self.model_name = model_name
+        self.device = device
+        self.normalize_embeddings = normalize_embeddings
+        self.kwargs = {}
+
+    def __call__(self, input: Documents) -> ChromaEmbeddings:
+        """Embed documents through the embedding cache and shared micro-batching worker"""
+        embeddings = embed_texts(self.model_name, list(input))
+        return list(embeddings)
+
+    @staticmethod
+    def build_from_config(config: Dict[str, Any]) -> "RegistryEmbeddingFunction":
+        # Chroma rebuilds embedding functions from their config; keep that on the registry too
+        return RegistryEmbeddingFunction(
+            model_name=config["model_name"],
+            device=config.get("device", "cpu"),
+            normalize_embeddings=config.get("normalize_embeddings", False),
+        )
 
 
 @lru_cache(maxsize=5)
 def get_embedding_model(model_name: str):
-    """Get a cached SentenceTransformerEmbeddings model."""
-    return SentenceTransformerEmbeddingFunction(model_name)
+    """Get a cached ChromaDB embedding function for the given model."""
+    return RegistryEmbeddingFunction(model_name)
 
 
 def get_chunking_model(config: ProcessingConfig):
     """Helper function to get tools based on current request's config"""
-    # emb_model = get_embedding_model(config.embedding_model)
-    sem_chunker = SemanticChunker(
-        SentenceTransformerEmbeddings(config.embedding_model),
-        breakpoint_threshold_type=config.breakpoint_threshold_type, 
-        breakpoint_threshold_amount=config.breakpoint_threshold_amount
+    sem_chunker = SemanticChunkerEngine(
+        partial(embed_texts, config.embedding_model),
+        breakpoint_threshold_type=config.breakpoint_threshold_type,
+        breakpoint_threshold_amount=config.breakpoint_threshold_amount,
+        chunk_size=config.chunk_size,
+        overlap=config.overlap,
+        min_chunk_size=config.min_chunk_size,
+        max_chunk_size=config.max_chunk_size
     )
 
-    return sem_chunker
\ No newline at end of file
+    return sem_chunker
@@ -0,0 +1,51 @@
+from pydantic import BaseModel, Field, model_validator
+from typing import List, Literal, Optional
+from models.embed import EMBEDDING_MODEL_NAME
+
+
+class SearchRequest(BaseModel):
+    """Request model for search API endpoint."""
+
+    query: Optional[str] = Field(default=None, description="Single query string")
+    queries: Optional[List[str]] = Field(default=None, description="Batch of query strings")
+    doc_ids: Optional[List[str]] = Field(default=None, description="Only search chunks of these documents")
+    session_id: Optional[str] = Field(default=None, description="Only search chunks embedded for this session")
+    k: int = Field(default=5, ge=1, le=100, description="Number of chunks to return per query")
+    mode: Literal["dense", "lexical", "hybrid", "prefilter"] = Field(
+        default="dense",
+        description="dense: embedding similarity; lexical: BM25; hybrid: both fused by reciprocal rank; "
+                    "prefilter: embedding similarity over the BM25 candidates only")
+    collection_name: str = Field(default="my_documents", description="ChromaDB collection name")
+    embedding_model: str = Field(default=EMBEDDING_MODEL_NAME, description="Sentence Transformer model")
+
+    @model_validator(mode="after")
+    def check_queries(self):
+        if not self.query and not self.queries:
+            raise ValueError("Either 'query' or 'queries' must be provided")
+        return self
+
+    def all_queries(self) -> List[str]:
+        return ([self.query] if self.query else []) + (self.queries or [])
+
+
+class SearchHit(BaseModel):
+    chunk_id: str
+    doc_id: Optional[str] = None
+    content: str
+    distance: Optional[float] = Field(default=None, description="Squared L2 distance, for dense and prefilter search")
+    score: Optional[float] = Field(default=None, description="BM25 score, or the fused rank score for hybrid search")
+    chunk_index: Optional[int] = None
+    start_char: Optional[int] = None
+    end_char: Optional[int] = None
+    page_number: Optional[int] = None
+    last_page_number: Optional[int] = None
+
+
+class QueryResults(BaseModel):
+    query: str
+    hits: List[SearchHit]
+
+
+class SearchResponse(BaseModel):
+    collection_name: str
+    results: List[QueryResults]
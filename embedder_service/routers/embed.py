@@ -1,34 +1,47 @@
 # For data chunking and embedding
 
-from fastapi import APIRouter, HTTPException
-from typing import List, Dict, Any
+from fastapi import APIRouter, BackgroundTasks, HTTPException, Query, Request, Response
+from fastapi.responses import StreamingResponse
+from pydantic import ValidationError
+from fastapi.concurrency import run_in_threadpool
+from typing import List, Dict, Any, Optional, Tuple, Union
+import asyncio
+import hashlib
+import json
 import logging
-import uuid
-from models.embed import ProcessingConfig, DataRequest
-from models.helper import get_chunking_model, get_embedding_model
+import os
+import time
+from models.embed import ProcessingConfig, DataRequest, DocumentManifest, EmbedJobResponse, EMBEDDING_MODEL_NAME
+from models.helper import get_chunking_model, get_embedding_model, embed_texts
+from utils.embedding_cache import embedding_cache
+from utils.lexical_index import lexical_indexes
+from utils.manifest import ChunkDiff, chunk_id_for, manifest_store
+from utils.page_index import PageIndex
+from utils.query_cache import query_cache
+from shared_utils.s3_utils import delete_jobs, save_job, load_job
 # from unstructured.partition.pdf import partition_pdf
 # from unstructured.staging.base import elements_to_json
 # import numpy as np
 
 # from langchain.text_splitter import MarkdownTextSplitter
-from langchain_core.documents import Document
 
 # ChromaDB
-import chromadb
 # from chromadb.utils import embedding_functions
+from utils.vector_store import (
+    UnsupportedPrecisionError, VectorStoreFullError, check_record_cap, collection_name_for, get_client,
+    get_collection, get_or_create_collection
+)
 
 router = APIRouter()
 logger = logging.getLogger(__name__)
 
-
-# In-memory ChromaDB instance (data stored in memory)
-chroma_client = chromadb.EphemeralClient()
-# Persistent ChromaDB instance (data stored on disk)
-# chroma_client = chromadb.HttpClient(host="localhost", port=5100)
+EMBEDDING_JOB_TYPE = "embedding"
+CHROMA_MAX_ADD_BATCH = int(os.getenv("CHROMA_MAX_ADD_BATCH", "2000"))
+EMBED_BATCH_WINDOW = int(os.getenv("EMBED_BATCH_WINDOW", "16"))
 
 
 async def data_chunking(request:DataRequest, chunker) -> List[Dict[str, Any]]:
-    """Perform chunking / splitting of data via Semantic Chunking using LangChain's SemanticChunker,
+    """Perform chunking / splitting of data via Semantic Chunking using the native SemanticChunkerEngine,
     and reject by returning empty list if PDF document has no content"""
 
     logger.info("Starting chunking process...")
@@ -38,109 +51,212 @@ async def data_chunking(request:DataRequest, chunker) -> List[Dict[str, Any]]:
         if not request.text.strip():
             raise HTTPException(status_code=400, detail="No text content found in PDF")
 
-        # Create a Document object
-        doc = Document(page_content=request.text.strip())
-
-        # Use semantic chunker
-        chunks = chunker.split_documents([doc])
-        logger.info(f"Number of chunks: {len(chunks)}")
+        # The chunker reports exact character spans, so offsets never need to be searched for.
+        # It runs off the event loop and its sentence embeddings go through the shared batcher.
+        spans = await run_in_threadpool(chunker.chunk_spans, request.text)
+        logger.info(f"Number of chunks: {len(spans)}")
 
+        page_index = PageIndex(request.pages_info)
+        content_hash = hashlib.sha256(request.text.encode("utf-8")).hexdigest()
         chunk_data = []
-        current_pos = 0
-
-        for i, chunk in enumerate(chunks):
-            # First iteration: Extract first chunk of doc.page_content
-            chunk_content = chunk.page_content
-            logger.info(f"Length of chunk {i+1}: {len(chunk_content.strip())}")
-
-            chunk_start = request.text.find(chunk_content, current_pos)
-
-            if chunk_start == -1:
-                chunk_start = current_pos
-
-            chunk_end = chunk_start + len(chunk_content)
-
-            # # Find which page this chunk belongs to
-            # page_number = None
-            # for page_info in request.pages_info:
-            #     if (chunk_start >= page_info['char_start'] and
-            #             chunk_start < page_info['char_end']):
-            #         page_number = page_info['page_number']
-            #         break
-
-            # Find page number for the chunk
-            # page_number = None
-            # for page_info in request.pages_info:
-            #     # Ensure keys exist to avoid KeyErrors
-            #     page_start = page_info.get('start_char')
-            #     page_end = page_info.get('end_char')
-            #     if page_start is not None and page_end is not None:
-            #         if page_start <= chunk_start < page_end:
-            #             page_number = page_info.get('page')
-            #             break
-
-            # Include doc_id in metadata
-            chunk_metadata = chunk.metadata.copy()
-            chunk_metadata["doc_id"] = request.doc_id
-            
-            # Skip chunks that are too small or too large (if necessary)
-            # if (len(chunk_content.strip()) < request.config.min_chunk_size) or (len(chunk_content.strip()) > request.config.max_chunk_size):
-            #     current_pos = chunk_end
-            #     continue
-
-            # else:
+        seen_hashes: Dict[str, int] = {}
+
+        for chunk_start, chunk_end in spans:
+            chunk_content = request.text[chunk_start:chunk_end]
+            chunk_hash = hashlib.sha256(chunk_content.encode("utf-8")).hexdigest()
+            # Repeated chunk text within a document gets an ordinal so every id stays unique
+            ordinal = seen_hashes.get(chunk_hash, 0)
+            seen_hashes[chunk_hash] = ordinal + 1
+            pages = page_index.pages_between(chunk_start, chunk_end)
+            page_number = pages[0] if pages else None
+
+            # Include doc_id and location in metadata so search results can cite pages
+            chunk_metadata = {
+                "doc_id": request.doc_id,
+                "chunk_index": len(chunk_data),
+                "start_char": chunk_start,
+                "end_char": chunk_end,
+                "content_hash": content_hash,
+                "chunk_hash": chunk_hash,
+                "embedding_model": request.config.embedding_model,
+            }
+            if page_number is not None:
+                chunk_metadata["page_number"] = page_number
+                chunk_metadata["last_page_number"] = pages[-1]
+            if request.session_id:
+                chunk_metadata["session_id"] = request.session_id
+
             chunk_data.append({
-            'chunk_id': str(uuid.uuid4()),
-            'content': chunk_content.strip(),
+            'chunk_id': chunk_id_for(request.doc_id, chunk_hash, ordinal),
+            'content': chunk_content,
             'start_char': chunk_start,
             'end_char': chunk_end,
-            'page_number': None,
+            'page_number': page_number,
+            'page_numbers': pages,
+            'bboxes': page_index.regions_between(chunk_start, chunk_end),
             'chunk_index': len(chunk_data),
             'metadata': chunk_metadata
             })
 
-            current_pos = chunk_end
-
-        logger.info(chunk_data)
         return chunk_data
+    except HTTPException:
+        raise
     except Exception as e:
         logger.error(f"Semantic chunking failed: {e}")
         raise HTTPException(status_code=500, detail="Data chunking failed.")
 
 
-async def vectorize_chromadb(chunk_data: List[Dict[str, Any]], config: ProcessingConfig, emb_model):
+def write_in_batches(method, **columns: List[Any]):
+    """Call a collection write method on slices capped at the client's maximum batch size"""
+
+    max_batch = min(CHROMA_MAX_ADD_BATCH, get_client().get_max_batch_size())
+    total = len(columns["ids"])
+    for start in range(0, total, max_batch):
+        method(**{name: values[start:start + max_batch] for name, values in columns.items()})
+
+
+def stamp_embedded_at(metadatas: List[Dict]):
+    now = time.time()
+    for metadata in metadatas:
+        metadata["embedded_at"] = now
+
+
+def diff_chunks(collection, chunk_data: List[Dict[str, Any]]) -> ChunkDiff:
+    """Compare freshly chunked documents with the chunks already stored for them.
+
+    Chunk ids are derived from the chunk text, so a chunk that is already
+    stored does not need to be embedded again. Documents whose text and chunk
+    ids match their shared manifest (retries) need no writes at all. For the
+    others, the chunks found in the collection are diffed together with the
+    manifest, so chunks a lost or stale manifest no longer lists are still
+    deleted.
+    """
+
+    diff = ChunkDiff()
+    by_doc: Dict[str, List[Dict[str, Any]]] = {}
+    for chunk in chunk_data:
+        by_doc.setdefault(chunk["metadata"]["doc_id"], []).append(chunk)
+
+    manifests = manifest_store.get_many(collection.name, list(by_doc))
+    for doc_id, chunks in by_doc.items():
+        manifest = manifests.get(doc_id)
+        current = {chunk["chunk_id"] for chunk in chunks}
+        if manifest and manifest.content_hash == chunks[0]["metadata"]["content_hash"] and set(manifest.chunk_ids) == current:
+            diff.unchanged.extend(chunks)
+        else:
+            diff.changed_docs.append(doc_id)
+
+    stored: Dict[str, Dict[str, Dict[str, Any]]] = {doc_id: {} for doc_id in diff.changed_docs}
+    if diff.changed_docs:
+        records = collection.get(where={"doc_id": {"$in": diff.changed_docs}}, include=["metadatas"])
+        for chunk_id, metadata in zip(records["ids"], records["metadatas"]):
+            stored[metadata["doc_id"]][chunk_id] = metadata
+
+    for doc_id in diff.changed_docs:
+        chunks = by_doc[doc_id]
+        current = {chunk["chunk_id"] for chunk in chunks}
+        for chunk in chunks:
+            if chunk["chunk_id"] in stored[doc_id]:
+                diff.kept.append(chunk)
+                diff.stored_metadata[chunk["chunk_id"]] = stored[doc_id][chunk["chunk_id"]]
+            else:
+                diff.new.append(chunk)
+        manifest = manifests.get(doc_id)
+        previous = dict.fromkeys([*(manifest.chunk_ids if manifest else []), *stored[doc_id]])
+        stale = [chunk_id for chunk_id in previous if chunk_id not in current]
+        if stale:
+            diff.stale[doc_id] = stale
+
+    return diff
+
+
+def complete_metadata(metadata: Dict[str, Any], stored: Dict[str, Any]) -> Dict[str, Any]:
+    """Metadata to write over a stored chunk: Chroma merges writes, so fields the chunk no longer has are set to None"""
+    return {**dict.fromkeys(key for key in stored if key not in metadata), **metadata}
+
+
+def apply_chunk_diff(collection, diff: ChunkDiff, embeddings):
+    """Upsert new chunks, rewrite the metadata of kept ones and delete stale ones"""
+
+    if diff.new:
+        ids = [chunk['chunk_id'] for chunk in diff.new]
+        documents = [chunk['content'] for chunk in diff.new]
+        metadatas = [chunk['metadata'] for chunk in diff.new]
+        write_in_batches(collection.upsert, ids=ids, documents=documents, embeddings=embeddings, metadatas=metadatas)
+        lexical_indexes.upsert(collection, ids, documents, metadatas)
+    if diff.kept:
+        # Offsets, pages and chunk_index can move, or go away, when text around an unchanged chunk is edited
+        ids = [chunk['chunk_id'] for chunk in diff.kept]
+        metadatas = [chunk['metadata'] for chunk in diff.kept]
+        complete = [complete_metadata(chunk['metadata'], diff.stored_metadata[chunk['chunk_id']]) for chunk in diff.kept]
+        write_in_batches(collection.update, ids=ids, metadatas=complete)
+        lexical_indexes.update_metadata(collection, ids, metadatas)
+    if diff.stale_ids:
+        write_in_batches(collection.delete, ids=diff.stale_ids)
+        lexical_indexes.delete(collection, diff.stale_ids)
+
+    if diff.new or diff.kept or diff.stale_ids:
+        # Cached search results for the collection no longer reflect its contents
+        query_cache.invalidate(collection.name)
+
+
+async def store_chunks(collection, collection_name: str, model_name: str, chunk_data: List[Dict[str, Any]]) -> ChunkDiff:
+    """Bring the stored chunks of each document in `chunk_data` in line with it, embedding only new chunks"""
+
+    diff = await run_in_threadpool(diff_chunks, collection, chunk_data)
+    await run_in_threadpool(check_record_cap, collection, len(diff.new) - len(diff.stale_ids))
+
+    # Chunk vectors come from the embedding cache when already seen, so Chroma never re-encodes them
+    embeddings = None
+    if diff.new:
+        embeddings = await run_in_threadpool(embed_texts, model_name, [chunk['content'] for chunk in diff.new])
+
+    stamp_embedded_at([chunk['metadata'] for chunk in diff.new + diff.kept])
+    await run_in_threadpool(apply_chunk_diff, collection, diff, embeddings)
+
+    changed = set(diff.changed_docs)
+    manifest_store.record_chunks(
+        collection_name,
+        model_name,
+        [chunk for chunk in chunk_data if chunk["metadata"]["doc_id"] in changed]
+    )
+    return diff
+
+
+async def vectorize_chromadb(
+    chunk_data: List[Dict[str, Any]], config: ProcessingConfig, emb_model, session_id: Optional[str] = None
+):
     """Embed data chunks of PDF document into ChromaDB"""
 
     logger.info("Starting embedding process...")
+    collection_name = collection_name_for(config.collection_name, session_id)
 
     try:
         try:
             logger.info("Getting collection...")
-            collection = chroma_client.get_or_create_collection(name=config.collection_name, embedding_function=emb_model)
-            logger.info(f"Using existing collection: {config.collection_name}")
+            collection = await run_in_threadpool(
+                get_or_create_collection, collection_name, emb_model, config.embedding_precision
+            )
+            logger.info(f"Using existing collection: {collection_name}")
+        except UnsupportedPrecisionError as e:
+            raise HTTPException(status_code=400, detail=str(e))
+        except VectorStoreFullError as e:
+            raise HTTPException(status_code=507, detail=str(e))
         except Exception as e:
             logger.error(f"Collection retrieval failed: {e}")
             raise HTTPException(status_code=500, detail="Collection retrieval failed.")
 
-        ids = [chunk['chunk_id'] for chunk in chunk_data]
-        documents = [chunk['content'] for chunk in chunk_data]
-        metadatas = [chunk['metadata'] for chunk in chunk_data]
-
-        if not ids:
+        if not chunk_data:
             logger.warning("No chunks to add to the collection.")
             return
-        
-        collection.add(
-            ids=ids,
-            documents=documents,
-            metadatas=metadatas
+
+        diff = await store_chunks(collection, collection_name, config.embedding_model, chunk_data)
+        logger.info(
+            f"Stored {len(chunk_data)} chunks in collection '{collection_name}': "
+            f"{len(diff.new)} embedded, {len(diff.stale_ids)} deleted"
         )
-        logger.info(f"Added {len(ids)} chunks to collection '{config.collection_name}'")
 
-        return {
-            "collection_name": config.collection_name,
-            "total_chunks_added": len(chunk_data)
-        }
+        return diff.summary(collection_name)
 
         # Part of the Chat Service
         # results = collection.query(
@@ -157,6 +273,10 @@ async def vectorize_chromadb(chunk_data: List[Dict[str, Any]], config: Processin
         #     "sample_query_results": serialized_results
         # }
 
+    except HTTPException:
+        raise
+    except VectorStoreFullError as e:
+        raise HTTPException(status_code=507, detail=str(e))
     except Exception as e:
         logger.error(f"Embedding process failed: {e}")
         raise HTTPException(status_code=500, detail="Embedding failed")
@@ -196,77 +316,402 @@ async def vectorize_chromadb(chunk_data: List[Dict[str, Any]], config: Processin
 #     return serialized
 
 
-@router.post("/embed")
-async def pdf_embedder_service(request: DataRequest):
-    "Chunk up and embed data from PDF document into ChromaDB"
+def build_embed_response(request: DataRequest, chunk_data: List[Dict[str, Any]], embed_results, verbose: bool = True):
+    """Summarise an embedding run, with the per-chunk payload only when verbose"""
+
+    result = {
+        "status": "success",
+        "doc_id": request.doc_id,
+        "chunks_created": len(chunk_data),
+        "embedding_results": embed_results,
+    }
+    if verbose:
+        result["chunk_details"] = [
+            {
+                "chunk_id": chunk["chunk_id"],
+                "chunk_index": chunk["chunk_index"],
+                "content": chunk["content"],
+                "content_length": len(chunk["content"]),
+                "start_char": chunk["start_char"],
+                "end_char": chunk["end_char"],
+                "page_number": chunk["page_number"],
+                "page_numbers": chunk["page_numbers"],
+                "bboxes": chunk["bboxes"]
+            }
+            for chunk in chunk_data
+        ]
+    return result
+
+
+async def run_embedding(request: DataRequest, verbose: bool = True, on_progress=None):
+    """Chunk and embed a document, reporting each stage through `on_progress` if given"""
 
     semantic_chunker = get_chunking_model(request.config)
     embedding_model = get_embedding_model(request.config.embedding_model)
-    
+
+    if on_progress:
+        await on_progress({"stage": "chunking"})
+
+    # Extracted data has to be chunked up first before being embedded and stored into ChromaDB
+    chunk_data = await data_chunking(request, semantic_chunker)
+
+    if not chunk_data:
+        raise HTTPException(status_code=400, detail="No chunks were created from the input text")
+
+    if on_progress:
+        await on_progress({"stage": "embedding", "chunks_created": len(chunk_data)})
+
+    embed_results = await vectorize_chromadb(chunk_data, request.config, embedding_model, request.session_id)
+
+    return build_embed_response(request, chunk_data, embed_results, verbose)
+
+
+async def process_embedding_job(request: DataRequest, verbose: bool):
+    """Background worker for asynchronous /embed requests"""
+
+    doc_id = request.doc_id
+    start_time = time.time()
+
+    async def report_progress(progress: Dict[str, Any]):
+        await run_in_threadpool(
+            save_job, doc_id=doc_id, job_data=progress, status="processing", job_type=EMBEDDING_JOB_TYPE
+        )
+
     try:
-        # Extracted data has to be chunked up first before being embedded and stored into ChromaDB
-        chunk_data = await data_chunking(request, semantic_chunker)
+        result = await run_embedding(request, verbose=verbose, on_progress=report_progress)
+        await run_in_threadpool(
+            save_job, doc_id=doc_id, job_data=result, status="completed", job_type=EMBEDDING_JOB_TYPE
+        )
+        logger.info(f"Time to embed document {doc_id}: {time.time() - start_time}")
 
-        if not chunk_data:
-            raise HTTPException(status_code=400, detail="No chunks were created from the input text") 
-        
-        embed_results = await vectorize_chromadb(chunk_data, request.config, embedding_model)
-        
-        return {
-                "status": "success",
-                "doc_id": request.doc_id,
-                "chunks_created": len(chunk_data),
-                "embedding_results": embed_results,
-                "chunk_details": [
-                    {
-                        "chunk_id": chunk["chunk_id"],
-                        "chunk_index": chunk["chunk_index"],
-                        "content": chunk["content"],
-                        "content_length": len(chunk["content"]),
-                        "start_char": chunk["start_char"],
-                        "end_char": chunk["end_char"]
-                    }
-                    for chunk in chunk_data
-                ]
-            }
+    except Exception as e:
+        logger.exception(f"Embedding job failed for doc_id: {doc_id} - {e}")
+        error_job = {
+            "doc_id": doc_id,
+            "status": "error",
+            "message": e.detail if isinstance(e, HTTPException) else "PDF embedder service failed"
+        }
+        await run_in_threadpool(
+            save_job, doc_id=doc_id, job_data=error_job, status="failed", job_type=EMBEDDING_JOB_TYPE
+        )
+
+
+@router.post("/embed")
+async def pdf_embedder_service(
+    request: DataRequest,
+    response: Response,
+    background_tasks: BackgroundTasks,
+    async_mode: bool = False,
+    verbose: bool = True,
+):
+    """Chunk up and embed data from PDF document into ChromaDB.
+
+    With `async_mode=true` the work runs in the background and a 202 is returned
+    immediately; poll `/status/{doc_id}` for progress. `verbose=false` drops
+    the per-chunk payload from the result.
+    """
+
+    if async_mode:
+        await run_in_threadpool(
+            save_job, doc_id=request.doc_id, job_data={}, status="processing", job_type=EMBEDDING_JOB_TYPE
+        )
+        background_tasks.add_task(process_embedding_job, request, verbose)
+        response.status_code = 202
+        return EmbedJobResponse(doc_id=request.doc_id, status="processing")
+
+    try:
+        result = await run_embedding(request, verbose=verbose)
+        # A job record left by an earlier asynchronous attempt would otherwise outlive this result in /status
+        await run_in_threadpool(delete_jobs, [request.doc_id], EMBEDDING_JOB_TYPE)
+        return result
+    except HTTPException:
+        raise
     except Exception as e:
         logger.error(f"PDF embedder service failed: {e}")
         raise HTTPException(status_code=500, detail="PDF embedder service failed")
-    
 
-@router.get("/status/{doc_id}")
-async def verify_document_embedding(doc_id: str, collection_name: str = "my_documents"):
-    """Verify if a document's data chunks have been successfully embedded into ChromaDB"""
-    
+
+async def read_batch_requests(http_request: Request) -> List[Tuple[int, Union[DataRequest, str]]]:
+    """(index, DataRequest) pairs from a JSON array or NDJSON body.
+
+    Entries that fail validation are returned as an error message instead, so one
+    bad document does not reject the whole batch. The whole body is read here,
+    before the response starts: once a StreamingResponse runs, Starlette listens
+    for a client disconnect on the same receive channel and would consume the
+    rest of the body.
+    """
+
+    def parse(index: int, raw) -> Tuple[int, Union[DataRequest, str]]:
+        try:
+            if isinstance(raw, (str, bytes)):
+                return index, DataRequest.model_validate_json(raw)
+            return index, DataRequest.model_validate(raw)
+        except ValidationError as e:
+            return index, "Invalid document: " + "; ".join(error["msg"] for error in e.errors())
+
+    content_type = http_request.headers.get("content-type", "")
+
+    if "ndjson" in content_type or "jsonl" in content_type:
+        body = await http_request.body()
+        lines = [line for line in body.split(b"\n") if line.strip()]
+        return [parse(index, line) for index, line in enumerate(lines)]
+
     try:
-        if chroma_client is None:
-            raise HTTPException(status_code=500, detail="ChromaDB client not initialized")
-        
-        collection = chroma_client.get_or_create_collection(name=collection_name)
-        
-        # Query by doc_id in metadata
-        results = collection.get(
-            where={"doc_id": doc_id},
-            include=["documents", "metadatas", "embeddings"]
+        body = await http_request.json()
+    except json.JSONDecodeError:
+        raise HTTPException(status_code=400, detail="Request body must be a JSON array or NDJSON")
+    if isinstance(body, dict):
+        body = body.get("documents")
+    if not isinstance(body, list):
+        raise HTTPException(status_code=400, detail="Request body must be a JSON array or NDJSON")
+
+    return [parse(index, raw) for index, raw in enumerate(body)]
+
+
+async def embed_window(window: List[Tuple[int, DataRequest]]) -> List[Dict[str, Any]]:
+    """Chunk a window of documents concurrently, then embed and store all their chunks together"""
+
+    chunk_results = await asyncio.gather(
+        *(data_chunking(request, get_chunking_model(request.config)) for _, request in window),
+        return_exceptions=True
+    )
+
+    results: Dict[int, Dict[str, Any]] = {}
+    # Chunks of documents sharing a collection and model are encoded and inserted as one batch
+    groups: Dict[Tuple[str, str], List[Tuple[int, DataRequest, List[Dict[str, Any]]]]] = {}
+
+    for (index, request), chunk_data in zip(window, chunk_results):
+        if isinstance(chunk_data, Exception):
+            detail = chunk_data.detail if isinstance(chunk_data, HTTPException) else "Data chunking failed."
+            results[index] = {"index": index, "doc_id": request.doc_id, "status": "failed", "error": detail}
+        elif not chunk_data:
+            results[index] = {
+                "index": index,
+                "doc_id": request.doc_id,
+                "status": "failed",
+                "error": "No chunks were created from the input text"
+            }
+        else:
+            key = (
+                collection_name_for(request.config.collection_name, request.session_id),
+                request.config.embedding_model
+            )
+            groups.setdefault(key, []).append((index, request, chunk_data))
+
+    for (collection_name, model_name), members in groups.items():
+        # A document listed twice in one window is stored once, from its last entry
+        latest = {request.doc_id: index for index, request, _ in members}
+        superseded = [(index, request) for index, request, _ in members if latest[request.doc_id] != index]
+        members = [member for member in members if latest[member[1].doc_id] == member[0]]
+        for index, request in superseded:
+            results[index] = {
+                "index": index,
+                "doc_id": request.doc_id,
+                "status": "skipped",
+                "error": "Superseded by a later entry for the same doc_id"
+            }
+
+        all_chunks = [chunk for _, _, chunk_data in members for chunk in chunk_data]
+        try:
+            collection = await run_in_threadpool(
+                get_or_create_collection,
+                collection_name,
+                get_embedding_model(model_name),
+                members[0][1].config.embedding_precision
+            )
+            diff = await store_chunks(collection, collection_name, model_name, all_chunks)
+        except (UnsupportedPrecisionError, VectorStoreFullError) as e:
+            for index, request, _ in members:
+                results[index] = {"index": index, "doc_id": request.doc_id, "status": "failed", "error": str(e)}
+            continue
+        except Exception as e:
+            logger.error(f"Batch embedding failed for collection '{collection_name}': {e}")
+            for index, request, _ in members:
+                results[index] = {"index": index, "doc_id": request.doc_id, "status": "failed", "error": "Embedding failed"}
+            continue
+
+        logger.info(
+            f"Stored {len(all_chunks)} chunks from {len(members)} documents in '{collection_name}': "
+            f"{len(diff.new)} embedded, {len(diff.stale_ids)} deleted"
         )
-        
-        if not results['ids']:
+        for index, request, chunk_data in members:
+            results[index] = {
+                "index": index,
+                "doc_id": request.doc_id,
+                "status": "success",
+                "chunks_created": len(chunk_data),
+                "embedding_results": diff.summary(collection_name, request.doc_id)
+            }
+
+    return [results[index] for index, _ in window]
+
+
+@router.post("/embed/batch")
+async def pdf_embedder_batch_service(http_request: Request):
+    """Chunk and embed many documents through a shared pipeline.
+
+    Accepts a JSON array of `DataRequest` objects or NDJSON (one per line) and
+    streams one NDJSON result line per document as soon as its window is done,
+    followed by a summary line.
+    """
+
+    requests = await read_batch_requests(http_request)
+
+    async def stream_results():
+        succeeded = failed = skipped = 0
+        window: List[Tuple[int, DataRequest]] = []
+
+        async def flush():
+            nonlocal succeeded, failed, skipped
+            lines = []
+            results = await embed_window(window)
+            stored = [result["doc_id"] for result in results if result["status"] == "success"]
+            if stored:
+                await run_in_threadpool(delete_jobs, stored, EMBEDDING_JOB_TYPE)
+            for result in results:
+                if result["status"] == "success":
+                    succeeded += 1
+                elif result["status"] == "skipped":
+                    skipped += 1
+                else:
+                    failed += 1
+                lines.append(json.dumps(result) + "\n")
+            window.clear()
+            return lines
+
+        for index, request in requests:
+            if isinstance(request, str):
+                failed += 1
+                yield json.dumps({"index": index, "doc_id": None, "status": "failed", "error": request}) + "\n"
+                continue
+            window.append((index, request))
+            if len(window) >= EMBED_BATCH_WINDOW:
+                for line in await flush():
+                    yield line
+
+        if window:
+            for line in await flush():
+                yield line
+
+        yield json.dumps({
+            "status": "done",
+            "documents": succeeded + failed + skipped,
+            "succeeded": succeeded,
+            "failed": failed,
+            "skipped": skipped
+        }) + "\n"
+
+    return StreamingResponse(stream_results(), media_type="application/x-ndjson")
+
+
+def get_document_manifest(doc_id: str, collection_name: str) -> Optional[DocumentManifest]:
+    """Manifest of a document, read by id from the manifests shared through the vector store"""
+
+    return manifest_store.get(collection_name, doc_id)
+
+
+@router.get("/status/{doc_id}")
+async def verify_document_embedding(
+    doc_id: str, collection_name: str = "my_documents", session_id: Optional[str] = None
+):
+    """Verify if a document's data chunks have been successfully embedded into ChromaDB,
+    or report the progress of an asynchronous embedding job that is still running"""
+
+    job = await run_in_threadpool(load_job, doc_id=doc_id, job_type=EMBEDDING_JOB_TYPE)
+    if job and job.get("status") in ("processing", "failed"):
+        job_data = job.get("data") or {}
+        return {
+            "doc_id": doc_id,
+            "status": job["status"],
+            "stage": job_data.get("stage"),
+            "chunks_created": job_data.get("chunks_created"),
+            "message": job_data.get("message")
+        }
+
+    try:
+        collection_name = collection_name_for(collection_name, session_id)
+        manifest = await run_in_threadpool(get_document_manifest, doc_id, collection_name)
+
+        if manifest is None:
             return {
                 "doc_id": doc_id,
                 "status": "not_found",
                 "chunks_found": 0,
                 "message": f"No chunks found for document {doc_id}"
             }
-        
+
         return {
             "doc_id": doc_id,
             "status": "found",
-            "chunks_found": len(results['ids']),
-            "chunk_ids": results['ids'],
-            "chunks_have_embeddings": len(results.get('embeddings', [])) > 0,
-            "sample_content": results['documents']if results['documents'] else None
+            "chunks_found": manifest.chunk_count,
+            "chunks_have_embeddings": manifest.chunk_count > 0,
+            "collection_name": manifest.collection_name,
+            "embedding_model": manifest.embedding_model,
+            "content_hash": manifest.content_hash,
+            "created_at": manifest.created_at,
+            "updated_at": manifest.updated_at
         }
-        
+
     except Exception as e:
         logger.error(f"Document verification failed: {e}")
         raise HTTPException(status_code=500, detail="Document verification failed")
+
+
+@router.get("/status/{doc_id}/chunks")
+async def list_document_chunks(
+    doc_id: str,
+    collection_name: str = "my_documents",
+    session_id: Optional[str] = None,
+    offset: int = Query(default=0, ge=0),
+    limit: int = Query(default=50, ge=1, le=500),
+    include_embeddings: bool = False,
+):
+    """Page through a document's stored chunks; embeddings are only returned when requested"""
+
+    collection_name = collection_name_for(collection_name, session_id)
+    manifest = await run_in_threadpool(get_document_manifest, doc_id, collection_name)
+    if manifest is None:
+        raise HTTPException(status_code=404, detail=f"No chunks found for document {doc_id}")
+
+    page_ids = manifest.chunk_ids[offset:offset + limit]
+    chunks = []
+
+    if page_ids:
+        include = ["documents", "metadatas"] + (["embeddings"] if include_embeddings else [])
+        try:
+            collection = await run_in_threadpool(
+                get_collection, collection_name, get_embedding_model(EMBEDDING_MODEL_NAME)
+            )
+            results = await run_in_threadpool(collection.get, ids=page_ids, include=include)
+        except Exception as e:
+            logger.error(f"Chunk listing failed: {e}")
+            raise HTTPException(status_code=500, detail="Chunk listing failed")
+
+        records = {chunk_id: i for i, chunk_id in enumerate(results["ids"])}
+        for chunk_id in page_ids:
+            if chunk_id not in records:
+                continue
+            i = records[chunk_id]
+            chunk = {
+                "chunk_id": chunk_id,
+                "content": results["documents"][i],
+                "metadata": results["metadatas"][i]
+            }
+            if include_embeddings:
+                chunk["embedding"] = [float(value) for value in results["embeddings"][i]]
+            chunks.append(chunk)
+
+    return {
+        "doc_id": doc_id,
+        "total": manifest.chunk_count,
+        "offset": offset,
+        "limit": limit,
+        "chunks": chunks
+    }
+
+
+@router.get("/cache/stats")
+async def embedding_cache_stats():
+    """Hit and miss counters of the sentence and chunk embedding cache"""
+
+    return embedding_cache.stats()
@@ -0,0 +1,247 @@
+# For semantic search over embedded chunks
+
+from fastapi import APIRouter, HTTPException
+from fastapi.concurrency import run_in_threadpool
+from typing import Any, Dict, List, Optional, Tuple
+import asyncio
+import logging
+import os
+import numpy as np
+from chromadb.errors import NotFoundError
+from models.search import SearchRequest, SearchHit, QueryResults, SearchResponse
+from models.helper import get_embedding_model, embed_texts
+from utils.lexical_index import BM25Index, lexical_indexes
+from utils.vector_store import collection_name_for, get_collection
+from utils.query_cache import query_cache
+
+router = APIRouter()
+logger = logging.getLogger(__name__)
+
+# Candidates taken from each ranking before hybrid fusion, and from BM25 for the prefilter
+HYBRID_CANDIDATES = int(os.getenv("HYBRID_CANDIDATES", "50"))
+PREFILTER_CANDIDATES = int(os.getenv("LEXICAL_PREFILTER_CANDIDATES", "200"))
+RRF_K = 60
+
+
+def build_where(doc_ids: Optional[List[str]], session_id: Optional[str]) -> Optional[Dict[str, Any]]:
+    """Chroma metadata filter restricting a search to documents and/or a session"""
+
+    clauses = []
+    if doc_ids:
+        clauses.append({"doc_id": {"$in": doc_ids}})
+    if session_id:
+        clauses.append({"session_id": session_id})
+
+    if not clauses:
+        return None
+    if len(clauses) == 1:
+        return clauses[0]
+    return {"$and": clauses}
+
+
+def make_hit(
+    chunk_id: str, content: str, metadata: Optional[Dict], distance: Optional[float] = None, score: Optional[float] = None
+) -> SearchHit:
+    metadata = metadata or {}
+    return SearchHit(
+        chunk_id=chunk_id,
+        doc_id=metadata.get("doc_id"),
+        content=content,
+        distance=None if distance is None else float(distance),
+        score=None if score is None else float(score),
+        chunk_index=metadata.get("chunk_index"),
+        start_char=metadata.get("start_char"),
+        end_char=metadata.get("end_char"),
+        page_number=metadata.get("page_number"),
+        last_page_number=metadata.get("last_page_number")
+    )
+
+
+def dense_search(collection, embeddings, n_results: int, where: Optional[Dict]) -> List[List[SearchHit]]:
+    """Nearest chunks for each query embedding, in one collection query"""
+
+    results = collection.query(
+        query_embeddings=embeddings,
+        n_results=n_results,
+        where=where,
+        include=["documents", "metadatas", "distances"]
+    )
+    return [
+        [
+            make_hit(chunk_id, content, metadata, distance=distance)
+            for chunk_id, content, metadata, distance in zip(
+                results["ids"][j], results["documents"][j], results["metadatas"][j], results["distances"][j]
+            )
+        ]
+        for j in range(len(results["ids"]))
+    ]
+
+
+def lexical_search(
+    index: BM25Index, queries: List[str], n_results: int, where: Optional[Dict]
+) -> List[List[Tuple[str, float]]]:
+    return [index.search(query, n_results, where) for query in queries]
+
+
+def fetch_hits(collection, ranked: List[Tuple[str, float]], known: Dict[str, SearchHit]) -> List[SearchHit]:
+    """Hits for ranked (chunk_id, score) pairs, loading only chunks not already in `known`"""
+
+    missing = [chunk_id for chunk_id, _ in ranked if chunk_id not in known]
+    records = {}
+    if missing:
+        results = collection.get(ids=missing, include=["documents", "metadatas"])
+        records = {
+            chunk_id: (content, metadata)
+            for chunk_id, content, metadata in zip(results["ids"], results["documents"], results["metadatas"])
+        }
+
+    hits = []
+    for chunk_id, score in ranked:
+        if chunk_id in known:
+            hits.append(known[chunk_id].model_copy(update={"score": score}))
+        elif chunk_id in records:
+            content, metadata = records[chunk_id]
+            hits.append(make_hit(chunk_id, content, metadata, score=score))
+    return hits
+
+
+def reciprocal_rank_fusion(rankings: List[List[str]], k: int) -> List[Tuple[str, float]]:
+    """Fuse rankings by summing 1 / (RRF_K + rank) for each chunk"""
+
+    scores: Dict[str, float] = {}
+    for ranking in rankings:
+        for rank, chunk_id in enumerate(ranking, start=1):
+            scores[chunk_id] = scores.get(chunk_id, 0.0) + 1.0 / (RRF_K + rank)
+    return sorted(scores.items(), key=lambda item: item[1], reverse=True)[:k]
+
+
+def prefilter_search(collection, index: BM25Index, query: str, embedding: np.ndarray, k: int, where: Optional[Dict]):
+    """Rank only the BM25 candidates of a query by embedding distance; None when BM25 finds nothing"""
+
+    candidates = index.search(query, PREFILTER_CANDIDATES, where)
+    if not candidates:
+        return None
+
+    records = collection.get(
+        ids=[chunk_id for chunk_id, _ in candidates],
+        include=["embeddings", "documents", "metadatas"]
+    )
+    if not records["ids"]:
+        return None
+    offsets = np.asarray(records["embeddings"], dtype=np.float32) - embedding
+    distances = np.einsum("ij,ij->i", offsets, offsets)
+    order = np.argsort(distances, kind="stable")[:k]
+    return [
+        make_hit(records["ids"][i], records["documents"][i], records["metadatas"][i], distance=distances[i])
+        for i in order
+    ]
+
+
+async def run_search(collection, request: SearchRequest, queries: List[str], where: Optional[Dict]) -> List[List[SearchHit]]:
+    """Search a collection for each query with the requested mode"""
+
+    k = request.k
+
+    async def embed():
+        # One-off query vectors stay out of the bounded disk cache, which is kept for chunk text
+        return await run_in_threadpool(embed_texts, request.embedding_model, queries, persist=False)
+
+    async def lexical_index():
+        return await run_in_threadpool(lexical_indexes.get, collection)
+
+    if request.mode == "dense":
+        return await run_in_threadpool(dense_search, collection, await embed(), k, where)
+
+    if request.mode == "lexical":
+        ranked = await run_in_threadpool(lexical_search, await lexical_index(), queries, k, where)
+        return [await run_in_threadpool(fetch_hits, collection, query_ranked, {}) for query_ranked in ranked]
+
+    if request.mode == "hybrid":
+        async def dense():
+            return await run_in_threadpool(dense_search, collection, await embed(), HYBRID_CANDIDATES, where)
+
+        async def lexical():
+            return await run_in_threadpool(lexical_search, await lexical_index(), queries, HYBRID_CANDIDATES, where)
+
+        # Both rankings are computed concurrently, then fused by reciprocal rank
+        dense_hits, lexical_ranked = await asyncio.gather(dense(), lexical())
+        results = []
+        for query_dense, query_lexical in zip(dense_hits, lexical_ranked):
+            fused = reciprocal_rank_fusion(
+                [[hit.chunk_id for hit in query_dense], [chunk_id for chunk_id, _ in query_lexical]], k
+            )
+            known = {hit.chunk_id: hit for hit in query_dense}
+            results.append(await run_in_threadpool(fetch_hits, collection, fused, known))
+        return results
+
+    # prefilter: BM25 narrows the candidates, then only those are scored by embedding distance
+    embeddings, index = await asyncio.gather(embed(), lexical_index())
+    results = []
+    fallback = []
+    for i, query in enumerate(queries):
+        hits = await run_in_threadpool(prefilter_search, collection, index, query, embeddings[i], k, where)
+        if hits is None:
+            fallback.append(i)
+        results.append(hits)
+    if fallback:
+        # Queries without any lexical match fall back to a full dense search
+        dense_hits = await run_in_threadpool(dense_search, collection, embeddings[fallback], k, where)
+        for i, hits in zip(fallback, dense_hits):
+            results[i] = hits
+    return results
+
+
+@router.post("/search", response_model=SearchResponse)
+async def search_chunks(request: SearchRequest):
+    """Return the top-k chunks for one or more queries, optionally scoped to documents or a session.
+
+    `mode` picks dense (embedding), lexical (BM25), hybrid (both, fused by
+    reciprocal rank) or prefilter (BM25 candidates re-ranked by embedding)
+    retrieval. Repeated queries are answered from a short-lived result cache
+    that is invalidated whenever the collection changes.
+    """
+
+    queries = request.all_queries()
+    collection_name = collection_name_for(request.collection_name, request.session_id)
+    where = build_where(request.doc_ids, request.session_id)
+
+    keys = [
+        query_cache.key(collection_name, request.embedding_model, query, where, request.k, request.mode)
+        for query in queries
+    ]
+    hits: List[Optional[List[SearchHit]]] = [query_cache.get(key) for key in keys]
+    missing = [i for i, cached in enumerate(hits) if cached is None]
+
+    if missing:
+        try:
+            # A network round trip on the http backend
+            collection = await run_in_threadpool(
+                get_collection, collection_name, get_embedding_model(request.embedding_model)
+            )
+        except NotFoundError:
+            raise HTTPException(status_code=404, detail=f"Collection '{collection_name}' not found")
+
+        # Identical queries in one request are only searched once
+        unique = list(dict.fromkeys(queries[i] for i in missing))
+        try:
+            results = await run_search(collection, request, unique, where)
+        except Exception as e:
+            logger.error(f"Search failed: {e}")
+            raise HTTPException(status_code=500, detail="Search failed")
+
+        by_query = dict(zip(unique, results))
+        for i in missing:
+            hits[i] = by_query[queries[i]]
+            query_cache.put(keys[i], hits[i])
+
+    return SearchResponse(
+        collection_name=collection_name,
+        results=[QueryResults(query=query, hits=query_hits) for query, query_hits in zip(queries, hits)]
+    )
+
+
+@router.get("/search/cache/stats")
+async def search_cache_stats():
+    """Hit and miss counters of the search result cache"""
+
+    return query_cache.stats()
@@ -0,0 +1,55 @@
+import numpy as np
+import pytest
+
+from routers.embed import apply_chunk_diff, diff_chunks
+from utils import vector_store
+from utils.manifest import manifest_store
+
+
+@pytest.fixture
+def collection(monkeypatch):
+    monkeypatch.setattr(vector_store, "_client", vector_store.create_client("memory"))
+    yield vector_store.get_or_create_collection("docs", None)
+    for stored in vector_store.get_client().list_collections():
+        vector_store.get_client().delete_collection(stored.name)
+
+
+def chunk(chunk_id, content_hash="v1", **metadata):
+    return {
+        "chunk_id": chunk_id,
+        "content": f"text of {chunk_id}",
+        "metadata": {"doc_id": "doc-1", "content_hash": content_hash, **metadata},
+    }
+
+
+def store(collection, chunks):
+    diff = diff_chunks(collection, chunks)
+    apply_chunk_diff(collection, diff, np.ones((len(diff.new), 4), dtype=np.float32))
+    manifest_store.record_chunks(collection.name, "model", [c for c in chunks if c["metadata"]["doc_id"] in diff.changed_docs])
+    return diff
+
+
+def test_unchanged_retry_needs_no_writes(collection):
+    store(collection, [chunk("a"), chunk("b")])
+
+    diff = diff_chunks(collection, [chunk("a"), chunk("b")])
+    assert [c["chunk_id"] for c in diff.unchanged] == ["a", "b"]
+    assert (diff.new, diff.kept, diff.stale_ids) == ([], [], [])
+
+
+def test_chunks_missing_from_a_lost_manifest_are_still_deleted(collection):
+    store(collection, [chunk("a"), chunk("b")])
+    manifest_store.remove(collection.name, ["doc-1"])
+
+    diff = store(collection, [chunk("b", "v2"), chunk("c", "v2")])
+    assert [c["chunk_id"] for c in diff.kept] == ["b"]
+    assert [c["chunk_id"] for c in diff.new] == ["c"]
+    assert diff.stale_ids == ["a"]
+    assert sorted(collection.get()["ids"]) == ["b", "c"]
+
+
+def test_kept_chunks_lose_fields_they_no_longer_have(collection):
+    store(collection, [chunk("a", page_number=3, last_page_number=4)])
+
+    store(collection, [chunk("a", "v2", chunk_index=0)])
+    assert collection.get(ids=["a"])["metadatas"] == [{"doc_id": "doc-1", "content_hash": "v2", "chunk_index": 0}]
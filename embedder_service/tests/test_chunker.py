@@ -0,0 +1,60 @@
+import numpy as np
+
+from utils.chunker import SemanticChunkerEngine, breakpoint_indices
+
+TOPICS = {"cat": [1.0, 0.0], "stock": [0.0, 1.0]}
+
+
+def embed_by_topic(windows):
+    """Fake embedder: a window's vector is the sum of the topics it mentions"""
+    return np.array([
+        np.sum([vector for word, vector in TOPICS.items() if word in window] or [[0.0, 0.0]], axis=0)
+        for window in windows
+    ], dtype=np.float32)
+
+
+def make_chunker(**options):
+    options = {"min_chunk_size": 1, "max_chunk_size": 10_000, "buffer_size": 0, **options}
+    return SemanticChunkerEngine(embed_by_topic, **options)
+
+
+def test_chunks_break_where_the_topic_changes():
+    text = " ".join(["The cat sleeps."] * 4 + ["The stock falls."] * 4)
+    chunker = make_chunker(breakpoint_threshold_type="standard_deviation", breakpoint_threshold_amount=2)
+
+    assert chunker.split_text(text) == [" ".join(["The cat sleeps."] * 4), " ".join(["The stock falls."] * 4)]
+
+
+def test_chunks_stay_within_the_size_bounds():
+    rng = np.random.default_rng(0)
+    text = " ".join(rng.choice(["The cat sleeps.", "The stock falls."], size=200))
+    chunker = make_chunker(min_chunk_size=60, max_chunk_size=200)
+
+    spans = chunker.chunk_spans(text)
+    assert all(end - start <= 200 for start, end in spans)
+    assert all(end - start >= 60 for start, end in spans[:-1])
+    # Spans are ordered, disjoint and only leave out the whitespace between sentences
+    gaps = [text[end:next_start] for (_, end), (next_start, _) in zip(spans, spans[1:])]
+    assert all(not gap.strip() for gap in gaps)
+    assert spans[0][0] == 0 and spans[-1][1] == len(text)
+
+
+def test_a_sentence_longer_than_the_maximum_is_cut_into_overlapping_windows():
+    text = "x" * 1000
+    chunker = make_chunker(max_chunk_size=300, chunk_size=200, overlap=50)
+
+    spans = chunker.chunk_spans(text)
+    assert spans[0] == (0, 200)
+    assert all(next_start == start + 150 for (start, _), (next_start, _) in zip(spans, spans[1:]))
+    assert all(end - start <= 200 for start, end in spans)
+    assert spans[-1][1] == 1000
+
+
+def test_breakpoint_threshold_modes():
+    distances = np.array([0.0, 0.0, 0.0, 1.0, 0.0, 0.0, 0.0])
+
+    assert breakpoint_indices(distances, "standard_deviation", 2).tolist() == [3]
+    assert breakpoint_indices(distances, "standard_deviation", None).tolist() == []
+    # The gradient mode thresholds the slope of the distances, which rises just before the jump
+    assert breakpoint_indices(distances, "gradient", None).tolist() == [2]
+    assert breakpoint_indices(distances[:1], "gradient", None).tolist() == []
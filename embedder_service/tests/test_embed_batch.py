@@ -0,0 +1,90 @@
+import json
+import threading
+import time
+
+import httpx
+import pytest
+import uvicorn
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from routers import embed
+
+
+@pytest.fixture
+def app(monkeypatch):
+    async def fake_embed_window(window):
+        return [
+            {"index": index, "doc_id": request.doc_id, "status": "success", "chunks_created": 1}
+            for index, request in window
+        ]
+
+    monkeypatch.setattr(embed, "embed_window", fake_embed_window)
+    monkeypatch.setattr(embed, "delete_jobs", lambda doc_ids, job_type: True)
+    app = FastAPI()
+    app.include_router(embed.router)
+    return app
+
+
+@pytest.fixture
+def client(app):
+    with TestClient(app) as client:
+        yield client
+
+
+@pytest.fixture
+def server_url(app):
+    """The app served by uvicorn, whose ASGI receive channel is what a streaming response competes for"""
+    server = uvicorn.Server(uvicorn.Config(app, host="127.0.0.1", port=0, log_level="warning"))
+    thread = threading.Thread(target=server.run, daemon=True)
+    thread.start()
+    while not server.started:
+        time.sleep(0.01)
+    port = server.servers[0].sockets[0].getsockname()[1]
+    yield f"http://127.0.0.1:{port}"
+    server.should_exit = True
+    thread.join()
+
+
+def ndjson_lines(count):
+    for i in range(count):
+        yield (json.dumps({"doc_id": f"doc-{i}", "text": f"Document {i}.", "pages_info": [], "config": {}}) + "\n").encode()
+
+
+def test_large_chunked_ndjson_body_is_read_completely(server_url):
+    # A generator body is sent with chunked transfer encoding, one chunk per line
+    response = httpx.post(
+        f"{server_url}/embed/batch",
+        content=ndjson_lines(2000),
+        headers={"content-type": "application/x-ndjson"},
+        timeout=60
+    )
+
+    assert response.status_code == 200
+    lines = [json.loads(line) for line in response.text.splitlines()]
+    assert [line["doc_id"] for line in lines[:-1]] == [f"doc-{i}" for i in range(2000)]
+    assert lines[-1] == {"status": "done", "documents": 2000, "succeeded": 2000, "failed": 0, "skipped": 0}
+
+
+def test_invalid_lines_are_reported_without_rejecting_the_batch(client):
+    body = b'{"doc_id": "ok", "text": "Fine.", "pages_info": [], "config": {}}\n{"text": "no id"}\n\n'
+    response = client.post("/embed/batch", content=body, headers={"content-type": "application/x-ndjson"})
+
+    lines = [json.loads(line) for line in response.text.splitlines()]
+    assert lines[0]["status"] == "failed" and lines[0]["index"] == 1
+    assert lines[1]["doc_id"] == "ok"
+    assert lines[-1]["documents"] == 2
+
+
+def test_json_array_body(client):
+    documents = [
+        {"doc_id": "a", "text": "A.", "pages_info": [], "config": {}},
+        {"doc_id": "b", "text": "B.", "pages_info": [], "config": {}},
+    ]
+    response = client.post("/embed/batch", json=documents)
+
+    assert json.loads(response.text.splitlines()[-1])["succeeded"] == 2
+
+
+def test_body_that_is_not_a_list_is_rejected(client):
+    assert client.post("/embed/batch", json={"doc_id": "a"}).status_code == 400
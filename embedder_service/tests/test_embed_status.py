@@ -0,0 +1,75 @@
+import time
+
+import pytest
+from fastapi import FastAPI, HTTPException
+from fastapi.testclient import TestClient
+
+from models.embed import DocumentManifest
+from routers import embed
+
+
+@pytest.fixture
+def state(monkeypatch):
+    """Job records and stored documents, in place of S3 and ChromaDB"""
+    state = {"jobs": {}, "manifests": {}, "fail": False}
+
+    def save_job(doc_id, job_data, status, job_type):
+        state["jobs"][(job_type, doc_id)] = {"doc_id": doc_id, "status": status, "type": job_type, "data": job_data}
+        return True
+
+    def delete_jobs(doc_ids, job_type):
+        for doc_id in doc_ids:
+            state["jobs"].pop((job_type, doc_id), None)
+        return True
+
+    async def run_embedding(request, verbose=True, on_progress=None):
+        if state["fail"]:
+            raise HTTPException(status_code=500, detail="Embedding failed")
+        now = time.time()
+        state["manifests"][request.doc_id] = DocumentManifest(
+            doc_id=request.doc_id, collection_name="my_documents", chunk_ids=["c0"], chunk_count=1,
+            created_at=now, updated_at=now
+        )
+        return {"doc_id": request.doc_id, "status": "success"}
+
+    monkeypatch.setattr(embed, "save_job", save_job)
+    monkeypatch.setattr(embed, "load_job", lambda doc_id, job_type: state["jobs"].get((job_type, doc_id)))
+    monkeypatch.setattr(embed, "delete_jobs", delete_jobs)
+    monkeypatch.setattr(embed, "run_embedding", run_embedding)
+    monkeypatch.setattr(embed, "get_document_manifest", lambda doc_id, collection_name: state["manifests"].get(doc_id))
+    return state
+
+
+@pytest.fixture
+def client(state):
+    app = FastAPI()
+    app.include_router(embed.router)
+    with TestClient(app) as client:
+        yield client
+
+
+DOCUMENT = {"doc_id": "doc-1", "text": "Some text.", "pages_info": [], "config": {}}
+
+
+def test_failed_async_job_is_reported(client, state):
+    state["fail"] = True
+    assert client.post("/embed", params={"async_mode": True}, json=DOCUMENT).status_code == 202
+
+    status = client.get("/status/doc-1").json()
+    assert status["status"] == "failed"
+    assert status["message"] == "Embedding failed"
+
+
+def test_sync_embed_after_failed_async_job_reports_the_stored_chunks(client, state):
+    state["fail"] = True
+    client.post("/embed", params={"async_mode": True}, json=DOCUMENT)
+    state["fail"] = False
+
+    assert client.post("/embed", json=DOCUMENT).status_code == 200
+    status = client.get("/status/doc-1").json()
+    assert status["status"] == "found"
+    assert status["chunks_found"] == 1
+
+
+def test_unknown_document_is_not_found(client):
+    assert client.get("/status/missing").json()["status"] == "not_found"
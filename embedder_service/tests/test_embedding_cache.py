@@ -0,0 +1,42 @@
+import numpy as np
+
+from utils.embedding_cache import EmbeddingCache
+
+
+def make_cache(cache_dir, flush_seconds=3600):
+    return EmbeddingCache(
+        max_entries=100, cache_dir=str(cache_dir), dtype="float32", max_disk_entries=100, flush_seconds=flush_seconds
+    )
+
+
+def test_flushed_vectors_survive_a_restart(tmp_path):
+    cache = make_cache(tmp_path)
+    cache.put_many("model", ["first", "second"], np.eye(2, dtype=np.float32))
+    cache.flush()
+
+    restarted = make_cache(tmp_path)
+    vectors = restarted.get_many("model", ["second", "first", "third"])
+    np.testing.assert_array_equal(vectors[0], [0, 1])
+    np.testing.assert_array_equal(vectors[1], [1, 0])
+    assert vectors[2] is None
+    assert restarted.stats()["disk_hits"] == 2
+
+
+def test_writes_are_flushed_once_the_interval_has_passed(tmp_path):
+    cache = make_cache(tmp_path)
+    cache.put_many("model", ["first"], np.ones((1, 2), dtype=np.float32))
+    # Keys are written with the flush, so an unflushed row is not reloaded
+    assert make_cache(tmp_path).get_many("model", ["first"]) == [None]
+
+    eager = make_cache(tmp_path, flush_seconds=0)
+    eager.put_many("model", ["second"], np.ones((1, 2), dtype=np.float32))
+    assert make_cache(tmp_path).get_many("model", ["second"])[0] is not None
+
+
+def test_memory_only_vectors_stay_off_disk(tmp_path):
+    cache = make_cache(tmp_path)
+    cache.put_many("model", ["query"], np.ones((1, 2), dtype=np.float32), disk=False)
+    cache.flush()
+
+    assert cache.get_many("model", ["query"], disk=False)[0] is not None
+    assert make_cache(tmp_path).get_many("model", ["query"]) == [None]
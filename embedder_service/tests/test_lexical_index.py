@@ -0,0 +1,102 @@
+import math
+import unicodedata
+
+import pytest
+
+from utils.lexical_index import BM25Index, LexicalIndexRegistry, tokenize
+
+
+@pytest.mark.parametrize(
+    "text, expected",
+    [
+        ("Q3(b)", ["q3", "b"]),
+        ("PHY-101", ["phy-101", "phy", "101"]),
+        ("8867/01 v1.2", ["8867/01", "8867", "01", "v1.2", "v1", "2"]),
+        ("Café crème", ["café", "crème"]),
+        ("Москва", ["москва"]),
+        ("技术文档", ["技术文档", "技", "术", "文", "档"]),
+    ],
+)
+def test_tokenize(text, expected):
+    assert tokenize(text) == expected
+
+
+def test_decomposed_accents_match_composed():
+    assert tokenize(unicodedata.normalize("NFD", "café")) == ["café"]
+
+
+@pytest.fixture
+def index():
+    index = BM25Index()
+    index.upsert(
+        ["a", "b", "c", "d"],
+        [
+            "Answer question Q3(b) before the deadline",
+            "PHY-101 covers mechanics",
+            "Le café est fermé",
+            "这份技术文档介绍了系统架构",
+        ],
+    )
+    return index
+
+
+@pytest.mark.parametrize(
+    "query, expected",
+    [("Q3(b)", "a"), ("PHY-101", "b"), ("phy", "b"), ("café", "c"), ("技术文档", "d")],
+)
+def test_search_finds_identifiers_and_non_ascii_terms(index, query, expected):
+    assert index.search(query, k=1)[0][0] == expected
+
+
+def test_scores_match_bm25():
+    index = BM25Index(k1=1.5, b=0.75)
+    documents = ["apple banana apple", "banana cherry", "cherry cherry cherry date", "elderberry"]
+    index.upsert(["a", "b", "c", "d"], documents)
+
+    lengths = [len(document.split()) for document in documents]
+    average = sum(lengths) / len(lengths)
+
+    def expected(query_terms, i):
+        score = 0.0
+        for term in query_terms:
+            frequency = documents[i].split().count(term)
+            containing = sum(term in document.split() for document in documents)
+            if frequency:
+                idf = math.log(1 + (len(documents) - containing + 0.5) / (containing + 0.5))
+                score += idf * frequency * 2.5 / (frequency + 1.5 * (0.25 + 0.75 * lengths[i] / average))
+        return score
+
+    results = dict(index.search("banana cherry", k=4))
+    assert set(results) == {"a", "b", "c"}
+    for chunk_id, i in (("a", 0), ("b", 1), ("c", 2)):
+        assert results[chunk_id] == pytest.approx(expected(["banana", "cherry"], i), rel=1e-5)
+
+
+class StoredCollection:
+    """Stand-in for a collection that already holds documents"""
+
+    def __init__(self, name, ids, documents):
+        self.name = name
+        self.ids = ids
+        self.documents = documents
+
+    def get(self, include, limit, offset):
+        ids = self.ids[offset:offset + limit]
+        return {"ids": ids, "documents": self.documents[offset:offset + limit], "metadatas": [None] * len(ids)}
+
+
+def test_first_write_builds_the_index_from_the_collection():
+    registry = LexicalIndexRegistry()
+    collection = StoredCollection("docs", ["a", "b"], ["stored before restart", "also stored"])
+
+    # The write already reached the collection, which the index is built from
+    collection.ids.append("c")
+    collection.documents.append("written now")
+    registry.upsert(collection, ["c"], ["written now"], [None])
+
+    index = registry.get(collection)
+    assert len(index) == 3
+    assert index.search("restart", k=1)[0][0] == "a"
+
+    registry.delete(collection, ["a"])
+    assert index.search("restart", k=1) == []
@@ -0,0 +1,51 @@
+import pytest
+
+from utils import vector_store
+from utils.manifest import ManifestStore
+
+
+@pytest.fixture
+def client(monkeypatch):
+    client = vector_store.create_client("memory")
+    monkeypatch.setattr(vector_store, "_client", client)
+    yield client
+    for collection in client.list_collections():
+        client.delete_collection(collection.name)
+
+
+def chunks(doc_id, chunk_ids, embedded_at, content_hash="hash"):
+    return [
+        {"chunk_id": chunk_id, "metadata": {"doc_id": doc_id, "embedded_at": embedded_at, "content_hash": content_hash}}
+        for chunk_id in chunk_ids
+    ]
+
+
+def test_manifests_are_shared_through_the_vector_store(client):
+    ManifestStore(lambda: client).record_chunks("docs", "model", chunks("doc-1", ["a", "b"], 1.0))
+
+    # Another replica, or this one after a restart, reads the same record
+    manifest = ManifestStore(lambda: client).get("docs", "doc-1")
+    assert manifest.chunk_ids == ["a", "b"]
+    assert manifest.chunk_count == 2
+    assert manifest.embedding_model == "model"
+    assert ManifestStore(lambda: client).get("other", "doc-1") is None
+
+
+def test_rerecording_keeps_the_creation_time(client):
+    store = ManifestStore(lambda: client)
+    store.record_chunks("docs", "model", chunks("doc-1", ["a"], 1.0))
+    store.record_chunks("docs", "model", chunks("doc-1", ["c"], 2.0, content_hash=None))
+
+    manifest = store.get("docs", "doc-1")
+    assert (manifest.chunk_ids, manifest.created_at, manifest.updated_at) == (["c"], 1.0, 2.0)
+    assert manifest.content_hash is None
+
+
+def test_removing_a_collection_removes_only_its_manifests(client):
+    store = ManifestStore(lambda: client)
+    store.record_chunks("docs", "model", chunks("doc-1", ["a"], 1.0))
+    store.record_chunks("other", "model", chunks("doc-1", ["b"], 1.0))
+
+    store.remove_collection("docs")
+    assert store.get("docs", "doc-1") is None
+    assert store.get("other", "doc-1").chunk_ids == ["b"]
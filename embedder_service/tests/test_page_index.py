@@ -0,0 +1,58 @@
+from pdf_extraction_service.utils.page_text import page_text
+from utils.page_index import PageIndex
+
+PAGES_INFO = [
+    {"page_number": 1, "char_start": 0, "char_end": 100, "items": [
+        {"char_start": 0, "char_end": 40, "bbox": {"l": 1}},
+        {"char_start": 42, "char_end": 100, "bbox": {"l": 2}},
+    ]},
+    {"page_number": 2, "char_start": 102, "char_end": 200, "items": [
+        {"char_start": 102, "char_end": 200, "bbox": {"l": 3}},
+    ]},
+]
+
+
+def test_offsets_map_to_their_page():
+    index = PageIndex(PAGES_INFO)
+
+    assert index.page_at(0) == 1
+    assert index.page_at(99) == 1
+    assert index.page_at(101) is None
+    assert index.page_at(150) == 2
+    assert index.page_at(200) is None
+
+
+def test_a_chunk_spanning_a_page_boundary_reports_both_pages():
+    index = PageIndex(PAGES_INFO)
+
+    assert index.pages_between(90, 110) == [1, 2]
+    assert index.pages_between(10, 30) == [1]
+    assert [region["bbox"] for region in index.regions_between(90, 110)] == [{"l": 2}, {"l": 3}]
+    assert [region["page_number"] for region in index.regions_between(30, 50)] == [1, 1]
+
+
+def test_entries_without_a_range_are_ignored():
+    index = PageIndex([{"page_number": 1}, {"char_start": 0, "char_end": 10}])
+
+    assert not index
+    assert index.pages_between(0, 10) == []
+
+
+def test_reads_the_layout_the_extraction_service_produces():
+    texts = [
+        {"text": "Header", "content_layer": "furniture", "prov": [{"page_no": 1, "charspan": [0, 6]}]},
+        {"text": "First page.", "prov": [{"page_no": 1, "bbox": {"l": 1}, "charspan": [0, 11]}]},
+        # A paragraph continuing on the next page has one provenance entry per page
+        {"text": "Runs over. Onto two.", "prov": [
+            {"page_no": 1, "bbox": {"l": 2}, "charspan": [0, 10]},
+            {"page_no": 2, "bbox": {"l": 3}, "charspan": [11, 20]},
+        ]},
+    ]
+    text, pages_info = page_text(texts)
+    index = PageIndex(pages_info)
+
+    assert text == "First page.\n\nRuns over. Onto two."
+    start = text.index("over")
+    assert index.pages_between(start, text.index("two")) == [1, 2]
+    assert index.page_at(text.index("Onto")) == 2
+    assert [region["bbox"] for region in index.regions_between(0, len(text))] == [{"l": 1}, {"l": 2}, {"l": 3}]
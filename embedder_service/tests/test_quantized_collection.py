@@ -0,0 +1,47 @@
+import numpy as np
+import pytest
+
+from utils import quantized_collection
+from utils.quantized_collection import QuantizedCollection
+
+
+@pytest.fixture(autouse=True)
+def small_blocks(monkeypatch):
+    # Several blocks, the last one partial, even for a small index
+    monkeypatch.setattr(quantized_collection, "_SEARCH_BLOCK_ROWS", 64)
+
+
+@pytest.mark.parametrize("precision", ["int8", "float16"])
+@pytest.mark.parametrize("where", [None, {"group": 1}])
+def test_blockwise_search_matches_exact_search(tmp_path, precision, where):
+    rng = np.random.default_rng(0)
+    vectors = rng.normal(size=(1000, 32)).astype(np.float32)
+    collection = QuantizedCollection("test", precision=precision, rescore_dir=str(tmp_path))
+    collection.add(
+        [f"id{i}" for i in range(len(vectors))], vectors, metadatas=[{"group": i % 3} for i in range(len(vectors))]
+    )
+    query = rng.normal(size=32).astype(np.float32)
+
+    result = collection.query([query], n_results=10, where=where)
+
+    rows = np.arange(len(vectors)) if where is None else np.arange(1, len(vectors), 3)
+    expected = rows[np.argsort(((vectors[rows] - query) ** 2).sum(axis=1))[:10]]
+    assert result["ids"][0] == [f"id{i}" for i in expected]
+
+
+def test_delete_without_ids_or_filter_is_rejected():
+    collection = QuantizedCollection("test", precision="int8")
+    collection.add(["a"], np.ones((1, 4), dtype=np.float32))
+
+    with pytest.raises(ValueError):
+        collection.delete()
+    assert collection.count() == 1
+
+
+def test_memory_bytes_counts_spare_capacity_and_the_rescoring_file(tmp_path):
+    collection = QuantizedCollection("test", precision="int8", rescore_dir=str(tmp_path))
+    collection.add(["a"], np.ones((1, 4), dtype=np.float32))
+
+    capacity = quantized_collection._INITIAL_CAPACITY
+    # int8 codes, float32 scale and squared norm per row, plus the float32 rescoring vectors
+    assert collection.memory_bytes() == capacity * (4 + 4 + 4) + capacity * 4 * 4
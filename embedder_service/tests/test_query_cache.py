@@ -0,0 +1,48 @@
+from utils.query_cache import QueryResultCache
+
+
+def make_key(cache, collection_name="docs", query="what is it?"):
+    return cache.key(collection_name, "model", query, {"doc_id": "a"}, 5)
+
+
+def test_results_are_served_until_the_collection_changes():
+    cache = QueryResultCache(max_entries=10, ttl_seconds=60)
+    cache.put(make_key(cache), ["hit"])
+
+    # Queries differing only in whitespace share an entry
+    assert cache.get(make_key(cache, query="  what is  it? ")) == ["hit"]
+
+    cache.invalidate("docs")
+    assert cache.get(make_key(cache)) is None
+
+
+def test_invalidation_is_scoped_to_one_collection():
+    cache = QueryResultCache(max_entries=10, ttl_seconds=60)
+    cache.put(make_key(cache, "docs"), ["docs"])
+    cache.put(make_key(cache, "other"), ["other"])
+
+    cache.invalidate("docs")
+    assert cache.get(make_key(cache, "docs")) is None
+    assert cache.get(make_key(cache, "other")) == ["other"]
+
+
+def test_a_result_computed_across_a_write_is_never_served():
+    cache = QueryResultCache(max_entries=10, ttl_seconds=60)
+    key = make_key(cache)
+    # The collection changes while the query runs
+    cache.invalidate("docs")
+    cache.put(key, ["stale"])
+
+    assert cache.get(make_key(cache)) is None
+
+
+def test_entries_expire_and_are_bounded():
+    expired = QueryResultCache(max_entries=10, ttl_seconds=-1)
+    expired.put(make_key(expired), ["hit"])
+    assert expired.get(make_key(expired)) is None
+
+    bounded = QueryResultCache(max_entries=2, ttl_seconds=60)
+    for query in ("first", "second", "third"):
+        bounded.put(make_key(bounded, query=query), [query])
+    assert bounded.get(make_key(bounded, query="first")) is None
+    assert bounded.stats()["entries"] == 2
@@ -0,0 +1,66 @@
+import numpy as np
+import pytest
+
+from utils import vector_store
+from utils.manifest import MANIFEST_COLLECTION
+
+
+@pytest.fixture
+def store(monkeypatch):
+    monkeypatch.setattr(vector_store, "_client", vector_store.create_client("memory"))
+    yield vector_store
+    # Ephemeral clients share one in-memory system, so nothing may outlive the test
+    for collection in vector_store.get_client().list_collections():
+        vector_store.get_client().delete_collection(collection.name)
+    vector_store._quantized_collections.clear()
+
+
+def add_records(collection, count):
+    collection.add(ids=[f"chunk-{i}" for i in range(count)], embeddings=np.ones((count, 4), dtype=np.float32))
+
+
+def test_collection_cap_refuses_new_collections_without_deleting_any(store, monkeypatch):
+    monkeypatch.setattr(store, "VECTOR_STORE_MAX_COLLECTIONS", 2)
+    for name in ("first", "second"):
+        store.get_or_create_collection(name, None)
+
+    with pytest.raises(store.VectorStoreFullError):
+        store.get_or_create_collection("third", None)
+    with pytest.raises(store.VectorStoreFullError):
+        store.get_or_create_collection("third", None, precision="float16")
+    # Existing collections stay open
+    store.get_or_create_collection("first", None)
+    names = sorted(c.name for c in store.get_client().list_collections() if c.name != MANIFEST_COLLECTION)
+    assert names == ["first", "second"]
+
+
+def test_record_cap_counts_every_stored_record(store, monkeypatch):
+    monkeypatch.setattr(store, "VECTOR_STORE_MAX_RECORDS", 3)
+    collection = store.get_or_create_collection("docs", None)
+    # Records without a manifest, as after a restart, still count
+    add_records(collection, 2)
+
+    store.check_record_cap(collection, 1)
+    store.check_record_cap(collection, -2)
+    with pytest.raises(store.VectorStoreFullError):
+        store.check_record_cap(collection, 2)
+    assert collection.count() == 2
+
+
+def test_caps_do_not_apply_to_a_durable_backend(store, monkeypatch):
+    monkeypatch.setattr(store, "VECTOR_STORE_BACKEND", "persistent")
+    monkeypatch.setattr(store, "VECTOR_STORE_MAX_COLLECTIONS", 1)
+    monkeypatch.setattr(store, "VECTOR_STORE_MAX_RECORDS", 2)
+    first = store.get_or_create_collection("first", None)
+    add_records(first, 2)
+    store.get_or_create_collection("second", None)
+
+    store.check_record_cap(first, 10)
+
+
+def test_reduced_precision_is_refused_on_a_durable_backend(store, monkeypatch):
+    monkeypatch.setattr(store, "VECTOR_STORE_BACKEND", "persistent")
+
+    with pytest.raises(store.UnsupportedPrecisionError):
+        store.get_or_create_collection("docs", None, precision="float16")
+    assert "docs" not in store._quantized_collections
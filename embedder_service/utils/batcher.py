@@ -0,0 +1,162 @@
+import asyncio
+import logging
+import os
+import queue
+import threading
+import time
+from concurrent.futures import Future
+from typing import Dict, List
+
+import numpy as np
+
+from utils.model_registry import model_registry
+
+logger = logging.getLogger(__name__)
+
+EMBED_MAX_BATCH_SIZE = int(os.getenv("EMBED_MAX_BATCH_SIZE", "128"))
+EMBED_MAX_BATCH_WAIT_MS = float(os.getenv("EMBED_MAX_BATCH_WAIT_MS", "10"))
+# Texts per forward pass; merged batches are encoded in passes of this size
+EMBED_ENCODE_BATCH_SIZE = int(os.getenv("EMBED_ENCODE_BATCH_SIZE", "32"))
+
+_STOP = object()
+
+
+class _EncodeJob:
+    __slots__ = ("model_name", "texts", "future")
+
+    def __init__(self, model_name: str, texts: List[str]):
+        self.model_name = model_name
+        self.texts = texts
+        self.future: Future = Future()
+
+
+class EncodeBatcher:
+    """Dedicated inference thread shared by every in-flight request.
+
+    Encode requests are queued and merged into batches bounded by
+    `max_batch_size` texts and `max_wait_ms` of queueing delay, so concurrent
+    callers share `SentenceTransformer.encode` calls instead of competing for
+    the CPU. Results are handed back to each caller through a future.
+
+    The thread is the throughput ceiling: one forward pass runs at a time and
+    already uses every core torch is given, so once it is busy, more
+    concurrent requests add queueing delay rather than throughput. Merging
+    pays off where a pass is cheaper per text at larger sizes (GPUs, many
+    cores). On a small CPU, passes of more than a few dozen texts are slower
+    per text, so a merged batch is encoded in passes of `encode_batch_size`.
+    """
+
+    def __init__(self, max_batch_size: int, max_wait_ms: float, encode_batch_size: int = 32):
+        self._max_batch_size = max_batch_size
+        self._encode_batch_size = max(min(encode_batch_size, max_batch_size), 1)
+        self._max_wait = max_wait_ms / 1000
+        self._queue: "queue.Queue" = queue.Queue()
+        self._thread = None
+        self._lock = threading.Lock()
+
+    def start(self):
+        with self._lock:
+            if self._thread is not None and self._thread.is_alive():
+                return
+            self._thread = threading.Thread(target=self._run, name="encode-batcher", daemon=True)
+            self._thread.start()
+
+    def stop(self):
+        with self._lock:
+            if self._thread is None:
+                return
+            self._queue.put(_STOP)
+            self._thread.join()
+            self._thread = None
+
+    def submit(self, model_name: str, texts: List[str]) -> Future:
+        """Queue texts for encoding and return a future resolving to a float32 array"""
+        job = _EncodeJob(model_name, list(texts))
+        if not job.texts:
+            job.future.set_result(np.empty((0, 0), dtype=np.float32))
+            return job.future
+        self.start()
+        self._queue.put(job)
+        return job.future
+
+    def encode(self, model_name: str, texts: List[str]) -> np.ndarray:
+        """Blocking encode, for use from worker threads"""
+        return self.submit(model_name, texts).result()
+
+    async def encode_async(self, model_name: str, texts: List[str]) -> np.ndarray:
+        """Encode without blocking the event loop"""
+        return await asyncio.wrap_future(self.submit(model_name, texts))
+
+    def _collect(self, first: _EncodeJob):
+        """Gather queued jobs until the batch is full or the wait budget is spent"""
+        jobs = [first]
+        size = len(first.texts)
+        deadline = time.monotonic() + self._max_wait
+        stop = False
+
+        while size < self._max_batch_size:
+            timeout = deadline - time.monotonic()
+            if timeout <= 0:
+                break
+            try:
+                job = self._queue.get(timeout=timeout)
+            except queue.Empty:
+                break
+            if job is _STOP:
+                stop = True
+                break
+            jobs.append(job)
+            size += len(job.texts)
+
+        return jobs, stop
+
+    def _run(self):
+        while True:
+            first = self._queue.get()
+            if first is _STOP:
+                return
+
+            jobs, stop = self._collect(first)
+
+            by_model: Dict[str, List[_EncodeJob]] = {}
+            for job in jobs:
+                if job.future.set_running_or_notify_cancel():
+                    by_model.setdefault(job.model_name, []).append(job)
+
+            for model_name, model_jobs in by_model.items():
+                self._encode_batch(model_name, model_jobs)
+
+            if stop:
+                return
+
+    def _encode_batch(self, model_name: str, jobs: List[_EncodeJob]):
+        # Identical texts across callers (headers, boilerplate) are encoded once
+        unique: Dict[str, int] = {}
+        for job in jobs:
+            for text in job.texts:
+                unique.setdefault(text, len(unique))
+
+        try:
+            model = model_registry.get(model_name)
+            vectors = model.encode(
+                list(unique),
+                batch_size=self._encode_batch_size,
+                convert_to_numpy=True,
+                show_progress_bar=False,
+            ).astype(np.float32, copy=False)
+        except Exception as e:
+            logger.error(f"Batched encoding failed for model '{model_name}': {e}")
+            for job in jobs:
+                job.future.set_exception(e)
+            return
+
+        logger.debug(f"Encoded {len(unique)} texts for {len(jobs)} requests with '{model_name}'")
+        for job in jobs:
+            job.future.set_result(vectors[[unique[text] for text in job.texts]])
+
+
+encode_batcher = EncodeBatcher(
+    max_batch_size=EMBED_MAX_BATCH_SIZE,
+    max_wait_ms=EMBED_MAX_BATCH_WAIT_MS,
+    encode_batch_size=EMBED_ENCODE_BATCH_SIZE,
+)
@@ -0,0 +1,190 @@
+import re
+from typing import Callable, Dict, List, Optional, Tuple
+
+import numpy as np
+from langchain_core.documents import Document
+
+# Sentence ends followed by whitespace, or paragraph breaks in the extracted text
+SENTENCE_SPLIT_REGEX = re.compile(r"(?<=[.?!])\s+|\n\s*\n")
+
+BREAKPOINT_DEFAULTS: Dict[str, float] = {
+    "percentile": 95,
+    "standard_deviation": 3,
+    "interquartile": 1.5,
+    "gradient": 95,
+}
+
+Span = Tuple[int, int]
+
+
+def sentence_spans(text: str) -> List[Span]:
+    """Character spans of the sentences in `text`, trimmed of surrounding whitespace"""
+    spans = []
+    start = 0
+    for separator in [*SENTENCE_SPLIT_REGEX.finditer(text), None]:
+        end = separator.start() if separator else len(text)
+        sentence = text[start:end]
+        stripped = sentence.strip()
+        if stripped:
+            offset = start + len(sentence) - len(sentence.lstrip())
+            spans.append((offset, offset + len(stripped)))
+        if separator:
+            start = separator.end()
+    return spans
+
+
+def adjacent_cosine_distances(embeddings: np.ndarray) -> np.ndarray:
+    """Cosine distance between each row and the next"""
+    norms = np.linalg.norm(embeddings, axis=1, keepdims=True)
+    normalized = embeddings / np.maximum(norms, 1e-12)
+    return 1.0 - np.einsum("ij,ij->i", normalized[:-1], normalized[1:])
+
+
+def breakpoint_indices(distances: np.ndarray, threshold_type: str, threshold_amount: Optional[float]) -> np.ndarray:
+    """Indices `i` where a chunk should end after sentence `i`, using LangChain's threshold rules"""
+    if distances.size == 0:
+        return np.empty(0, dtype=int)
+
+    amount = BREAKPOINT_DEFAULTS[threshold_type] if threshold_amount is None else threshold_amount
+
+    if threshold_type == "percentile":
+        threshold = np.percentile(distances, amount)
+    elif threshold_type == "standard_deviation":
+        threshold = np.mean(distances) + amount * np.std(distances)
+    elif threshold_type == "interquartile":
+        q1, q3 = np.percentile(distances, [25, 75])
+        threshold = np.mean(distances) + amount * (q3 - q1)
+    elif threshold_type == "gradient":
+        if distances.size < 2:
+            return np.empty(0, dtype=int)
+        distances = np.gradient(distances)
+        threshold = np.percentile(distances, amount)
+    else:
+        raise ValueError(f"Unsupported breakpoint threshold type: {threshold_type}")
+
+    return np.flatnonzero(distances > threshold)
+
+
+class SemanticChunkerEngine:
+    """Semantic chunker that keeps chunk sizes within configured bounds.
+
+    Sentences are split once and embedded in a single batch; adjacent cosine
+    distances and breakpoint thresholds are computed with NumPy. Groups larger
+    than `max_chunk_size` are split at their strongest internal breakpoint and
+    groups smaller than `min_chunk_size` are merged into a neighbour.
+
+    `chunk_size` and `overlap` only apply to a single sentence longer than
+    `max_chunk_size`, which is cut into `chunk_size` windows overlapping by
+    `overlap`; every other chunk ends on a sentence boundary.
+    """
+
+    def __init__(
+        self,
+        embed: Callable[[List[str]], np.ndarray],
+        breakpoint_threshold_type: str = "percentile",
+        breakpoint_threshold_amount: Optional[float] = None,
+        chunk_size: int = 512,
+        overlap: int = 50,
+        min_chunk_size: int = 100,
+        max_chunk_size: int = 1000,
+        buffer_size: int = 1,
+    ):
+        self._embed = embed
+        self.breakpoint_threshold_type = breakpoint_threshold_type
+        self.breakpoint_threshold_amount = breakpoint_threshold_amount
+        self.max_chunk_size = max(max_chunk_size, 1)
+        self.min_chunk_size = min(min_chunk_size, self.max_chunk_size)
+        self.chunk_size = min(max(chunk_size, 1), self.max_chunk_size)
+        self.overlap = min(max(overlap, 0), self.chunk_size // 2)
+        self.buffer_size = buffer_size
+
+    def chunk_spans(self, text: str) -> List[Span]:
+        """Character spans of the chunks of `text`"""
+        sentences = sentence_spans(text)
+        if not sentences:
+            return []
+        if len(sentences) == 1:
+            return self._enforce_max([(0, 1)], sentences, np.empty(0))
+
+        # Each sentence is embedded together with its neighbours to smooth out short sentences
+        windows = [
+            text[sentences[max(i - self.buffer_size, 0)][0]:sentences[min(i + self.buffer_size, len(sentences) - 1)][1]]
+            for i in range(len(sentences))
+        ]
+        distances = adjacent_cosine_distances(np.asarray(self._embed(windows), dtype=np.float32))
+
+        breaks = breakpoint_indices(distances, self.breakpoint_threshold_type, self.breakpoint_threshold_amount)
+        bounds = [0, *(int(i) + 1 for i in breaks), len(sentences)]
+        groups = [(bounds[i], bounds[i + 1]) for i in range(len(bounds) - 1)]
+
+        groups = self._merge_small(groups, sentences)
+        return self._enforce_max(groups, sentences, distances)
+
+    def split_text(self, text: str) -> List[str]:
+        return [text[start:end] for start, end in self.chunk_spans(text)]
+
+    def split_documents(self, documents: List[Document]) -> List[Document]:
+        """Drop-in replacement for LangChain's `SemanticChunker.split_documents`"""
+        chunks = []
+        for document in documents:
+            for chunk in self.split_text(document.page_content):
+                chunks.append(Document(page_content=chunk, metadata=dict(document.metadata)))
+        return chunks
+
+    @staticmethod
+    def _length(group: Span, sentences: List[Span]) -> int:
+        return sentences[group[1] - 1][1] - sentences[group[0]][0]
+
+    def _merge_small(self, groups: List[Span], sentences: List[Span]) -> List[Span]:
+        """Merge groups under `min_chunk_size` into their neighbour while staying under `max_chunk_size`"""
+        merged: List[Span] = []
+        for group in groups:
+            if merged:
+                previous = merged[-1]
+                combined = (previous[0], group[1])
+                too_small = (
+                    self._length(previous, sentences) < self.min_chunk_size
+                    or self._length(group, sentences) < self.min_chunk_size
+                )
+                if too_small and self._length(combined, sentences) <= self.max_chunk_size:
+                    merged[-1] = combined
+                    continue
+            merged.append(group)
+        return merged
+
+    def _enforce_max(self, groups: List[Span], sentences: List[Span], distances: np.ndarray) -> List[Span]:
+        """Turn sentence groups into character spans no longer than `max_chunk_size`"""
+        spans: List[Span] = []
+        pending = list(reversed(groups))
+
+        while pending:
+            first, last = pending.pop()
+            start, end = sentences[first][0], sentences[last - 1][1]
+            if end - start <= self.max_chunk_size:
+                spans.append((start, end))
+                continue
+
+            if last - first == 1:
+                # A single sentence longer than the maximum is cut into overlapping windows
+                spans.extend(self._hard_split(start, end))
+                continue
+
+            # Split at the strongest semantic break, preferring cuts that leave both sides above the minimum
+            candidates = range(first + 1, last)
+            balanced = [
+                cut for cut in candidates
+                if self._length((first, cut), sentences) >= self.min_chunk_size
+                and self._length((cut, last), sentences) >= self.min_chunk_size
+            ] or list(candidates)
+            if distances.size:
+                cut = max(balanced, key=lambda c: distances[c - 1])
+            else:
+                cut = balanced[len(balanced) // 2]
+            pending.append((cut, last))
+            pending.append((first, cut))
+
+        return spans
+
+    def _hard_split(self, start: int, end: int) -> List[Span]:
+        step = self.chunk_size - self.overlap
+        return [(position, min(position + self.chunk_size, end)) for position in range(start, end - self.overlap, step)]
@@ -0,0 +1,290 @@
+import hashlib
+import json
+import logging
+import os
+import threading
+import time
+import unicodedata
+from collections import OrderedDict
+from typing import Dict, List, Optional
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+EMBED_CACHE_MAX_ENTRIES = int(os.getenv("EMBED_CACHE_MAX_ENTRIES", "50000"))
+EMBED_CACHE_DIR = os.getenv("EMBED_CACHE_DIR", "/data/embedding_cache")
+EMBED_CACHE_DTYPE = os.getenv("EMBED_CACHE_DTYPE", "float16")
+EMBED_CACHE_MAX_DISK_ENTRIES = int(os.getenv("EMBED_CACHE_MAX_DISK_ENTRIES", "1000000"))
+# New disk rows are flushed at most this often, and on shutdown
+EMBED_CACHE_FLUSH_SECONDS = float(os.getenv("EMBED_CACHE_FLUSH_SECONDS", "5"))
+
+_KEY_LENGTH = 32
+_GROW_ROWS = 4096
+
+
+def normalize_text(text: str) -> str:
+    """Normalize unicode and collapse whitespace so trivially different copies share a key"""
+    return " ".join(unicodedata.normalize("NFC", text).split())
+
+
+def cache_key(model_name: str, text: str) -> str:
+    """Content address of a text embedded with a given model"""
+    digest = hashlib.blake2b(digest_size=_KEY_LENGTH // 2)
+    digest.update(model_name.encode("utf-8"))
+    digest.update(b"\0")
+    digest.update(normalize_text(text).encode("utf-8"))
+    return digest.hexdigest()
+
+
+class _MmapStore:
+    """Append-only, memory-mapped vector file for a single model.
+
+    Vectors live in `<name>.vec` as a row-major float16/float32 matrix and the
+    key of each row is appended to `<name>.keys`, so the store is reloaded
+    as-is after a restart. New rows are served at once but only flushed by
+    `flush()`, which writes their keys after the rows they point to.
+    """
+
+    def __init__(self, prefix: str, model_name: str, dim: int, dtype: str, max_rows: int):
+        self._meta_path = f"{prefix}.json"
+        self._keys_path = f"{prefix}.keys"
+        self._data_path = f"{prefix}.vec"
+        self._max_rows = max_rows
+        self._full_logged = False
+        self._index: Dict[str, int] = {}
+        self._unflushed: List[str] = []
+        self._mmap = None
+        self._capacity = 0
+        self._lock = threading.Lock()
+
+        if os.path.exists(self._meta_path):
+            with open(self._meta_path) as f:
+                meta = json.load(f)
+            dim, dtype = meta["dim"], meta["dtype"]
+        else:
+            with open(self._meta_path, "w") as f:
+                json.dump({"model_name": model_name, "dim": dim, "dtype": dtype}, f)
+
+        self.dim = dim
+        self._dtype = np.dtype(dtype)
+        self._row_bytes = self.dim * self._dtype.itemsize
+        self._load()
+
+    @classmethod
+    def open_existing(cls, prefix: str, max_rows: int) -> Optional["_MmapStore"]:
+        if not os.path.exists(f"{prefix}.json"):
+            return None
+        return cls(prefix, model_name="", dim=0, dtype="float32", max_rows=max_rows)
+
+    def __len__(self):
+        return len(self._index)
+
+    def _load(self):
+        keys = []
+        if os.path.exists(self._keys_path):
+            with open(self._keys_path) as f:
+                keys = [line.rstrip("\n") for line in f if line.strip()]
+
+        data_size = os.path.getsize(self._data_path) if os.path.exists(self._data_path) else 0
+        # A crash between writing a row and its key leaves an orphan row; trust the shorter of the two
+        rows = min(len(keys), data_size // self._row_bytes)
+        self._index = {key: row for row, key in enumerate(keys[:rows])}
+
+        if len(keys) != rows:
+            with open(self._keys_path, "w") as f:
+                f.writelines(f"{key}\n" for key in keys[:rows])
+        self._remap(max(data_size // self._row_bytes, rows))
+
+    def _remap(self, capacity: int):
+        self._mmap = None
+        if capacity == 0:
+            self._capacity = 0
+            return
+        with open(self._data_path, "ab") as f:
+            f.truncate(capacity * self._row_bytes)
+        self._mmap = np.memmap(self._data_path, dtype=self._dtype, mode="r+", shape=(capacity, self.dim))
+        self._capacity = capacity
+
+    def get_many(self, keys: List[str]) -> List[Optional[np.ndarray]]:
+        with self._lock:
+            rows = [self._index.get(key) for key in keys]
+            return [None if row is None else np.array(self._mmap[row], dtype=np.float32) for row in rows]
+
+    def put_many(self, keys: List[str], vectors: np.ndarray):
+        with self._lock:
+            new = [(key, vector) for key, vector in zip(keys, vectors) if key not in self._index]
+            room = self._max_rows - len(self._index)
+            if len(new) > room:
+                if not self._full_logged:
+                    logger.warning(f"Embedding disk cache {self._data_path} is full; new vectors stay in memory only")
+                    self._full_logged = True
+                new = new[:max(room, 0)]
+            if not new:
+                return
+
+            start = len(self._index)
+            end = start + len(new)
+            if end > self._capacity:
+                # Rows already in the old map are made durable before it is replaced
+                self._flush()
+                self._remap(min(max(end, self._capacity + _GROW_ROWS), self._max_rows))
+
+            self._mmap[start:end] = np.stack([vector for _, vector in new]).astype(self._dtype)
+            for offset, (key, _) in enumerate(new):
+                self._index[key] = start + offset
+            self._unflushed.extend(key for key, _ in new)
+
+    def flush(self):
+        with self._lock:
+            self._flush()
+
+    def _flush(self):
+        if not self._unflushed:
+            return
+        self._mmap.flush()
+        with open(self._keys_path, "a") as f:
+            f.writelines(f"{key}\n" for key in self._unflushed)
+        self._unflushed = []
+
+
+class EmbeddingCache:
+    """Two-tier cache of text embeddings keyed by (model name, normalized text hash).
+
+    The first tier is an in-memory LRU of float32 vectors. New vectors are
+    also written to a memory-mapped on-disk store per model, which survives
+    restarts and serves entries evicted from memory; writes are flushed at
+    most every `flush_seconds` and on `flush()`. The memory tier has its own
+    lock, so disk reads and writes do not hold up memory hits.
+    """
+
+    def __init__(self, max_entries: int, cache_dir: str, dtype: str, max_disk_entries: int, flush_seconds: float = 5):
+        self._max_entries = max_entries
+        self._cache_dir = cache_dir
+        self._dtype = dtype
+        self._max_disk_entries = max_disk_entries
+        self._flush_seconds = flush_seconds
+        self._flushed_at = time.monotonic()
+        self._memory: "OrderedDict[str, np.ndarray]" = OrderedDict()
+        self._stores: Dict[str, _MmapStore] = {}
+        self._probed: set[str] = set()
+        self._lock = threading.Lock()
+        self._hits = 0
+        self._disk_hits = 0
+        self._misses = 0
+
+        if self._cache_dir:
+            try:
+                os.makedirs(self._cache_dir, exist_ok=True)
+            except OSError as e:
+                logger.error(f"Embedding disk cache disabled, cannot create {self._cache_dir}: {e}")
+                self._cache_dir = ""
+
+    def _store_prefix(self, model_name: str) -> str:
+        name = hashlib.sha1(model_name.encode("utf-8")).hexdigest()[:16]
+        return os.path.join(self._cache_dir, name)
+
+    def _get_store(self, model_name: str, dim: Optional[int] = None) -> Optional[_MmapStore]:
+        if not self._cache_dir:
+            return None
+        store = self._stores.get(model_name)
+        if store is not None or (model_name in self._probed and dim is None):
+            return store
+
+        self._probed.add(model_name)
+        prefix = self._store_prefix(model_name)
+        try:
+            store = _MmapStore.open_existing(prefix, self._max_disk_entries)
+            if store is None and dim is not None:
+                store = _MmapStore(prefix, model_name, dim, self._dtype, self._max_disk_entries)
+        except (OSError, ValueError, KeyError) as e:
+            logger.error(f"Failed to open embedding disk cache for '{model_name}': {e}")
+            store = None
+        if store is not None:
+            self._stores[model_name] = store
+        return store
+
+    def get_many(self, model_name: str, texts: List[str], disk: bool = True) -> List[Optional[np.ndarray]]:
+        """Look up texts, returning None for every miss; `disk=False` only looks in memory"""
+        keys = [cache_key(model_name, text) for text in texts]
+        results: List[Optional[np.ndarray]] = [None] * len(keys)
+        with self._lock:
+            for i, key in enumerate(keys):
+                vector = self._memory.get(key)
+                if vector is not None:
+                    self._memory.move_to_end(key)
+                    self._hits += 1
+                    results[i] = vector
+            store = self._get_store(model_name) if disk else None
+        missing = [i for i, vector in enumerate(results) if vector is None]
+        if not missing:
+            return results
+
+        found = store.get_many([keys[i] for i in missing]) if store is not None else [None] * len(missing)
+        with self._lock:
+            for i, vector in zip(missing, found):
+                if vector is not None:
+                    self._disk_hits += 1
+                    self._remember(keys[i], vector)
+                    results[i] = vector
+                else:
+                    self._misses += 1
+        return results
+
+    def put_many(self, model_name: str, texts: List[str], vectors: np.ndarray, disk: bool = True):
+        """Cache new vectors; `disk=False` keeps them in memory only"""
+        if len(texts) == 0:
+            return
+        keys = [cache_key(model_name, text) for text in texts]
+        with self._lock:
+            for key, vector in zip(keys, vectors):
+                self._remember(key, np.asarray(vector, dtype=np.float32))
+            store = self._get_store(model_name, dim=vectors.shape[1]) if disk else None
+            flush = time.monotonic() - self._flushed_at >= self._flush_seconds
+            if flush:
+                self._flushed_at = time.monotonic()
+        if store is None or store.dim != vectors.shape[1]:
+            return
+        try:
+            store.put_many(keys, vectors)
+            if flush:
+                self.flush()
+        except OSError as e:
+            logger.error(f"Failed to write embedding disk cache for '{model_name}': {e}")
+
+    def flush(self):
+        """Make the vectors written so far durable"""
+        with self._lock:
+            stores = list(self._stores.values())
+        for store in stores:
+            try:
+                store.flush()
+            except OSError as e:
+                logger.error(f"Failed to flush embedding disk cache: {e}")
+
+    def _remember(self, key: str, vector: np.ndarray):
+        self._memory[key] = vector
+        self._memory.move_to_end(key)
+        while len(self._memory) > self._max_entries:
+            self._memory.popitem(last=False)
+
+    def stats(self) -> Dict:
+        with self._lock:
+            lookups = self._hits + self._disk_hits + self._misses
+            return {
+                "memory_hits": self._hits,
+                "disk_hits": self._disk_hits,
+                "misses": self._misses,
+                "hit_rate": round((self._hits + self._disk_hits) / lookups, 4) if lookups else 0.0,
+                "memory_entries": len(self._memory),
+                "disk_entries": sum(len(store) for store in self._stores.values()),
+            }
+
+
+embedding_cache = EmbeddingCache(
+    max_entries=EMBED_CACHE_MAX_ENTRIES,
+    cache_dir=EMBED_CACHE_DIR,
+    dtype=EMBED_CACHE_DTYPE,
+    max_disk_entries=EMBED_CACHE_MAX_DISK_ENTRIES,
+    flush_seconds=EMBED_CACHE_FLUSH_SECONDS,
+)
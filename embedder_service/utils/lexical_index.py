@@ -0,0 +1,232 @@
+import logging
+import math
+import re
+import threading
+import unicodedata
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from utils.quantized_collection import matches_where
+
+logger = logging.getLogger(__name__)
+
+_REBUILD_PAGE_SIZE = 1000
+
+# Words and identifiers such as "8867", "Q3(b)", "ABC-123" or "v1.2" in any script; joiners are kept inside tokens
+_TOKEN_REGEX = re.compile(r"[^\W_]+(?:[._/:-][^\W_]+)*")
+# Han and kana are written without spaces, so each character is a part of its own
+_UNSPACED = "\u3040-\u30ff\u3400-\u4dbf\u4e00-\u9fff\uf900-\ufaff"
+_PART_REGEX = re.compile(rf"[{_UNSPACED}]|[^\W_{_UNSPACED}]+")
+
+
+def tokenize(text: str) -> List[str]:
+    """Lowercased terms of `text`.
+
+    Compound identifiers are indexed whole and by their parts, so "8867/01"
+    matches queries for "8867/01", "8867" and "01". Text is NFKC-normalized,
+    so composed and decomposed accents match. Runs of unspaced script
+    are split into characters, so "文档" also matches text where it is part of
+    a longer run.
+    """
+    terms = []
+    for token in _TOKEN_REGEX.findall(unicodedata.normalize("NFKC", text).lower()):
+        terms.append(token)
+        parts = _PART_REGEX.findall(token)
+        if len(parts) > 1:
+            terms.extend(parts)
+    return terms
+
+
+class BM25Index:
+    """Incrementally updated BM25 inverted index over the chunks of one collection.
+
+    Chunks are kept in slots; deleted slots are reused. Postings map each term
+    to `{slot: term frequency}`. A query gathers the postings of its terms,
+    normalises only those slots and sums their scores per slot, so it costs
+    O(postings of its terms) however many chunks the index holds.
+    """
+
+    def __init__(self, k1: float = 1.5, b: float = 0.75):
+        self.k1 = k1
+        self.b = b
+        self._lock = threading.RLock()
+        self._postings: Dict[str, Dict[int, int]] = {}
+        self._terms: List[Optional[Dict[str, int]]] = []
+        self._ids: List[Optional[str]] = []
+        self._metadatas: List[Optional[Dict[str, Any]]] = []
+        self._lengths = np.zeros(0, dtype=np.float32)
+        self._slots: Dict[str, int] = {}
+        self._free: List[int] = []
+        self._total_length = 0
+
+    def __len__(self):
+        return len(self._slots)
+
+    def upsert(self, ids: Sequence[str], documents: Sequence[str], metadatas: Optional[Sequence[Dict]] = None):
+        with self._lock:
+            for i, (chunk_id, document) in enumerate(zip(ids, documents)):
+                self._remove(chunk_id)
+                terms: Dict[str, int] = {}
+                for term in tokenize(document or ""):
+                    terms[term] = terms.get(term, 0) + 1
+
+                slot = self._free.pop() if self._free else self._new_slot()
+                self._slots[chunk_id] = slot
+                self._ids[slot] = chunk_id
+                self._terms[slot] = terms
+                self._metadatas[slot] = metadatas[i] if metadatas is not None else None
+                length = sum(terms.values())
+                self._lengths[slot] = length
+                self._total_length += length
+                for term, frequency in terms.items():
+                    self._postings.setdefault(term, {})[slot] = frequency
+
+    def update_metadata(self, ids: Sequence[str], metadatas: Sequence[Dict]):
+        with self._lock:
+            for chunk_id, metadata in zip(ids, metadatas):
+                slot = self._slots.get(chunk_id)
+                if slot is not None:
+                    self._metadatas[slot] = metadata
+
+    def delete(self, ids: Sequence[str]):
+        with self._lock:
+            for chunk_id in ids:
+                self._remove(chunk_id)
+
+    def _new_slot(self) -> int:
+        slot = len(self._ids)
+        self._ids.append(None)
+        self._terms.append(None)
+        self._metadatas.append(None)
+        if slot >= self._lengths.size:
+            self._lengths = np.concatenate([self._lengths, np.zeros(max(slot, 64), dtype=np.float32)])
+        return slot
+
+    def _remove(self, chunk_id: str):
+        slot = self._slots.pop(chunk_id, None)
+        if slot is None:
+            return
+        for term in self._terms[slot]:
+            postings = self._postings[term]
+            del postings[slot]
+            if not postings:
+                del self._postings[term]
+        self._total_length -= int(self._lengths[slot])
+        self._lengths[slot] = 0
+        self._ids[slot] = None
+        self._terms[slot] = None
+        self._metadatas[slot] = None
+        self._free.append(slot)
+
+    def search(
+        self,
+        query: str,
+        k: int,
+        where: Optional[Dict[str, Any]] = None,
+    ) -> List[Tuple[str, float]]:
+        """Top `k` (chunk_id, BM25 score) pairs for `query`, best first"""
+
+        with self._lock:
+            count = len(self._slots)
+            if not count:
+                return []
+
+            average_length = max(self._total_length / count, 1e-9)
+            gathered_slots, gathered_scores = [], []
+            for term in set(tokenize(query)):
+                postings = self._postings.get(term)
+                if not postings:
+                    continue
+                slots = np.fromiter(postings.keys(), dtype=np.int64, count=len(postings))
+                frequencies = np.fromiter(postings.values(), dtype=np.float32, count=len(postings))
+                idf = math.log(1 + (count - len(postings) + 0.5) / (len(postings) + 0.5))
+                # Length normalisation depends on the average length, so it is computed for the matched slots only
+                norms = self.k1 * (1 - self.b + self.b * self._lengths[slots] / average_length)
+                gathered_slots.append(slots)
+                gathered_scores.append(idf * frequencies * (self.k1 + 1) / (frequencies + norms))
+            if not gathered_slots:
+                return []
+
+            # Sum the per-term scores of each matched slot
+            matched, positions = np.unique(np.concatenate(gathered_slots), return_inverse=True)
+            scores = np.bincount(positions, weights=np.concatenate(gathered_scores)).astype(np.float32)
+
+            keep = scores > 0
+            if where:
+                keep &= np.array([matches_where(self._metadatas[slot], where) for slot in matched], dtype=bool)
+            matched, scores = matched[keep], scores[keep]
+            if matched.size == 0:
+                return []
+
+            if matched.size > k:
+                top = np.argpartition(-scores, k - 1)[:k]
+                matched, scores = matched[top], scores[top]
+            order = np.argsort(-scores, kind="stable")
+            return [(self._ids[slot], float(score)) for slot, score in zip(matched[order], scores[order])]
+
+
+class LexicalIndexRegistry:
+    """One BM25 index per collection, kept in step with writes.
+
+    An index is built from the collection's stored documents the first time
+    the collection is written to or searched, or when the service warms the
+    indexes at startup; after that, writes update it in place.
+    """
+
+    def __init__(self):
+        self._indexes: Dict[str, BM25Index] = {}
+        self._lock = threading.Lock()
+
+    def get(self, collection) -> BM25Index:
+        return self._get_or_build(collection)[0]
+
+    def _get_or_build(self, collection) -> Tuple[BM25Index, bool]:
+        """The collection's index, and whether it was just built from the collection"""
+        with self._lock:
+            index = self._indexes.get(collection.name)
+            if index is not None:
+                return index, False
+            # Register before reading so writes landing during the rebuild are applied too
+            index = self._indexes[collection.name] = BM25Index()
+            index._lock.acquire()
+
+        try:
+            offset = 0
+            while True:
+                page = collection.get(include=["documents", "metadatas"], limit=_REBUILD_PAGE_SIZE, offset=offset)
+                if not page["ids"]:
+                    break
+                index.upsert(page["ids"], page["documents"], page["metadatas"])
+                offset += len(page["ids"])
+            logger.info(f"Built lexical index for '{collection.name}' with {len(index)} chunks")
+        except Exception:
+            self.drop(collection.name)
+            raise
+        finally:
+            index._lock.release()
+        return index, True
+
+    # Writes are applied to the collection first, so an index built by one of them already reflects it
+
+    def upsert(self, collection, ids, documents, metadatas):
+        index, built = self._get_or_build(collection)
+        if not built:
+            index.upsert(ids, documents, metadatas)
+
+    def update_metadata(self, collection, ids, metadatas):
+        index, built = self._get_or_build(collection)
+        if not built:
+            index.update_metadata(ids, metadatas)
+
+    def delete(self, collection, ids):
+        index, built = self._get_or_build(collection)
+        if not built:
+            index.delete(ids)
+
+    def drop(self, collection_name: str):
+        with self._lock:
+            self._indexes.pop(collection_name, None)
+
+
+lexical_indexes = LexicalIndexRegistry()
@@ -0,0 +1,144 @@
+import json
+import os
+import time
+import uuid
+from typing import Any, Callable, Dict, List, Optional
+
+from models.embed import DocumentManifest
+
+# Collection of the vector store holding one manifest record per stored document
+MANIFEST_COLLECTION = os.getenv("MANIFEST_COLLECTION", "omnipdf-manifests")
+
+# Namespace for deterministic chunk ids; changing it re-keys every stored chunk
+CHUNK_ID_NAMESPACE = uuid.UUID("6f1c3f3e-6a43-4b43-9a0e-7d2f6b1f3c21")
+
+
+def chunk_id_for(doc_id: str, chunk_hash: str, ordinal: int = 0) -> str:
+    """Stable id of a chunk: the same text in the same document always maps to the same id"""
+    return str(uuid.uuid5(CHUNK_ID_NAMESPACE, f"{doc_id}:{chunk_hash}:{ordinal}"))
+
+
+class ChunkDiff:
+    """Chunks of re-embedded documents split by what has to be written for them"""
+
+    def __init__(self):
+        self.new: List[Dict[str, Any]] = []
+        self.kept: List[Dict[str, Any]] = []
+        self.unchanged: List[Dict[str, Any]] = []
+        self.stale: Dict[str, List[str]] = {}
+        self.changed_docs: List[str] = []
+        # Metadata currently stored for each kept chunk, by chunk id
+        self.stored_metadata: Dict[str, Dict[str, Any]] = {}
+
+    @property
+    def stale_ids(self) -> List[str]:
+        return [chunk_id for chunk_ids in self.stale.values() for chunk_id in chunk_ids]
+
+    def summary(self, collection_name: str, doc_id: Optional[str] = None) -> Dict[str, Any]:
+        """Counts for the whole diff, or for a single document"""
+
+        def count(chunks: List[Dict[str, Any]]) -> int:
+            return sum(1 for chunk in chunks if doc_id is None or chunk["metadata"]["doc_id"] == doc_id)
+
+        unchanged = count(self.kept) + count(self.unchanged)
+        return {
+            "collection_name": collection_name,
+            "total_chunks_added": count(self.new) + unchanged,
+            "chunks_embedded": count(self.new),
+            "chunks_unchanged": unchanged,
+            "chunks_deleted": len(self.stale_ids if doc_id is None else self.stale.get(doc_id, [])),
+        }
+
+
+class ManifestStore:
+    """Per-document manifests of the chunks stored in each collection.
+
+    Manifests are records of their own collection in the configured vector
+    store, keyed by collection and doc_id, so `/status` is answered with one
+    lookup by id, and every replica, and the process after a restart, sees
+    the same manifests as the chunks they describe. They are written whenever
+    a document's chunks change.
+    """
+
+    def __init__(self, client_getter: Callable[[], Any], collection_name: str = MANIFEST_COLLECTION):
+        self._client_getter = client_getter
+        self.collection_name = collection_name
+
+    def _collection(self):
+        # Records are fetched by id only, so a single dimension is enough for the vector Chroma requires
+        return self._client_getter().get_or_create_collection(name=self.collection_name, embedding_function=None)
+
+    @staticmethod
+    def _key(collection_name: str, doc_id: str) -> str:
+        # Collection names cannot contain ":", so the key is unambiguous
+        return f"{collection_name}:{doc_id}"
+
+    @staticmethod
+    def _from_record(chunk_ids: str, metadata: Dict[str, Any]) -> DocumentManifest:
+        return DocumentManifest(chunk_ids=json.loads(chunk_ids), **metadata)
+
+    def get(self, collection_name: str, doc_id: str) -> Optional[DocumentManifest]:
+        return self.get_many(collection_name, [doc_id]).get(doc_id)
+
+    def get_many(self, collection_name: str, doc_ids: List[str]) -> Dict[str, DocumentManifest]:
+        if not doc_ids:
+            return {}
+        records = self._collection().get(
+            ids=[self._key(collection_name, doc_id) for doc_id in doc_ids], include=["documents", "metadatas"]
+        )
+        manifests = [
+            self._from_record(chunk_ids, metadata) for chunk_ids, metadata in zip(records["documents"], records["metadatas"])
+        ]
+        return {manifest.doc_id: manifest for manifest in manifests}
+
+    def remove(self, collection_name: str, doc_ids: List[str]):
+        if doc_ids:
+            self._collection().delete(ids=[self._key(collection_name, doc_id) for doc_id in doc_ids])
+
+    def documents(self, collection_name: str) -> List[DocumentManifest]:
+        records = self._collection().get(where={"collection_name": collection_name}, include=["documents", "metadatas"])
+        return [self._from_record(chunk_ids, metadata) for chunk_ids, metadata in zip(records["documents"], records["metadatas"])]
+
+    def remove_collection(self, collection_name: str):
+        self._collection().delete(where={"collection_name": collection_name})
+
+    def record_chunks(self, collection_name: str, embedding_model: str, chunk_data: List[Dict[str, Any]]):
+        """Replace the manifests of the documents in `chunk_data` with their newly stored chunks"""
+        by_doc: Dict[str, List[Dict[str, Any]]] = {}
+        for chunk in chunk_data:
+            by_doc.setdefault(chunk["metadata"]["doc_id"], []).append(chunk)
+        if not by_doc:
+            return
+
+        existing = self.get_many(collection_name, list(by_doc))
+        manifests = []
+        for doc_id, chunks in by_doc.items():
+            now = chunks[0]["metadata"].get("embedded_at", time.time())
+            chunk_ids = [chunk["chunk_id"] for chunk in chunks]
+            manifests.append(DocumentManifest(
+                doc_id=doc_id,
+                collection_name=collection_name,
+                chunk_ids=chunk_ids,
+                chunk_count=len(chunk_ids),
+                embedding_model=embedding_model,
+                content_hash=chunks[0]["metadata"].get("content_hash"),
+                created_at=existing[doc_id].created_at if doc_id in existing else now,
+                updated_at=now,
+            ))
+
+        self._collection().upsert(
+            ids=[self._key(collection_name, manifest.doc_id) for manifest in manifests],
+            embeddings=[[0.0]] * len(manifests),
+            documents=[json.dumps(manifest.chunk_ids) for manifest in manifests],
+            # Upserts merge metadata; a None value makes Chroma drop a field the record no longer has
+            metadatas=[manifest.model_dump(exclude={"chunk_ids"}) for manifest in manifests],
+        )
+
+
+def _get_client():
+    # utils.vector_store imports this module, so the client is looked up on first use
+    from utils.vector_store import get_client
+    return get_client()
+
+
+manifest_store = ManifestStore(_get_client)
@@ -0,0 +1,120 @@
+import gc
+import logging
+import os
+import threading
+import time
+from collections import OrderedDict
+from typing import Dict, Iterable, List
+
+from sentence_transformers import SentenceTransformer
+
+logger = logging.getLogger(__name__)
+
+EMBEDDING_DEVICE = os.getenv("EMBEDDING_DEVICE", "cpu")
+EMBEDDING_MODEL_MEMORY_LIMIT_MB = int(os.getenv("EMBEDDING_MODEL_MEMORY_LIMIT_MB", "2048"))
+
+_WARMUP_TEXTS = ["OmniPDF embedder warm-up sentence."]
+
+
+def _model_size_bytes(model: SentenceTransformer) -> int:
+    """Approximate resident size of a model from its parameters and buffers"""
+    tensors = list(model.parameters()) + list(model.buffers())
+    return sum(t.numel() * t.element_size() for t in tensors)
+
+
+class ModelRegistry:
+    """Process-wide store of SentenceTransformer models.
+
+    Each model is loaded and warmed up once, then shared by the chunker and
+    the ChromaDB embedding function. Once the combined weights exceed the
+    memory limit, the least recently used models that are not pinned are evicted.
+    """
+
+    def __init__(self, memory_limit_bytes: int, device: str = "cpu"):
+        self._memory_limit_bytes = memory_limit_bytes
+        self._device = device
+        self._models: "OrderedDict[str, SentenceTransformer]" = OrderedDict()
+        self._sizes: Dict[str, int] = {}
+        self._pinned: set[str] = set()
+        self._lock = threading.Lock()
+        self._load_locks: Dict[str, threading.Lock] = {}
+
+    def get(self, model_name: str) -> SentenceTransformer:
+        """Return the shared model instance, loading it on first use"""
+        with self._lock:
+            model = self._touch(model_name)
+            if model is not None:
+                return model
+            load_lock = self._load_locks.setdefault(model_name, threading.Lock())
+
+        # Only one thread loads a given model; others wait for it instead of loading a copy
+        with load_lock:
+            with self._lock:
+                model = self._touch(model_name)
+                if model is not None:
+                    return model
+
+            model = self._load(model_name)
+
+            with self._lock:
+                self._models[model_name] = model
+                self._sizes[model_name] = _model_size_bytes(model)
+                self._evict()
+            return model
+
+    def preload(self, model_names: Iterable[str], pin: bool = True):
+        """Load and warm up models ahead of the first request"""
+        for model_name in model_names:
+            self.get(model_name)
+            if pin:
+                with self._lock:
+                    self._pinned.add(model_name)
+
+    def loaded_models(self) -> List[Dict]:
+        """Summary of the models currently held in memory"""
+        with self._lock:
+            return [
+                {
+                    "model_name": name,
+                    "size_mb": round(self._sizes[name] / (1024 * 1024), 1),
+                    "pinned": name in self._pinned,
+                }
+                for name in self._models
+            ]
+
+    def _touch(self, model_name: str):
+        model = self._models.get(model_name)
+        if model is not None:
+            self._models.move_to_end(model_name)
+        return model
+
+    def _load(self, model_name: str) -> SentenceTransformer:
+        start_time = time.time()
+        model = SentenceTransformer(model_name, device=self._device)
+        model.encode(_WARMUP_TEXTS, convert_to_tensor=False)
+        logger.info(f"Loaded embedding model '{model_name}' in {time.time() - start_time:.2f}s")
+        return model
+
+    def _evict(self):
+        """Drop least recently used, unpinned models until under the memory limit"""
+        total = sum(self._sizes.values())
+        newest = next(reversed(self._models), None)
+        evicted = False
+        for name in list(self._models):
+            if total <= self._memory_limit_bytes:
+                break
+            # Never evict the model that was just loaded or a pinned model
+            if name in self._pinned or name == newest:
+                continue
+            del self._models[name]
+            total -= self._sizes.pop(name)
+            evicted = True
+            logger.info(f"Evicted embedding model '{name}' to stay under memory limit")
+        if evicted:
+            gc.collect()
+
+
+model_registry = ModelRegistry(
+    memory_limit_bytes=EMBEDDING_MODEL_MEMORY_LIMIT_MB * 1024 * 1024,
+    device=EMBEDDING_DEVICE,
+)
@@ -0,0 +1,83 @@
+from bisect import bisect_left, bisect_right
+from typing import Any, Dict, List, Optional
+
+_START_KEYS = ("char_start", "start_char")
+_END_KEYS = ("char_end", "end_char")
+_PAGE_KEYS = ("page_number", "page", "page_no")
+
+
+def _first(entry: Dict[str, Any], keys) -> Optional[Any]:
+    for key in keys:
+        if entry.get(key) is not None:
+            return entry[key]
+    return None
+
+
+class PageIndex:
+    """Maps character offsets of the extracted text to pages and layout regions.
+
+    Built once per document from `pages_info`. Page and region start offsets
+    are kept in sorted prefix arrays so each lookup is a bisect, O(log pages)
+    per chunk instead of a scan over every page.
+
+    The extraction service returns `text` and `pages_info` in this shape.
+    Each `pages_info` entry is expected to carry a page number
+    (`page_number`/`page`/`page_no`) and its character range
+    (`char_start`/`start_char`, `char_end`/`end_char`). It may also carry
+    `items`, the docling provenance of the text on that page, as
+    `{"char_start", "char_end", "bbox"}` dicts.
+    """
+
+    def __init__(self, pages_info: List[Dict[str, Any]]):
+        pages = []
+        regions = []
+        for entry in pages_info or []:
+            start, end, page = _first(entry, _START_KEYS), _first(entry, _END_KEYS), _first(entry, _PAGE_KEYS)
+            if start is None or end is None or page is None:
+                continue
+            pages.append((int(start), int(end), int(page)))
+
+            for item in entry.get("items") or []:
+                item_start, item_end = _first(item, _START_KEYS), _first(item, _END_KEYS)
+                if item_start is None or item_end is None or item.get("bbox") is None:
+                    continue
+                regions.append((int(item_start), int(item_end), int(page), item["bbox"]))
+
+        pages.sort()
+        regions.sort(key=lambda region: region[0])
+
+        self._page_starts = [start for start, _, _ in pages]
+        self._page_ends = [end for _, end, _ in pages]
+        self._page_numbers = [page for _, _, page in pages]
+        self._region_starts = [region[0] for region in regions]
+        self._regions = regions
+
+    def __bool__(self):
+        return bool(self._page_starts)
+
+    def page_at(self, offset: int) -> Optional[int]:
+        """Page containing the character at `offset`"""
+        i = bisect_right(self._page_starts, offset) - 1
+        if i >= 0 and offset < self._page_ends[i]:
+            return self._page_numbers[i]
+        return None
+
+    def pages_between(self, start: int, end: int) -> List[int]:
+        """Pages overlapping the span [start, end)"""
+        first = max(bisect_right(self._page_starts, start) - 1, 0)
+        last = bisect_left(self._page_starts, end)
+        return [
+            self._page_numbers[i]
+            for i in range(first, last)
+            if self._page_ends[i] > start
+        ]
+
+    def regions_between(self, start: int, end: int) -> List[Dict[str, Any]]:
+        """Provenance bounding boxes overlapping the span [start, end)"""
+        first = max(bisect_right(self._region_starts, start) - 1, 0)
+        last = bisect_left(self._region_starts, end)
+        return [
+            {"page_number": page, "bbox": bbox}
+            for region_start, region_end, page, bbox in self._regions[first:last]
+            if region_end > start
+        ]
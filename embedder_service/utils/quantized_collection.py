@@ -0,0 +1,358 @@
+import logging
+import os
+import threading
+from typing import Any, Dict, List, Optional, Sequence
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+_INITIAL_CAPACITY = 1024
+# Rows scored at a time, so a query never holds more than one block of dequantized vectors
+_SEARCH_BLOCK_ROWS = 4096
+
+
+def matches_where(metadata: Optional[Dict[str, Any]], where: Optional[Dict[str, Any]]) -> bool:
+    """Evaluate a Chroma-style metadata filter against one record's metadata"""
+    if not where:
+        return True
+    metadata = metadata or {}
+
+    for key, condition in where.items():
+        if key == "$and":
+            if not all(matches_where(metadata, clause) for clause in condition):
+                return False
+            continue
+        if key == "$or":
+            if not any(matches_where(metadata, clause) for clause in condition):
+                return False
+            continue
+
+        value = metadata.get(key)
+        if not isinstance(condition, dict):
+            condition = {"$eq": condition}
+        for operator, operand in condition.items():
+            if operator == "$eq":
+                ok = value == operand
+            elif operator == "$ne":
+                ok = value != operand
+            elif operator == "$in":
+                ok = value in operand
+            elif operator == "$nin":
+                ok = value not in operand
+            elif operator in ("$gt", "$gte", "$lt", "$lte"):
+                if value is None:
+                    return False
+                ok = {
+                    "$gt": value > operand,
+                    "$gte": value >= operand,
+                    "$lt": value < operand,
+                    "$lte": value <= operand,
+                }[operator]
+            else:
+                raise ValueError(f"Unsupported where operator: {operator}")
+            if not ok:
+                return False
+    return True
+
+
+def _stored_metadata(metadata: Optional[Dict[str, Any]]) -> Optional[Dict[str, Any]]:
+    # As in Chroma, a None value removes the field
+    return {key: value for key, value in metadata.items() if value is not None} if metadata is not None else None
+
+
+class QuantizedCollection:
+    """In-process vector collection storing embeddings at reduced precision.
+
+    Its data lives only as long as the process, so it is only offered on the
+    in-memory vector store backend.
+
+    Exposes the subset of the Chroma `Collection` API the embedder uses
+    (`add`, `upsert`, `update`, `get`, `delete`, `query`, `count`) so it can
+    stand in for a Chroma collection.
+
+    Vectors are held in memory as float16, or as int8 with one float32 scale
+    per row (symmetric per-vector quantization), which cuts index memory
+    2x or ~4x against float32. When `rescore_dir` is set, full-precision
+    vectors are also appended to a memory-mapped file on disk and the top
+    `k * rescore_factor` candidates of each query are re-ranked with them,
+    recovering float32 ranking for the results that are returned.
+
+    Search is exact (brute force) over the quantized vectors; distances are
+    squared L2, matching Chroma's default space.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        precision: str = "int8",
+        rescore_dir: Optional[str] = None,
+        rescore_factor: int = 4,
+        metadata: Optional[Dict[str, Any]] = None,
+    ):
+        if precision not in ("float16", "int8"):
+            raise ValueError(f"Unsupported quantized precision: {precision}")
+        self.name = name
+        self.precision = precision
+        self.metadata = dict(metadata or {}, embedding_precision=precision)
+        self.rescore_factor = max(rescore_factor, 1)
+
+        self._rescore_path = None
+        if rescore_dir:
+            os.makedirs(rescore_dir, exist_ok=True)
+            self._rescore_path = os.path.join(rescore_dir, f"{name}.f32")
+            # Collections only live as long as the process, so a file left by an earlier one is stale
+            if os.path.exists(self._rescore_path):
+                os.remove(self._rescore_path)
+
+        self._lock = threading.RLock()
+        self._ids: List[str] = []
+        self._positions: Dict[str, int] = {}
+        self._documents: List[Optional[str]] = []
+        self._metadatas: List[Optional[Dict[str, Any]]] = []
+        self._dim: Optional[int] = None
+        self._capacity = 0
+        self._codes: Optional[np.ndarray] = None
+        self._scales: Optional[np.ndarray] = None
+        self._sq_norms: Optional[np.ndarray] = None
+        self._full: Optional[np.memmap] = None
+
+    # Storage
+
+    def _allocate(self, dim: int, capacity: int):
+        code_dtype = np.int8 if self.precision == "int8" else np.float16
+        codes = np.zeros((capacity, dim), dtype=code_dtype)
+        scales = np.ones(capacity, dtype=np.float32)
+        sq_norms = np.zeros(capacity, dtype=np.float32)
+        n = len(self._ids)
+        if self._codes is not None:
+            codes[:n] = self._codes[:n]
+            scales[:n] = self._scales[:n]
+            sq_norms[:n] = self._sq_norms[:n]
+        self._codes, self._scales, self._sq_norms = codes, scales, sq_norms
+
+        if self._rescore_path:
+            if self._full is not None:
+                self._full.flush()
+                del self._full
+            with open(self._rescore_path, "ab") as f:
+                f.truncate(capacity * dim * 4)
+            self._full = np.memmap(self._rescore_path, dtype=np.float32, mode="r+", shape=(capacity, dim))
+
+        self._dim = dim
+        self._capacity = capacity
+
+    def _ensure_capacity(self, rows: int, dim: int):
+        if self._dim is None:
+            self._allocate(dim, max(_INITIAL_CAPACITY, rows))
+        elif dim != self._dim:
+            raise ValueError(f"Embedding dimension {dim} does not match collection dimensionality {self._dim}")
+        elif rows > self._capacity:
+            self._allocate(dim, max(rows, self._capacity * 2))
+
+    def _quantize(self, vectors: np.ndarray):
+        if self.precision == "float16":
+            return vectors.astype(np.float16), np.ones(len(vectors), dtype=np.float32)
+        scales = np.abs(vectors).max(axis=1) / 127.0
+        scales[scales == 0] = 1.0
+        codes = np.clip(np.rint(vectors / scales[:, None]), -127, 127).astype(np.int8)
+        return codes, scales.astype(np.float32)
+
+    def _write_rows(self, positions: np.ndarray, vectors: np.ndarray):
+        codes, scales = self._quantize(vectors)
+        self._codes[positions] = codes
+        self._scales[positions] = scales
+        self._sq_norms[positions] = np.einsum("ij,ij->i", vectors, vectors)
+        if self._full is not None:
+            self._full[positions] = vectors
+
+    def _dequantize(self, positions) -> np.ndarray:
+        return self._codes[positions].astype(np.float32) * self._scales[positions, None]
+
+    def _vectors(self, positions) -> np.ndarray:
+        if self._full is not None:
+            return np.asarray(self._full[positions])
+        return self._dequantize(positions)
+
+    # Chroma Collection API
+
+    def count(self) -> int:
+        return len(self._ids)
+
+    def add(self, ids, embeddings, documents=None, metadatas=None):
+        duplicates = [chunk_id for chunk_id in ids if chunk_id in self._positions]
+        if duplicates:
+            logger.warning(f"Ignoring {len(duplicates)} existing ids in collection '{self.name}'")
+        fresh = [i for i, chunk_id in enumerate(ids) if chunk_id not in self._positions]
+        self._write(
+            [ids[i] for i in fresh],
+            np.asarray(embeddings, dtype=np.float32)[fresh] if fresh else None,
+            [documents[i] for i in fresh] if documents is not None else None,
+            [metadatas[i] for i in fresh] if metadatas is not None else None,
+        )
+
+    def upsert(self, ids, embeddings, documents=None, metadatas=None):
+        self._write(list(ids), np.asarray(embeddings, dtype=np.float32), documents, metadatas)
+
+    def update(self, ids, embeddings=None, documents=None, metadatas=None):
+        with self._lock:
+            known = [i for i, chunk_id in enumerate(ids) if chunk_id in self._positions]
+            for i in known:
+                position = self._positions[ids[i]]
+                if documents is not None:
+                    self._documents[position] = documents[i]
+                if metadatas is not None:
+                    self._metadatas[position] = _stored_metadata(metadatas[i])
+            if embeddings is not None and known:
+                vectors = np.asarray(embeddings, dtype=np.float32)[known]
+                self._write_rows(np.array([self._positions[ids[i]] for i in known]), vectors)
+
+    def _write(self, ids: List[str], vectors: Optional[np.ndarray], documents, metadatas):
+        if not ids:
+            return
+        if vectors.ndim != 2 or len(vectors) != len(ids):
+            raise ValueError("Expected one embedding per id")
+
+        with self._lock:
+            new_ids = [chunk_id for chunk_id in dict.fromkeys(ids) if chunk_id not in self._positions]
+            self._ensure_capacity(len(self._ids) + len(new_ids), vectors.shape[1])
+            for chunk_id in new_ids:
+                self._positions[chunk_id] = len(self._ids)
+                self._ids.append(chunk_id)
+                self._documents.append(None)
+                self._metadatas.append(None)
+
+            positions = np.array([self._positions[chunk_id] for chunk_id in ids])
+            self._write_rows(positions, vectors)
+            for i, position in enumerate(positions):
+                if documents is not None:
+                    self._documents[position] = documents[i]
+                if metadatas is not None:
+                    self._metadatas[position] = _stored_metadata(metadatas[i])
+
+    def delete(self, ids: Optional[Sequence[str]] = None, where: Optional[Dict[str, Any]] = None):
+        if ids is None and not where:
+            raise ValueError("delete() needs ids or a where filter; drop the collection to remove everything")
+        with self._lock:
+            targets = self._select(ids, where)
+            # Swap-remove keeps the arrays dense: the last row moves into each freed slot
+            for position in sorted(targets, reverse=True):
+                last = len(self._ids) - 1
+                removed_id = self._ids[position]
+                if position != last:
+                    moved_id = self._ids[last]
+                    self._ids[position] = moved_id
+                    self._documents[position] = self._documents[last]
+                    self._metadatas[position] = self._metadatas[last]
+                    self._codes[position] = self._codes[last]
+                    self._scales[position] = self._scales[last]
+                    self._sq_norms[position] = self._sq_norms[last]
+                    if self._full is not None:
+                        self._full[position] = self._full[last]
+                    self._positions[moved_id] = position
+                del self._positions[removed_id]
+                self._ids.pop()
+                self._documents.pop()
+                self._metadatas.pop()
+
+    def _select(self, ids: Optional[Sequence[str]], where: Optional[Dict[str, Any]]) -> List[int]:
+        if ids is not None:
+            positions = [self._positions[chunk_id] for chunk_id in ids if chunk_id in self._positions]
+        else:
+            positions = range(len(self._ids))
+        if where:
+            positions = [p for p in positions if matches_where(self._metadatas[p], where)]
+        return list(positions)
+
+    def get(
+        self,
+        ids: Optional[Sequence[str]] = None,
+        where: Optional[Dict[str, Any]] = None,
+        limit: Optional[int] = None,
+        offset: Optional[int] = None,
+        include: Sequence[str] = ("documents", "metadatas"),
+    ) -> Dict[str, Any]:
+        with self._lock:
+            positions = self._select(ids, where)
+            positions = positions[offset or 0:]
+            if limit is not None:
+                positions = positions[:limit]
+            embeddings = None
+            if "embeddings" in include:
+                embeddings = self._vectors(positions) if positions else []
+            return {
+                "ids": [self._ids[p] for p in positions],
+                "documents": [self._documents[p] for p in positions] if "documents" in include else None,
+                "metadatas": [self._metadatas[p] for p in positions] if "metadatas" in include else None,
+                "embeddings": embeddings,
+            }
+
+    def query(
+        self,
+        query_embeddings,
+        n_results: int = 10,
+        where: Optional[Dict[str, Any]] = None,
+        include: Sequence[str] = ("documents", "metadatas", "distances"),
+    ) -> Dict[str, Any]:
+        queries = np.atleast_2d(np.asarray(query_embeddings, dtype=np.float32))
+        results: Dict[str, List] = {"ids": [], "documents": [], "metadatas": [], "distances": [], "embeddings": []}
+
+        with self._lock:
+            n = len(self._ids)
+            candidates = np.arange(n) if not where else np.array(self._select(None, where), dtype=int)
+
+            for query in queries:
+                top = self._search(query, candidates, n_results)
+                results["ids"].append([self._ids[p] for p in top[0]])
+                results["documents"].append([self._documents[p] for p in top[0]])
+                results["metadatas"].append([self._metadatas[p] for p in top[0]])
+                results["distances"].append(top[1].tolist())
+                results["embeddings"].append(self._vectors(top[0]) if "embeddings" in include and len(top[0]) else [])
+
+        for key in ("documents", "metadatas", "distances", "embeddings"):
+            if key not in include:
+                results[key] = None
+        return results
+
+    def _search(self, query: np.ndarray, candidates: np.ndarray, k: int):
+        if candidates.size == 0 or k <= 0:
+            return np.empty(0, dtype=int), np.empty(0, dtype=np.float32)
+
+        shortlist = min(candidates.size, k * self.rescore_factor if self._full is not None else k)
+        query_sq_norm = float(query @ query)
+        contiguous = candidates.size == len(self._ids)
+        positions = np.empty(0, dtype=int)
+        distances = np.empty(0, dtype=np.float32)
+
+        # Blocks keep the per-query working set at _SEARCH_BLOCK_ROWS float32 rows, however large the index
+        for start in range(0, candidates.size, _SEARCH_BLOCK_ROWS):
+            end = min(start + _SEARCH_BLOCK_ROWS, candidates.size)
+            # Without a filter the block is a view of the codes; a filter gathers just its rows
+            block = slice(start, end) if contiguous else candidates[start:end]
+            block_positions = candidates[start:end]
+            # ||q - v||^2 = ||q||^2 + ||v||^2 - 2 q.v, with q.v taken on the quantized codes
+            dots = (self._codes[block].astype(np.float32) @ query) * self._scales[block]
+            block_distances = query_sq_norm + self._sq_norms[block] - 2.0 * dots
+
+            positions = np.concatenate([positions, block_positions])
+            distances = np.concatenate([distances, block_distances])
+            if positions.size > shortlist:
+                keep = np.argpartition(distances, shortlist - 1)[:shortlist]
+                positions, distances = positions[keep], distances[keep]
+
+        if self._full is not None:
+            # Re-rank the shortlist against the full-precision vectors on disk
+            exact = np.asarray(self._full[positions]) - query
+            distances = np.einsum("ij,ij->i", exact, exact)
+
+        best = np.argsort(distances, kind="stable")[:k]
+        return positions[best], distances[best].astype(np.float32)
+
+    def memory_bytes(self) -> int:
+        """Bytes allocated for the vectors: spare capacity and the full-precision rescoring file included"""
+        if self._dim is None:
+            return 0
+        total = self._codes.nbytes + self._scales.nbytes + self._sq_norms.nbytes
+        if self._full is not None:
+            total += self._full.nbytes
+        return total
@@ -0,0 +1,83 @@
+import json
+import os
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Optional, Tuple
+
+from utils.embedding_cache import normalize_text
+
+SEARCH_CACHE_MAX_ENTRIES = int(os.getenv("SEARCH_CACHE_MAX_ENTRIES", "2048"))
+SEARCH_CACHE_TTL_SECONDS = float(os.getenv("SEARCH_CACHE_TTL_SECONDS", "300"))
+
+
+class QueryResultCache:
+    """TTL + LRU cache of ranked search results per (query, filter).
+
+    Every key embeds the collection's write generation, so storing new chunks
+    in a collection invalidates all of its cached results in O(1); stale
+    entries simply age out of the LRU.
+    """
+
+    def __init__(self, max_entries: int, ttl_seconds: float):
+        self._max_entries = max_entries
+        self._ttl = ttl_seconds
+        self._entries: "OrderedDict[Tuple, Tuple[float, Any]]" = OrderedDict()
+        self._generations: Dict[str, int] = {}
+        self._lock = threading.Lock()
+        self._hits = 0
+        self._misses = 0
+
+    def key(
+        self, collection_name: str, model_name: str, query: str, where: Optional[Dict], k: int, mode: str = "dense"
+    ) -> Tuple:
+        """Cache key for a query, bound to the collection's current write generation.
+
+        Take the key before querying the collection: a write that lands while
+        the query runs bumps the generation, so the result is stored under a
+        key that is already stale and never served.
+        """
+        with self._lock:
+            generation = self._generations.get(collection_name, 0)
+        return (
+            collection_name, generation, model_name, mode, normalize_text(query), json.dumps(where, sort_keys=True), k
+        )
+
+    def get(self, key: Tuple):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or entry[0] < time.monotonic():
+                self._entries.pop(key, None)
+                self._misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self._hits += 1
+            return entry[1]
+
+    def put(self, key: Tuple, value: Any):
+        with self._lock:
+            self._entries[key] = (time.monotonic() + self._ttl, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self._max_entries:
+                self._entries.popitem(last=False)
+
+    def invalidate(self, collection_name: str):
+        """Drop every cached result for a collection after its contents change"""
+        with self._lock:
+            self._generations[collection_name] = self._generations.get(collection_name, 0) + 1
+
+    def stats(self) -> Dict:
+        with self._lock:
+            lookups = self._hits + self._misses
+            return {
+                "hits": self._hits,
+                "misses": self._misses,
+                "hit_rate": round(self._hits / lookups, 4) if lookups else 0.0,
+                "entries": len(self._entries),
+            }
+
+
+query_cache = QueryResultCache(
+    max_entries=SEARCH_CACHE_MAX_ENTRIES,
+    ttl_seconds=SEARCH_CACHE_TTL_SECONDS,
+)
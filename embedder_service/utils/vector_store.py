@@ -0,0 +1,225 @@
+import hashlib
+import logging
+import os
+import re
+import threading
+from typing import Dict, Optional
+
+import chromadb
+from chromadb.config import Settings
+from chromadb.errors import NotFoundError
+
+from utils.lexical_index import lexical_indexes
+from utils.manifest import MANIFEST_COLLECTION, manifest_store
+from utils.quantized_collection import QuantizedCollection
+from utils.query_cache import query_cache
+
+logger = logging.getLogger(__name__)
+
+# memory: in-process, lost on restart; persistent: local disk; http: the bundled Chroma server
+VECTOR_STORE_BACKEND = os.getenv("VECTOR_STORE_BACKEND", "memory")
+CHROMA_PERSIST_DIR = os.getenv("CHROMA_PERSIST_DIR", "/data/chroma")
+CHROMA_HOST = os.getenv("CHROMA_HOST", "chromadb")
+CHROMA_PORT = int(os.getenv("CHROMA_PORT", "8000"))
+# Memory budget for loaded collection segments; Chroma unloads least recently used ones beyond it
+CHROMA_MEMORY_LIMIT_MB = int(os.getenv("CHROMA_MEMORY_LIMIT_MB", "0"))
+# Caps on the memory backend, 0 disables them. A write that would exceed a cap is refused, since
+# unloading an in-memory collection would lose it; persistent and remote Chroma unload cold segments
+# through CHROMA_MEMORY_LIMIT_MB instead.
+VECTOR_STORE_MAX_COLLECTIONS = int(os.getenv("VECTOR_STORE_MAX_COLLECTIONS", "0"))
+VECTOR_STORE_MAX_RECORDS = int(os.getenv("VECTOR_STORE_MAX_RECORDS_PER_COLLECTION", "0"))
+VECTOR_STORE_SHARD_BY_SESSION = os.getenv("VECTOR_STORE_SHARD_BY_SESSION", "false").lower() in ("1", "true", "yes")
+
+# Build the lexical index of every stored collection in the background at startup
+LEXICAL_INDEX_WARM = os.getenv("LEXICAL_INDEX_WARM", "true").lower() in ("1", "true", "yes")
+
+QUANTIZED_RESCORE_DIR = os.getenv("QUANTIZED_RESCORE_DIR", "/tmp/omnipdf/vectors")
+QUANTIZED_RESCORE_FACTOR = int(os.getenv("QUANTIZED_RESCORE_FACTOR", "4"))
+
+_COLLECTION_NAME_REGEX = re.compile(r"^[a-zA-Z0-9][a-zA-Z0-9._-]{1,510}[a-zA-Z0-9]$")
+
+_client = None
+_client_lock = threading.Lock()
+
+# Chroma's HNSW index always stores float32, so reduced-precision collections live here instead.
+# They are as ephemeral as the memory backend, the only one they are offered on.
+_quantized_collections: Dict[str, QuantizedCollection] = {}
+_quantized_lock = threading.Lock()
+
+
+class UnsupportedPrecisionError(ValueError):
+    """A reduced embedding precision was requested on a backend that could not keep it"""
+
+
+class VectorStoreFullError(RuntimeError):
+    """A write would take the memory backend past one of its caps"""
+
+
+def create_client(backend: str = VECTOR_STORE_BACKEND):
+    """Build the Chroma client for a backend"""
+
+    if backend == "http":
+        # One client for the whole process, so its HTTP connections are pooled and kept alive
+        return chromadb.HttpClient(host=CHROMA_HOST, port=CHROMA_PORT, settings=Settings(anonymized_telemetry=False))
+
+    settings = Settings(anonymized_telemetry=False)
+    if CHROMA_MEMORY_LIMIT_MB:
+        settings = Settings(
+            anonymized_telemetry=False,
+            chroma_segment_cache_policy="LRU",
+            chroma_memory_limit_bytes=CHROMA_MEMORY_LIMIT_MB * 1024 * 1024
+        )
+
+    if backend == "memory":
+        return chromadb.EphemeralClient(settings=settings)
+    if backend == "persistent":
+        return chromadb.PersistentClient(path=CHROMA_PERSIST_DIR, settings=settings)
+    raise ValueError(f"Unsupported vector store backend: {backend}")
+
+
+def get_client():
+    """The shared Chroma client, created on first use"""
+
+    global _client
+    if _client is None:
+        with _client_lock:
+            if _client is None:
+                _client = create_client()
+                logger.info(f"Using '{VECTOR_STORE_BACKEND}' vector store backend")
+                if VECTOR_STORE_BACKEND != "memory" and (VECTOR_STORE_MAX_COLLECTIONS or VECTOR_STORE_MAX_RECORDS):
+                    logger.info("Vector store caps only apply to the memory backend; use CHROMA_MEMORY_LIMIT_MB")
+    return _client
+
+
+def collection_name_for(collection_name: str, session_id: Optional[str] = None) -> str:
+    """Physical collection holding a session's chunks.
+
+    With VECTOR_STORE_SHARD_BY_SESSION each session gets its own collection, so
+    its searches only scan its own vectors and it can be dropped as a unit.
+    """
+
+    if not VECTOR_STORE_SHARD_BY_SESSION or not session_id:
+        return collection_name
+    name = f"{collection_name}--{session_id}"
+    if not _COLLECTION_NAME_REGEX.match(name):
+        name = f"{collection_name}--{hashlib.sha1(session_id.encode('utf-8')).hexdigest()[:16]}"
+    return name
+
+
+def _check_collection_cap(name: str):
+    """Refuse to create another collection on the memory backend once the collection cap is reached"""
+
+    if not VECTOR_STORE_MAX_COLLECTIONS or VECTOR_STORE_BACKEND != "memory":
+        return
+
+    stored = sum(1 for collection in get_client().list_collections() if collection.name != MANIFEST_COLLECTION)
+    if stored + len(_quantized_collections) >= VECTOR_STORE_MAX_COLLECTIONS:
+        raise VectorStoreFullError(
+            f"Cannot create collection '{name}': the vector store already holds "
+            f"{VECTOR_STORE_MAX_COLLECTIONS} collections (VECTOR_STORE_MAX_COLLECTIONS)"
+        )
+
+
+def check_record_cap(collection, added: int):
+    """Refuse a write that would take a collection on the memory backend past the record cap.
+
+    `added` is the net number of records the write adds; the collection's
+    current size is counted from the store itself, so records written before
+    a restart or by other documents are included.
+    """
+
+    if not VECTOR_STORE_MAX_RECORDS or VECTOR_STORE_BACKEND != "memory" or added <= 0:
+        return
+
+    total = collection.count() + added
+    if total > VECTOR_STORE_MAX_RECORDS:
+        raise VectorStoreFullError(
+            f"Cannot store {added} more records in '{collection.name}': it would hold {total}, "
+            f"more than the {VECTOR_STORE_MAX_RECORDS} allowed (VECTOR_STORE_MAX_RECORDS_PER_COLLECTION)"
+        )
+
+
+def drop_collection(name: str):
+    """Delete a collection together with its manifests and cached search results"""
+
+    with _quantized_lock:
+        quantized = _quantized_collections.pop(name, None)
+    if quantized is None:
+        try:
+            get_client().delete_collection(name=name)
+        except NotFoundError:
+            pass
+
+    manifest_store.remove_collection(name)
+    lexical_indexes.drop(name)
+    query_cache.invalidate(name)
+
+
+def get_collection(name: str, embedding_function):
+    """Open an existing collection, whichever precision it was created with.
+
+    Raises `chromadb.errors.NotFoundError` if the collection does not exist.
+    """
+    collection = _quantized_collections.get(name)
+    if collection is None:
+        collection = get_client().get_collection(name=name, embedding_function=embedding_function)
+    return collection
+
+
+def get_or_create_collection(name: str, embedding_function, precision: str = "float32"):
+    """Open a collection, creating it with the requested embedding precision if it does not exist.
+
+    The precision is fixed when a collection is created; asking for another
+    one later keeps the existing collection as it is. Reduced-precision
+    collections are held in this process only, so creating one on the
+    persistent or http backend raises `UnsupportedPrecisionError` rather than
+    keeping data that a restart or another replica would not see. Creating a
+    collection beyond the collection cap raises `VectorStoreFullError`.
+    """
+    with _quantized_lock:
+        collection = _quantized_collections.get(name)
+        capped = VECTOR_STORE_MAX_COLLECTIONS and VECTOR_STORE_BACKEND == "memory"
+        if collection is None and (precision != "float32" or capped):
+            try:
+                get_client().get_collection(name=name, embedding_function=embedding_function)
+            except NotFoundError:
+                # Checked and created under the lock, so concurrent requests cannot overshoot the cap
+                _check_collection_cap(name)
+                if precision == "float32":
+                    return get_client().create_collection(name=name, embedding_function=embedding_function)
+                if VECTOR_STORE_BACKEND != "memory":
+                    raise UnsupportedPrecisionError(
+                        f"{precision} embeddings are only supported on the memory vector store backend, "
+                        f"not '{VECTOR_STORE_BACKEND}'; use float32"
+                    )
+                collection = QuantizedCollection(
+                    name,
+                    precision=precision,
+                    rescore_dir=QUANTIZED_RESCORE_DIR or None,
+                    rescore_factor=QUANTIZED_RESCORE_FACTOR
+                )
+                _quantized_collections[name] = collection
+                logger.info(f"Created {precision} collection '{name}'")
+
+    if collection is not None:
+        if collection.precision != precision:
+            logger.warning(f"Collection '{name}' stores {collection.precision} embeddings; ignoring {precision}")
+        return collection
+
+    if precision != "float32":
+        logger.warning(f"Collection '{name}' already stores float32 embeddings; ignoring {precision}")
+    return get_client().get_or_create_collection(name=name, embedding_function=embedding_function)
+
+
+def warm_lexical_indexes():
+    """Build the lexical index of every stored collection, so no search or write has to wait for it"""
+
+    if not LEXICAL_INDEX_WARM:
+        return
+    for stored in get_client().list_collections():
+        if stored.name == MANIFEST_COLLECTION:
+            continue
+        try:
+            lexical_indexes.get(get_collection(stored.name, None))
+        except Exception as e:
+            logger.warning(f"Could not build the lexical index of '{stored.name}': {e}")
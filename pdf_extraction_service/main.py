@@ -1,5 +1,8 @@
+from contextlib import asynccontextmanager
 from fastapi import FastAPI
 from routers import health, extractor
+from utils.converter_pool import converter_pool
+import asyncio
 import logging
 
 # Set up logger
@@ -8,7 +11,17 @@ logging.basicConfig(
     format="%(asctime)s [%(levelname)s] %(name)s: %(message)s"
 )
 
-app = FastAPI(root_path="/pdf_extraction")
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Models load in the background so /health answers meanwhile; /ready reports when they are loaded
+    preload = asyncio.create_task(asyncio.to_thread(converter_pool.preload))
+    yield
+    # Shutting down does not wait for models that are still loading
+    preload.cancel()
+
+
+app = FastAPI(root_path="/pdf_extraction", lifespan=lifespan)
 
 app.include_router(health.router)
 app.include_router(extractor.router)
\ No newline at end of file
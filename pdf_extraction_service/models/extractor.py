@@ -13,6 +13,9 @@ class PDFDataResponse(BaseModel):
     key_value_items: List[Any]
     form_items: List[Any]
     pages: Any
+    # Body text joined in reading order, and per-page character ranges of it with provenance bboxes
+    text: str = ""
+    pages_info: List[Any] = []
 
 class ExtractResponse(BaseModel):
     doc_id: str
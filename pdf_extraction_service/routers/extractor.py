@@ -12,10 +12,8 @@ from shared_utils.s3_utils import (
 )
 
 from docling_core.types.doc import PictureItem
-from docling.datamodel.base_models import InputFormat
-from docling.datamodel.pipeline_options import PdfPipelineOptions
-from docling.document_converter import DocumentConverter, PdfFormatOption
-from docling.datamodel.accelerator_options import AcceleratorDevice, AcceleratorOptions
+from utils.converter_pool import DEFAULT_PROFILE, converter_pool
+from utils.page_text import page_text
 
 
 router = APIRouter(prefix="/documents", tags=["documents"])
@@ -24,21 +22,12 @@ logger = logging.getLogger(__name__)
 def process_pdf(doc_id: str, presign_url: str, img_scale: float = 2.0):
     start_time = time.time()
 
-    opts = PdfPipelineOptions()
-    opts.images_scale = img_scale
-    opts.generate_picture_images = True
-    opts.generate_table_images = False
-    opts.generate_page_images = True
+    # Converters with loaded models are shared across jobs, one per profile at a time
+    profile = DEFAULT_PROFILE._replace(images_scale=img_scale)
 
-    opts.accelerator_options = AcceleratorOptions(
-        num_threads=4, device=AcceleratorDevice.AUTO
-    )
-    
     try:
-        converter = DocumentConverter(
-            format_options={InputFormat.PDF: PdfFormatOption(pipeline_options=opts)}
-        )
-        result = converter.convert(presign_url)
+        with converter_pool.converter(profile) as converter:
+            result = converter.convert(presign_url)
         data = result.document.export_to_dict()
 
         for ref in ['body', 'groups']:
@@ -67,7 +56,9 @@ def process_pdf(doc_id: str, presign_url: str, img_scale: float = 2.0):
         pages = data.get("pages", {})
         for page in pages.values():
             page.get("image", {}).pop("uri", None)
-        
+
+        # Plain text with its page layout, ready to send to the embedder service
+        text, pages_info = page_text(data.get('texts', []))
 
         job_data = {
             "doc_id": doc_id,
@@ -83,7 +74,9 @@ def process_pdf(doc_id: str, presign_url: str, img_scale: float = 2.0):
                 "tables": data.get('tables', []),
                 "key_value_items": data.get('key_value_items', []),
                 "form_items": data.get('form_items', []),
-                "pages": data.get('pages', {})
+                "pages": data.get('pages', {}),
+                "text": text,
+                "pages_info": pages_info
             }
         }
 
@@ -1,7 +1,17 @@
 from fastapi import APIRouter
+from fastapi.responses import JSONResponse
+from utils.converter_pool import converter_pool
 
 router = APIRouter()
 
 @router.get("/health")
 async def health_check():
-    return {"status": "ok"}
\ No newline at end of file
+    return {"status": "ok"}
+
+@router.get("/ready")
+async def readiness_check():
+    """Ready once the docling converters are loaded and warmed up"""
+    if converter_pool.ready:
+        return {"status": "ready"}
+    status = "failed" if converter_pool.error else "loading"
+    return JSONResponse(content={"status": status}, status_code=503)
@@ -0,0 +1,141 @@
+import io
+import logging
+import os
+import threading
+import time
+from contextlib import contextmanager
+from typing import Dict, Iterable, List, NamedTuple, Optional
+
+import pymupdf
+from docling.datamodel.accelerator_options import AcceleratorDevice, AcceleratorOptions
+from docling.datamodel.base_models import DocumentStream, InputFormat
+from docling.datamodel.pipeline_options import PdfPipelineOptions
+from docling.document_converter import DocumentConverter, PdfFormatOption
+
+logger = logging.getLogger(__name__)
+
+EXTRACTION_NUM_THREADS = int(os.getenv("EXTRACTION_NUM_THREADS", "4"))
+# Converters kept per profile; each holds its own copy of the layout and table models.
+# By default there are enough to keep every core busy, and never fewer than two concurrent extractions.
+EXTRACTION_CONVERTERS_PER_PROFILE = int(
+    os.getenv("EXTRACTION_CONVERTERS_PER_PROFILE", str(max(2, (os.cpu_count() or 1) // max(EXTRACTION_NUM_THREADS, 1))))
+)
+EXTRACTION_DEVICE = os.getenv("EXTRACTION_DEVICE", AcceleratorDevice.AUTO.value)
+
+
+class ConverterProfile(NamedTuple):
+    """Pipeline options a converter is built with; converters are shared per profile"""
+
+    images_scale: float = 2.0
+    generate_picture_images: bool = True
+    generate_table_images: bool = False
+    generate_page_images: bool = True
+    num_threads: int = EXTRACTION_NUM_THREADS
+    device: str = EXTRACTION_DEVICE
+
+    def pipeline_options(self) -> PdfPipelineOptions:
+        opts = PdfPipelineOptions()
+        opts.images_scale = self.images_scale
+        opts.generate_picture_images = self.generate_picture_images
+        opts.generate_table_images = self.generate_table_images
+        opts.generate_page_images = self.generate_page_images
+        opts.accelerator_options = AcceleratorOptions(
+            num_threads=self.num_threads, device=AcceleratorDevice(self.device)
+        )
+        return opts
+
+
+DEFAULT_PROFILE = ConverterProfile()
+
+
+def _warmup_pdf() -> bytes:
+    """A one-page PDF with a line of text, converted once by every new converter"""
+    doc = pymupdf.open()
+    page = doc.new_page(width=300, height=200)
+    page.insert_text((40, 80), "OmniPDF extraction warm-up page.", fontsize=12)
+    data = doc.tobytes()
+    doc.close()
+    return data
+
+
+class ConverterPool:
+    """Process-wide docling converters, reused across extraction jobs.
+
+    Building a DocumentConverter loads the layout, table structure and OCR
+    models, so each profile keeps up to `size` converters, built and warmed up
+    once. A job checks one out for the duration of its conversion; when all of
+    a profile's converters are busy, it waits for one to be returned.
+    """
+
+    def __init__(self, size: int):
+        self._size = max(1, size)
+        self._available = threading.Condition()
+        self._idle: Dict[ConverterProfile, List[DocumentConverter]] = {}
+        self._created: Dict[ConverterProfile, int] = {}
+        self.ready = False
+        self.error: Optional[str] = None
+
+    @contextmanager
+    def converter(self, profile: ConverterProfile = DEFAULT_PROFILE):
+        converter = self._checkout(profile)
+        try:
+            yield converter
+        finally:
+            self._checkin(profile, converter)
+
+    def preload(self, profiles: Iterable[ConverterProfile] = (DEFAULT_PROFILE,)):
+        """Build and warm up every converter of the profiles, then mark the pool ready"""
+        try:
+            for profile in profiles:
+                # Holding them all at once makes the pool build the full set
+                held = []
+                try:
+                    for _ in range(self._size):
+                        held.append(self._checkout(profile))
+                finally:
+                    for converter in held:
+                        self._checkin(profile, converter)
+        except Exception as e:
+            logger.exception(f"Failed to load the docling models: {e}")
+            self.error = str(e)
+            return
+        self.ready = True
+        logger.info("Docling converters are loaded")
+
+    def _checkout(self, profile: ConverterProfile) -> DocumentConverter:
+        with self._available:
+            while True:
+                idle = self._idle.setdefault(profile, [])
+                if idle:
+                    return idle.pop()
+                if self._created.get(profile, 0) < self._size:
+                    self._created[profile] = self._created.get(profile, 0) + 1
+                    break
+                self._available.wait()
+
+        # Built outside the lock, so jobs of other profiles are not held up meanwhile
+        try:
+            return self._build(profile)
+        except Exception:
+            with self._available:
+                self._created[profile] -= 1
+                self._available.notify()
+            raise
+
+    def _checkin(self, profile: ConverterProfile, converter: DocumentConverter):
+        with self._available:
+            self._idle[profile].append(converter)
+            self._available.notify()
+
+    def _build(self, profile: ConverterProfile) -> DocumentConverter:
+        start_time = time.time()
+        converter = DocumentConverter(
+            format_options={InputFormat.PDF: PdfFormatOption(pipeline_options=profile.pipeline_options())}
+        )
+        converter.initialize_pipeline(InputFormat.PDF)
+        converter.convert(DocumentStream(name="warmup.pdf", stream=io.BytesIO(_warmup_pdf())))
+        logger.info(f"Loaded docling converter for {profile} in {time.time() - start_time:.2f}s")
+        return converter
+
+
+converter_pool = ConverterPool(EXTRACTION_CONVERTERS_PER_PROFILE)
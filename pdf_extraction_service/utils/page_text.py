@@ -0,0 +1,49 @@
+from typing import Any, Dict, List, Tuple
+
+# Separator between consecutive text items of the plain text
+TEXT_SEPARATOR = "\n\n"
+
+
+def page_text(texts: List[Dict[str, Any]]) -> Tuple[str, List[Dict[str, Any]]]:
+    """Plain text of an exported docling document and the page layout of that text.
+
+    `texts` is the `texts` list of `DoclingDocument.export_to_dict()`. Body
+    text items are joined in reading order; page headers, footers and other
+    furniture are left out. Each item's provenance places a character span of
+    it on a page, so the returned `pages_info` has one entry per page with
+    `page_number`, the `char_start`/`char_end` range it covers in the text and
+    its `items`, each a `{"char_start", "char_end", "bbox"}` dict. This is the
+    shape the embedder service's `/embed` expects.
+    """
+
+    parts = []
+    pages: Dict[int, Dict[str, Any]] = {}
+    offset = 0
+    for item in texts:
+        text = item.get("text") or ""
+        if not text or item.get("content_layer", "body") != "body":
+            continue
+        if parts:
+            offset += len(TEXT_SEPARATOR)
+        parts.append(text)
+
+        for prov in item.get("prov") or []:
+            page_number = prov.get("page_no")
+            if page_number is None:
+                continue
+            span_start, span_end = prov.get("charspan") or (0, len(text))
+            start = offset + min(max(span_start, 0), len(text))
+            end = offset + min(max(span_end, 0), len(text))
+            if end <= start:
+                continue
+
+            page = pages.setdefault(
+                page_number, {"page_number": page_number, "char_start": start, "char_end": end, "items": []}
+            )
+            page["char_start"] = min(page["char_start"], start)
+            page["char_end"] = max(page["char_end"], end)
+            page["items"].append({"char_start": start, "char_end": end, "bbox": prov.get("bbox")})
+        offset += len(text)
+
+    pages_info = sorted(pages.values(), key=lambda page: page["char_start"])
+    return TEXT_SEPARATOR.join(parts), pages_info
@@ -0,0 +1,226 @@
+import asyncio
+import logging
+import os
+import random
+import time
+import uuid
+from contextlib import asynccontextmanager
+from typing import Optional
+
+logger = logging.getLogger(__name__)
+
+REDIS_URL = os.getenv("REDIS_URL")
+# Budgets shared by every replica calling the same LLM server; 0 disables a budget
+LLM_CLUSTER_NAME = os.getenv("LLM_CLUSTER_NAME", "default")
+LLM_CLUSTER_MAX_CONCURRENCY = int(os.getenv("LLM_CLUSTER_MAX_CONCURRENCY", "0"))
+LLM_CLUSTER_RATE_PER_SECOND = float(os.getenv("LLM_CLUSTER_RATE_PER_SECOND", "0"))
+LLM_CLUSTER_BURST = float(os.getenv("LLM_CLUSTER_BURST", str(max(1.0, LLM_CLUSTER_RATE_PER_SECOND))))
+# Slots only interactive requests may take, so chat never queues behind a full translation backlog
+LLM_CLUSTER_INTERACTIVE_RESERVE = int(os.getenv("LLM_CLUSTER_INTERACTIVE_RESERVE", "1"))
+# A lease outlives the slowest LLM call; leases of crashed replicas expire after it
+LLM_CLUSTER_LEASE_SECONDS = float(os.getenv("LLM_CLUSTER_LEASE_SECONDS", "180"))
+
+INTERACTIVE = 0
+BULK = 1
+
+# After a Redis error the cluster limit is skipped for this long; callers keep their local limits
+_REDIS_RETRY_SECONDS = 30
+# Waiters refresh their registration on every poll and disappear this long after their last one
+_WAIT_TTL_SECONDS = 2.0
+_POLL_SECONDS = {INTERACTIVE: 0.02, BULK: 0.1}
+
+# Leases are "tenant|lease_id" in a sorted set scored by expiry, waiters "priority|tenant|lease_id".
+# Admission order: global capacity, then the interactive reserve (bulk waits while any interactive
+# request waits), then the tenant's fair share when other tenants of the same or higher priority
+# wait, then the token bucket.
+_ACQUIRE_SCRIPT = """
+local time = redis.call('TIME')
+local now = tonumber(time[1]) + tonumber(time[2]) / 1000000
+local member = ARGV[1]
+local tenant = ARGV[2]
+local priority = tonumber(ARGV[3])
+local capacity = tonumber(ARGV[4])
+local reserve = tonumber(ARGV[5])
+local rate = tonumber(ARGV[6])
+local burst = tonumber(ARGV[7])
+local lease_seconds = tonumber(ARGV[8])
+local wait_seconds = tonumber(ARGV[9])
+
+redis.call('ZREMRANGEBYSCORE', KEYS[1], '-inf', now)
+redis.call('ZREMRANGEBYSCORE', KEYS[2], '-inf', now)
+
+local waiter = priority .. '|' .. member
+local function wait()
+    redis.call('ZADD', KEYS[2], now + wait_seconds, waiter)
+    return 0
+end
+
+if capacity > 0 then
+    local leases = redis.call('ZRANGE', KEYS[1], 0, -1)
+    if #leases >= capacity then
+        return wait()
+    end
+
+    local tenants = {}
+    local active = 0
+    local held = 0
+    for _, lease in ipairs(leases) do
+        local owner = string.match(lease, '^(.*)|[^|]*$')
+        if not tenants[owner] then
+            tenants[owner] = true
+            active = active + 1
+        end
+        if owner == tenant then
+            held = held + 1
+        end
+    end
+
+    local interactive_waiting = false
+    local others_waiting = false
+    for _, queued in ipairs(redis.call('ZRANGE', KEYS[2], 0, -1)) do
+        local queued_priority, owner = string.match(queued, '^(%d+)|(.*)|[^|]*$')
+        queued_priority = tonumber(queued_priority)
+        if queued_priority < priority then
+            interactive_waiting = true
+        end
+        -- Lower priority waiters do not shrink a tenant's share
+        if owner ~= tenant and queued_priority <= priority then
+            others_waiting = true
+            if not tenants[owner] then
+                tenants[owner] = true
+                active = active + 1
+            end
+        end
+    end
+
+    if priority > 0 and (interactive_waiting or #leases >= capacity - reserve) then
+        return wait()
+    end
+    if others_waiting then
+        if not tenants[tenant] then
+            active = active + 1
+        end
+        if held >= math.max(1, math.floor(capacity / active)) then
+            return wait()
+        end
+    end
+end
+
+if rate > 0 then
+    local bucket = redis.call('HMGET', KEYS[3], 'tokens', 'ts')
+    local tokens = tonumber(bucket[1]) or burst
+    local updated = tonumber(bucket[2]) or now
+    tokens = math.min(burst, tokens + math.max(0, now - updated) * rate)
+    if tokens < 1 then
+        redis.call('HSET', KEYS[3], 'tokens', tokens, 'ts', now)
+        return wait()
+    end
+    redis.call('HSET', KEYS[3], 'tokens', tokens - 1, 'ts', now)
+    redis.call('EXPIRE', KEYS[3], 3600)
+end
+
+redis.call('ZADD', KEYS[1], now + lease_seconds, member)
+redis.call('ZREM', KEYS[2], waiter)
+return 1
+"""
+
+
+class ClusterLLMLimiter:
+    """Concurrency and request-rate budget for one LLM server, shared through Redis.
+
+    Every replica of every service calling the server acquires a lease before
+    each LLM request. Interactive requests have slots reserved for them and
+    hold off new bulk requests while they wait; within the budget, tenants
+    waiting for a slot each get a fair share. Without Redis, or while it is
+    unreachable, requests pass straight through.
+    """
+
+    def __init__(
+        self,
+        redis_url: Optional[str],
+        name: str,
+        max_concurrency: int,
+        rate_per_second: float,
+        burst: float,
+        interactive_reserve: int,
+        lease_seconds: float,
+    ):
+        self.max_concurrency = max_concurrency
+        self.rate_per_second = rate_per_second
+        self.burst = burst
+        self.interactive_reserve = min(interactive_reserve, max(0, max_concurrency - 1))
+        self.lease_seconds = lease_seconds
+        self._keys = [f"llm-limiter:{name}:leases", f"llm-limiter:{name}:waiting", f"llm-limiter:{name}:bucket"]
+        self._redis = None
+        self._script = None
+        self._redis_down_until = 0.0
+
+        if redis_url and (max_concurrency > 0 or rate_per_second > 0):
+            import redis.asyncio
+
+            self._redis = redis.asyncio.Redis.from_url(redis_url, socket_connect_timeout=1, socket_timeout=1)
+            self._script = self._redis.register_script(_ACQUIRE_SCRIPT)
+
+    @property
+    def enabled(self) -> bool:
+        return self._redis is not None and time.monotonic() >= self._redis_down_until
+
+    def _redis_failed(self, e: Exception):
+        logger.warning(f"LLM cluster limiter unavailable, continuing without it: {e}")
+        self._redis_down_until = time.monotonic() + _REDIS_RETRY_SECONDS
+
+    async def acquire(self, tenant: str = "default", priority: int = BULK) -> Optional[str]:
+        """Wait for a lease; returns it, or None when the limiter is not in use"""
+        if not self.enabled:
+            return None
+
+        tenant = tenant.replace("|", "_")
+        lease = f"{tenant}|{uuid.uuid4().hex}"
+        poll = _POLL_SECONDS.get(priority, _POLL_SECONDS[BULK])
+        while True:
+            try:
+                if await self._try_acquire(lease, tenant, priority):
+                    return lease
+            except Exception as e:
+                self._redis_failed(e)
+                return None
+            await asyncio.sleep(random.uniform(0.5, 1.5) * poll)
+
+    async def _try_acquire(self, lease: str, tenant: str, priority: int) -> bool:
+        """One admission attempt; on refusal the lease stays registered as waiting for a while"""
+        args = [
+            lease, tenant, priority, self.max_concurrency, self.interactive_reserve,
+            self.rate_per_second, self.burst, self.lease_seconds, _WAIT_TTL_SECONDS,
+        ]
+        return bool(await self._script(keys=self._keys, args=args))
+
+    async def release(self, lease: Optional[str]):
+        if lease is None or self._redis is None:
+            return
+        try:
+            await self._redis.zrem(self._keys[0], lease)
+        except Exception as e:
+            self._redis_failed(e)
+
+    @asynccontextmanager
+    async def slot(self, tenant: str = "default", priority: int = BULK):
+        lease = await self.acquire(tenant, priority)
+        try:
+            yield lease
+        finally:
+            await self.release(lease)
+
+    async def close(self):
+        if self._redis is not None:
+            await self._redis.aclose()
+
+
+llm_cluster_limiter = ClusterLLMLimiter(
+    REDIS_URL,
+    LLM_CLUSTER_NAME,
+    LLM_CLUSTER_MAX_CONCURRENCY,
+    LLM_CLUSTER_RATE_PER_SECOND,
+    LLM_CLUSTER_BURST,
+    LLM_CLUSTER_INTERACTIVE_RESERVE,
+    LLM_CLUSTER_LEASE_SECONDS,
+)
@@ -2,7 +2,7 @@ import os
 import logging
 import boto3
 from botocore.exceptions import BotoCoreError, ClientError
-from typing import Optional, Union
+from typing import List, Optional, Union
 from pydantic import BaseModel
 
 import json
@@ -56,6 +56,36 @@ def generate_presigned_url(key: str, expiry_seconds: int = 300) -> Optional[str]
         logger.exception(f"Failed to generate presigned URL: {e}")
         return None
 
+def load_json(key: str) -> Optional[dict]:
+    """
+    Loads a JSON object from S3. Returns None if the key does not exist or cannot be read.
+    """
+    try:
+        response = s3_client.get_object(Bucket=S3_BUCKET, Key=key)
+        return json.loads(response["Body"].read().decode("utf-8"))
+    except ClientError as e:
+        if e.response['Error']['Code'] not in ("NoSuchKey", "404"):
+            logger.exception(f"Failed to load {key} from S3: {e}")
+        return None
+    except (BotoCoreError, json.JSONDecodeError) as e:
+        logger.exception(f"Failed to load {key} from S3: {e}")
+        return None
+
+def open_object(key: str):
+    """
+    Opens an object in S3 for streaming reads. Returns its body, to be closed by the caller,
+    or None if the key does not exist or cannot be read.
+    """
+    try:
+        return s3_client.get_object(Bucket=S3_BUCKET, Key=key)["Body"]
+    except ClientError as e:
+        if e.response['Error']['Code'] not in ("NoSuchKey", "404"):
+            logger.exception(f"Failed to open {key} in S3: {e}")
+        return None
+    except BotoCoreError as e:
+        logger.exception(f"Failed to open {key} in S3: {e}")
+        return None
+
 def delete_file(key: str) -> bool:
     """
     Deletes a file from S3 using the given key.
@@ -100,18 +130,28 @@ def save_job(doc_id: str, job_data: Union[dict, BaseModel], status: str, job_typ
 
 def load_job(doc_id: str, job_type: str) -> Optional[dict]:
     """
-    Loads job metadata and data from S3 given a doc_id.
+    Loads job metadata and data from S3 given a doc_id. Returns None if there is no such job.
+    """
+    job = load_json(f"jobs/{job_type}/{doc_id}.json")
+    if job is None:
+        return None
+    return {
+        "doc_id": doc_id,
+        "status": job.get("status", "unknown"),
+        "type": job.get("type", "unknown"),
+        "data": job.get("data", None)
+    }
+
+def delete_jobs(doc_ids: List[str], job_type: str) -> bool:
+    """
+    Deletes the job records of several documents. Records that do not exist are ignored.
     """
+    keys = [{"Key": f"jobs/{job_type}/{doc_id}.json"} for doc_id in doc_ids]
     try:
-        key = f"jobs/{job_type}/{doc_id}.json"
-        response = s3_client.get_object(Bucket=S3_BUCKET, Key=key)
-        job = json.loads(response["Body"].read().decode("utf-8"))
-        return {
-            "doc_id": doc_id,
-            "status": job.get("status", "unknown"),
-            "type": job.get("type", "unknown"),
-            "data": job.get("data", None)
-        }
-    except (ClientError, BotoCoreError, json.JSONDecodeError) as e:
-        logger.exception(f"Failed to load job for doc_id: {doc_id} - {e}")
-        return None
\ No newline at end of file
+        # DeleteObjects takes at most 1000 keys per call
+        for start in range(0, len(keys), 1000):
+            s3_client.delete_objects(Bucket=S3_BUCKET, Delete={"Objects": keys[start:start + 1000], "Quiet": True})
+        return True
+    except (BotoCoreError, ClientError) as e:
+        logger.exception(f"Failed to delete {job_type} job records: {e}")
+        return False
@@ -0,0 +1,5 @@
+import os
+import sys
+
+# Imports resolve the way they do in the containers (PYTHONPATH includes /app)
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
@@ -0,0 +1,91 @@
+import asyncio
+import uuid
+
+import pytest
+
+from shared_utils.llm_rate_limiter import _ACQUIRE_SCRIPT, BULK, INTERACTIVE, ClusterLLMLimiter
+
+fakeredis = pytest.importorskip("fakeredis")
+pytest.importorskip("lupa")
+
+
+def make_limiter(max_concurrency, interactive_reserve=0, rate_per_second=0.0, burst=1.0, lease_seconds=60.0):
+    cluster = ClusterLLMLimiter(
+        None, "test", max_concurrency, rate_per_second, burst, interactive_reserve, lease_seconds
+    )
+    cluster._redis = fakeredis.aioredis.FakeRedis()
+    cluster._script = cluster._redis.register_script(_ACQUIRE_SCRIPT)
+    return cluster
+
+
+def run(coroutine):
+    return asyncio.run(coroutine)
+
+
+async def try_acquire(limiter, tenant, priority=BULK, lease=None):
+    lease = lease or f"{tenant}|{uuid.uuid4().hex}"
+    return lease if await limiter._try_acquire(lease, tenant, priority) else None
+
+
+def test_bulk_leaves_the_interactive_reserve_free():
+    async def scenario():
+        cluster = make_limiter(3, interactive_reserve=1)
+        assert await try_acquire(cluster, "translation")
+        assert await try_acquire(cluster, "translation")
+        assert await try_acquire(cluster, "translation") is None
+        assert await try_acquire(cluster, "chat", INTERACTIVE)
+        assert await try_acquire(cluster, "chat", INTERACTIVE) is None
+
+    run(scenario())
+
+
+def test_waiting_interactive_request_holds_off_bulk():
+    async def scenario():
+        cluster = make_limiter(2)
+        leases = [await try_acquire(cluster, "translation") for _ in range(2)]
+        assert await try_acquire(cluster, "chat", INTERACTIVE, lease="chat|1") is None
+
+        await cluster.release(leases[0])
+        assert await try_acquire(cluster, "translation") is None
+        assert await try_acquire(cluster, "chat", INTERACTIVE, lease="chat|1") == "chat|1"
+
+    run(scenario())
+
+
+def test_tenant_above_its_fair_share_waits_for_others():
+    async def scenario():
+        cluster = make_limiter(4)
+        leases = [await try_acquire(cluster, "doc-a") for _ in range(4)]
+        assert await try_acquire(cluster, "doc-b", lease="doc-b|1") is None
+
+        await cluster.release(leases[0])
+        # doc-a still holds 3 of 4 slots while doc-b waits, so the free one goes to doc-b
+        assert await try_acquire(cluster, "doc-a") is None
+        assert await try_acquire(cluster, "doc-b", lease="doc-b|1") == "doc-b|1"
+
+    run(scenario())
+
+
+def test_expired_leases_free_their_slots():
+    async def scenario():
+        cluster = make_limiter(1, lease_seconds=0.2)
+        assert await try_acquire(cluster, "crashed-replica")
+        assert await try_acquire(cluster, "chat", INTERACTIVE, lease="chat|1") is None
+
+        await asyncio.sleep(0.3)
+        assert await try_acquire(cluster, "chat", INTERACTIVE, lease="chat|1") == "chat|1"
+
+    run(scenario())
+
+
+def test_token_bucket_limits_request_rate():
+    async def scenario():
+        cluster = make_limiter(0, rate_per_second=5.0, burst=2.0)
+        assert await try_acquire(cluster, "translation")
+        assert await try_acquire(cluster, "translation")
+        assert await try_acquire(cluster, "translation") is None
+
+        await asyncio.sleep(0.25)
+        assert await try_acquire(cluster, "translation")
+
+    run(scenario())